@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EquipmentDataset, EquipmentItem
+from .models import EquipmentDataset, EquipmentItem, EquipmentType, LimitViolation, OperatingLimit
 
 
 class EquipmentItemInline(admin.TabularInline):
@@ -23,9 +23,32 @@ class EquipmentDatasetAdmin(admin.ModelAdmin):
     get_item_count.short_description = 'Item Count'
 
 
+@admin.register(EquipmentType)
+class EquipmentTypeAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name']
+    search_fields = ['name']
+
+
 @admin.register(EquipmentItem)
 class EquipmentItemAdmin(admin.ModelAdmin):
     list_display = ['equipment_name', 'type', 'flowrate', 'pressure', 'temperature', 'dataset', 'created_at']
     list_filter = ['type', 'dataset', 'created_at']
-    search_fields = ['equipment_name', 'type']
+    search_fields = ['equipment_name', 'type__name']
+    list_select_related = ['type', 'dataset']
     readonly_fields = ['created_at']
+
+
+@admin.register(OperatingLimit)
+class OperatingLimitAdmin(admin.ModelAdmin):
+    list_display = ['type', 'field', 'minimum', 'maximum']
+    list_filter = ['field']
+    search_fields = ['type__name']
+    list_select_related = ['type']
+
+
+@admin.register(LimitViolation)
+class LimitViolationAdmin(admin.ModelAdmin):
+    list_display = ['item', 'field', 'bound', 'value', 'limit', 'dataset']
+    list_filter = ['field', 'bound', 'dataset']
+    raw_id_fields = ['item']
+    list_select_related = ['item', 'item__type', 'dataset']
@@ -0,0 +1,105 @@
+"""
+Admission control for ingest requests (uploads and appends).
+
+Parsing a large file and holding the SQLite write transaction are both
+expensive, and running many at once only makes them starve each other.
+UploadAdmission caps the number of concurrent ingests and the total size of
+the request bodies being ingested. A request over the limits waits up to
+UPLOAD_QUEUE_TIMEOUT seconds for capacity and is then rejected; views turn the
+rejection into 429 Too Many Requests with a Retry-After header.
+
+Sizes come from the Content-Length header, so a request is admitted or
+rejected before Django reads its body. A body larger than the byte limit on
+its own is admitted once nothing else is in flight. Limits are per server
+process, like the metrics.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when an ingest cannot be admitted within the queue timeout"""
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f'Server is busy ingesting other uploads; retry in {retry_after} seconds.')
+
+
+class UploadAdmission:
+    """Counting gate over concurrent ingests and in-flight request bytes"""
+
+    def __init__(self, max_concurrent, max_bytes, queue_timeout, retry_after):
+        self.max_concurrent = max_concurrent
+        self.max_bytes = max_bytes
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._condition = threading.Condition()
+        self.active = 0
+        self.active_bytes = 0
+        self.waiting = 0
+
+    def _fits(self, size):
+        if self.active >= self.max_concurrent:
+            return False
+        return self.active == 0 or self.active_bytes + size <= self.max_bytes
+
+    def acquire(self, size):
+        """Take an ingest slot for a `size`-byte request, waiting up to the queue timeout"""
+        deadline = time.monotonic() + self.queue_timeout
+        with self._condition:
+            self.waiting += 1
+            try:
+                while not self._fits(size):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionRejected(self.retry_after)
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.active_bytes += size
+
+    def release(self, size):
+        with self._condition:
+            self.active -= 1
+            self.active_bytes -= size
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, size):
+        """Hold an ingest slot for the duration of the block; raises AdmissionRejected"""
+        self.acquire(size)
+        try:
+            yield
+        finally:
+            self.release(size)
+
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def upload_admission():
+    """The process-wide UploadAdmission configured from settings"""
+    global _admission
+    with _admission_lock:
+        if _admission is None:
+            _admission = UploadAdmission(
+                max_concurrent=settings.UPLOAD_MAX_CONCURRENT_INGESTS,
+                max_bytes=settings.UPLOAD_MAX_INFLIGHT_BYTES,
+                queue_timeout=settings.UPLOAD_QUEUE_TIMEOUT,
+                retry_after=math.ceil(settings.UPLOAD_RETRY_AFTER),
+            )
+        return _admission
+
+
+def reset_upload_admission():
+    """Drop the shared controller so the next ingest re-reads the settings (tests)"""
+    global _admission
+    with _admission_lock:
+        _admission = None
@@ -1,13 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    EquipmentDatasetViewSet, EquipmentItemViewSet, UploadCSVView,
+    EquipmentDatasetViewSet, EquipmentItemViewSet, OperatingLimitViewSet, UploadCSVView,
     RegisterView, LoginView, LogoutView, UserProfileView
 )
+from .metrics import MetricsView
 
 router = DefaultRouter()
 router.register(r'datasets', EquipmentDatasetViewSet, basename='dataset')
 router.register(r'equipment', EquipmentItemViewSet, basename='equipment')
+router.register(r'limits', OperatingLimitViewSet, basename='limit')
 
 urlpatterns = [
     # Authentication endpoints (must be before router to avoid conflicts)
@@ -17,5 +19,7 @@ urlpatterns = [
     path('auth/profile/', UserProfileView.as_view(), name='profile'),
     # Equipment endpoints
     path('upload/', UploadCSVView.as_view(), name='upload-csv'),
+    # Prometheus scrape endpoint (no trailing slash, as scrapers expect)
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,259 @@
+"""
+Backend benchmark suite.
+
+Uploads synthetic datasets at several scales through the full request stack
+(middleware, authentication, DRF) and times the dataset endpoints against
+them. Used by the `benchmark` management command and by tests/test_benchmarks.py.
+
+`benchmark_parsers` measures the CSV parsing engines on their own: throughput
+and peak memory per engine and file size.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+import numpy as np
+import pandas as pd
+import rest_framework
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+
+from .metrics import QueryTimer
+from .parsers import available_engines, get_parser, pyarrow
+from .synthetic import generate_csv_bytes
+
+
+SCALES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+
+def parse_scales(text):
+    """Turn '1k,100k' (or raw row counts) into [(label, rows), ...]"""
+    scales = []
+    for label in filter(None, (part.strip().lower() for part in text.split(','))):
+        if label in SCALES:
+            scales.append((label, SCALES[label]))
+        elif label.isdigit():
+            scales.append((label, int(label)))
+        else:
+            raise ValueError(f"Unknown scale '{label}'. Use one of {', '.join(SCALES)} or a row count.")
+    return scales
+
+
+def environment_metadata():
+    """Describe the machine and software versions so runs can be compared"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'django': django.get_version(),
+        'djangorestframework': rest_framework.VERSION,
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pyarrow.__version__ if pyarrow is not None else None,
+        'database': connection.vendor,
+        'database_version': '.'.join(map(str, connection.Database.sqlite_version_info))
+        if connection.vendor == 'sqlite' else None,
+        'page_size': settings.REST_FRAMEWORK.get('PAGE_SIZE'),
+    }
+
+
+class BenchmarkRunner:
+    """Time upload, read and delete endpoints for synthetic datasets"""
+
+    def __init__(self, client, repeat=3, seed=0, log=None):
+        self.client = client
+        self.repeat = repeat
+        self.seed = seed
+        self.log = log or (lambda message: None)
+
+    def measure(self, method, url, **kwargs):
+        """Issue one request and return its timing, query count and size"""
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = getattr(self.client, method)(url, **kwargs)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+        elapsed = time.perf_counter() - started
+        return response, {
+            'seconds': elapsed,
+            'queries': queries.count,
+            'query_seconds': queries.duration,
+            'bytes': len(content),
+            'status': response.status_code,
+        }
+
+    def fetch_all_pages(self, url):
+        """Follow `next` links of a paginated endpoint, summing the samples"""
+        total = {'seconds': 0.0, 'queries': 0, 'query_seconds': 0.0, 'bytes': 0, 'status': 200, 'pages': 0}
+        while url:
+            response, sample = self.measure('get', url)
+            for key in ('seconds', 'queries', 'query_seconds', 'bytes'):
+                total[key] += sample[key]
+            total['pages'] += 1
+            if sample['status'] != 200:
+                total['status'] = sample['status']
+                break
+            data = response.json()
+            url = data.get('next') if isinstance(data, dict) else None
+        return total
+
+    def run_scale(self, label, rows):
+        self.log(f'[{label}] generating {rows:,} rows')
+        payload = generate_csv_bytes(rows, seed=self.seed)
+        samples = {}
+
+        def record(name, sample):
+            samples.setdefault(name, []).append(sample)
+
+        for iteration in range(self.repeat):
+            upload = SimpleUploadedFile(f'benchmark_{label}.csv', payload, content_type='text/csv')
+            response, sample = self.measure('post', '/api/upload/', data={'file': upload}, format='multipart')
+            record('upload', sample)
+            if response.status_code != 201:
+                raise RuntimeError(f'Upload failed ({response.status_code}): {response.content[:500]!r}')
+            dataset_id = response.json()['dataset_id']
+
+            record('chart_data', self.measure('get', f'/api/datasets/{dataset_id}/chart_data/')[1])
+            record('summary', self.measure('get', f'/api/datasets/{dataset_id}/summary/')[1])
+            record('items', self.fetch_all_pages(f'/api/datasets/{dataset_id}/items/'))
+            record('stats', self.measure('get', '/api/datasets/stats/')[1])
+            record('delete', self.measure('delete', f'/api/datasets/{dataset_id}/')[1])
+            self.log(f'[{label}] iteration {iteration + 1}/{self.repeat}: '
+                     f'upload {sample["seconds"]:.3f}s')
+
+        return {
+            'scale': label,
+            'rows': rows,
+            'csv_bytes': len(payload),
+            'endpoints': {name: summarize_samples(items, rows) for name, items in samples.items()},
+        }
+
+    def run(self, scales):
+        return {
+            'environment': environment_metadata(),
+            'repeat': self.repeat,
+            'seed': self.seed,
+            'results': [self.run_scale(label, rows) for label, rows in scales],
+        }
+
+
+def summarize_samples(samples, rows):
+    """Reduce repeated samples of one endpoint to min/median/max and throughput"""
+    seconds = [sample['seconds'] for sample in samples]
+    median = statistics.median(seconds)
+    summary = {
+        'min_seconds': min(seconds),
+        'median_seconds': median,
+        'max_seconds': max(seconds),
+        'rows_per_second': rows / median if median else None,
+        'queries': max(sample['queries'] for sample in samples),
+        'query_seconds': statistics.median(sample['query_seconds'] for sample in samples),
+        'bytes': max(sample['bytes'] for sample in samples),
+        'statuses': sorted({sample['status'] for sample in samples}),
+    }
+    if 'pages' in samples[0]:
+        summary['pages'] = samples[0]['pages']
+    return summary
+
+
+def benchmark_parsers(scales, engines=None, repeat=3, seed=0, log=None):
+    """
+    Parse synthetic files of each scale with each engine.
+
+    Timed runs are made without tracing; one extra run per engine records the
+    peak Python heap (tracemalloc) plus the peak of Arrow's own memory pool,
+    which tracemalloc cannot see.
+    """
+    log = log or (lambda message: None)
+    engines = engines or available_engines()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, rows in scales:
+            log(f'[{label}] generating {rows:,} rows')
+            path = Path(tmp) / f'parse_{label}.csv'
+            path.write_bytes(generate_csv_bytes(rows, seed=seed))
+            size = path.stat().st_size
+            measured = {}
+            for engine in engines:
+                parser = get_parser(engine)
+                seconds = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    result = parser.parse(path)
+                    seconds.append(time.perf_counter() - started)
+                if len(result) != rows or result.error_count:
+                    raise RuntimeError(f'{engine} parsed {len(result)} rows with {result.error_count} errors')
+                del result
+                median = statistics.median(seconds)
+                measured[engine] = {
+                    'min_seconds': min(seconds),
+                    'median_seconds': median,
+                    'max_seconds': max(seconds),
+                    'rows_per_second': rows / median if median else None,
+                    'megabytes_per_second': size / 2**20 / median if median else None,
+                    'peak_memory_bytes': peak_parse_memory(parser, path),
+                }
+                log(f'[{label}] {engine}: {median:.3f}s')
+            results.append({'scale': label, 'rows': rows, 'csv_bytes': size, 'engines': measured})
+    return {
+        'environment': environment_metadata(),
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def peak_parse_memory(parser, path):
+    """Peak bytes allocated while parsing `path` once"""
+    arrow_pool = None
+    if parser.name == 'pyarrow':
+        # A proxy pool tracks the high-water mark of this parse alone
+        arrow_pool = pyarrow.proxy_memory_pool(pyarrow.default_memory_pool())
+        parser = type(parser)(memory_pool=arrow_pool)
+    tracemalloc.start()
+    try:
+        parser.parse(path)
+        _, python_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    arrow_peak = arrow_pool.max_memory() if arrow_pool is not None else 0
+    return python_peak + (arrow_peak or 0)
+
+
+def write_results(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    return path
+
+
+def default_output_path(prefix='benchmark'):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    return Path(settings.BASE_DIR) / 'benchmark_results' / f'{prefix}-{stamp}.json'
@@ -0,0 +1,280 @@
+"""
+Column arrays of dataset readings.
+
+Datasets in column cache mode keep a copy of their readings, next to the
+item rows that name-level queries, edits and limits still use, as one NumPy
+array per column under MEDIA_ROOT/columnar/<dataset id>/<columns version>/:
+type ids (keys of EquipmentType), equipment names as a UTF-8 byte buffer plus
+offsets, and the numeric fields as float64. There is no per-row id, foreign
+key or timestamp.
+
+Uncompressed columns are saved as .npy files and memory-mapped when loaded,
+so aggregates, histograms and exports only touch the pages they read.
+Compressed stores (a single .npz, roughly a third of the size for the
+two-decimal readings we get) are decompressed into memory instead.
+
+ExtraColumns keeps the extra numeric columns of a dataset (parsed from
+columns beyond the required five): one float64 array per field with NaN for
+missing values, plus the item id and type id of each row. They exist nowhere
+else, so unlike a ColumnStore they are edited rather than rebuilt when items
+change, and they are stored in the database (`to_bytes`, one .npz blob per
+dataset) so every edit commits or rolls back with the items it belongs to.
+
+This module only depends on NumPy; EquipmentDataset decides where a store
+lives and when it is rebuilt from the row table.
+"""
+
+import io
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from .summary import NUMERIC_FIELDS, SummaryAccumulator
+
+
+# Directory under MEDIA_ROOT holding the column stores of each dataset
+COLUMNS_DIR = 'columnar'
+
+ARRAYS = ('type_ids', 'name_offsets', 'name_bytes', *NUMERIC_FIELDS)
+COMPRESSED_FILE = 'columns.npz'
+
+
+class ColumnStore:
+    """Equal-length column arrays holding the readings of one dataset"""
+
+    def __init__(self, type_ids, name_offsets, name_bytes, flowrate, pressure, temperature):
+        self.type_ids = type_ids
+        self.name_offsets = name_offsets
+        self.name_bytes = name_bytes
+        self.flowrate = flowrate
+        self.pressure = pressure
+        self.temperature = temperature
+
+    @classmethod
+    def from_columns(cls, names, type_ids, flowrate, pressure, temperature):
+        """Build a store from equal-length sequences (type_ids are EquipmentType keys)"""
+        encoded = [str(name).encode('utf-8') for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        return cls(
+            np.asarray(type_ids, dtype=np.int32),
+            offsets,
+            np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            np.asarray(flowrate, dtype=np.float64),
+            np.asarray(pressure, dtype=np.float64),
+            np.asarray(temperature, dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, directory):
+        """Open the store saved in `directory`; raises FileNotFoundError when there is none"""
+        directory = Path(directory)
+        compressed = directory / COMPRESSED_FILE
+        if compressed.exists():
+            with np.load(compressed) as arrays:
+                return cls(*(arrays[name] for name in ARRAYS))
+        return cls(*(np.load(directory / f'{name}.npy', mmap_mode='r') for name in ARRAYS))
+
+    def save(self, directory, compress=False):
+        """Write the store to `directory`, replacing any previous store there (see `save_arrays`)"""
+        save_arrays(directory, self._arrays(), compress)
+
+    def _arrays(self):
+        return {name: getattr(self, name) for name in ARRAYS}
+
+    def __len__(self):
+        return len(self.type_ids)
+
+    def concat(self, other):
+        """A new store holding this store's rows followed by `other`'s"""
+        return ColumnStore(
+            np.concatenate([self.type_ids, other.type_ids]),
+            np.concatenate([self.name_offsets, other.name_offsets[1:] + self.name_offsets[-1]]),
+            np.concatenate([self.name_bytes, other.name_bytes]),
+            *(np.concatenate([getattr(self, field), getattr(other, field)]) for field in NUMERIC_FIELDS),
+        )
+
+    def names(self, start=0, stop=None):
+        """Equipment names of rows [start, stop) as a list of str"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        offsets = self.name_offsets[start:stop + 1]
+        if len(offsets) < 2:
+            return []
+        buffer = self.name_bytes[offsets[0]:offsets[-1]].tobytes()
+        bounds = (offsets - offsets[0]).tolist()
+        return [buffer[begin:end].decode('utf-8') for begin, end in zip(bounds, bounds[1:])]
+
+    def summary(self, type_names):
+        """SummaryAccumulator over every row; `type_names` maps type ids to names"""
+        ids, inverse = np.unique(self.type_ids, return_inverse=True)
+        labels = np.array([type_names[type_id] for type_id in ids.tolist()], dtype=object)
+        return SummaryAccumulator().add(labels[inverse], self.flowrate, self.pressure, self.temperature)
+
+    def histogram(self, field, bins, type_id=None):
+        """(counts, edges) of `field` in `bins` equal-width bins, optionally for one type"""
+        values = getattr(self, field)
+        if type_id is not None:
+            values = values[self.type_ids == type_id]
+        if len(values) == 0:
+            return [], []
+        counts, edges = np.histogram(values, bins=bins)
+        return counts.tolist(), edges.tolist()
+
+    def iter_rows(self, type_names, chunk_size=10_000):
+        """Yield lists of (name, type, flowrate, pressure, temperature) rows, `chunk_size` at a time"""
+        labels = {type_id: type_names[type_id] for type_id in np.unique(self.type_ids).tolist()}
+        for start in range(0, len(self), chunk_size):
+            stop = start + chunk_size
+            yield list(zip(
+                self.names(start, stop),
+                [labels[type_id] for type_id in self.type_ids[start:stop].tolist()],
+                *(getattr(self, field)[start:stop].tolist() for field in NUMERIC_FIELDS),
+            ))
+
+
+class ExtraColumns:
+    """
+    Extra numeric fields of one dataset's items: `item_ids` (ascending),
+    their `type_ids`, and `columns` mapping each field key to float64 values
+    (NaN where an item has none). Items without any extra value may be absent.
+    """
+
+    def __init__(self, item_ids, type_ids, columns):
+        self.item_ids = item_ids
+        self.type_ids = type_ids
+        self.columns = columns
+
+    @classmethod
+    def from_columns(cls, item_ids, type_ids, columns):
+        return cls(
+            np.asarray(item_ids, dtype=np.int64),
+            np.asarray(type_ids, dtype=np.int32),
+            {key: np.asarray(values, dtype=np.float64) for key, values in columns.items()},
+        )
+
+    @classmethod
+    def empty(cls, keys=()):
+        return cls.from_columns([], [], {key: [] for key in keys})
+
+    @classmethod
+    def from_bytes(cls, data, keys):
+        """Read the fields `keys` from `to_bytes` output; fields it lacks are all NaN"""
+        with np.load(io.BytesIO(data)) as arrays:
+            item_ids = arrays['_item_ids']
+            type_ids = arrays['_type_ids']
+            columns = {
+                key: arrays[key] if key in arrays.files else np.full(len(item_ids), np.nan)
+                for key in keys
+            }
+        return cls(item_ids, type_ids, columns)
+
+    def to_bytes(self):
+        """The arrays as one uncompressed .npz archive"""
+        buffer = io.BytesIO()
+        # Field keys never start with '_' (see parsers.field_key)
+        np.savez(buffer, _item_ids=self.item_ids, _type_ids=self.type_ids, **self.columns)
+        return buffer.getvalue()
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def concat(self, other):
+        """Rows of this store followed by `other`'s (higher item ids); fields either lacks are NaN there"""
+        keys = list(dict.fromkeys([*self.columns, *other.columns]))
+        return ExtraColumns(
+            np.concatenate([self.item_ids, other.item_ids]),
+            np.concatenate([self.type_ids, other.type_ids]),
+            {key: np.concatenate([store._column(key) for store in (self, other)]) for key in keys},
+        )
+
+    def merged(self, other):
+        """Rows of this store and `other` (distinct item ids) in item id order"""
+        combined = self.concat(other)
+        order = np.argsort(combined.item_ids, kind='stable')
+        return ExtraColumns(
+            combined.item_ids[order], combined.type_ids[order],
+            {key: values[order] for key, values in combined.columns.items()},
+        )
+
+    def select(self, item_ids):
+        """A copy holding only the rows of `item_ids`, and only the fields they have values for"""
+        keep = np.isin(self.item_ids, np.asarray(list(item_ids), dtype=np.int64))
+        columns = {key: np.array(values[keep]) for key, values in self.columns.items()}
+        return ExtraColumns(
+            np.array(self.item_ids[keep]), np.array(self.type_ids[keep]),
+            {key: values for key, values in columns.items() if not np.isnan(values).all()},
+        )
+
+    def edited(self, removed=(), retyped=None):
+        """A copy without the items `removed` and with type ids changed per `retyped` ({item id: type id})"""
+        keep = ~np.isin(self.item_ids, np.asarray(list(removed), dtype=np.int64))
+        type_ids = np.array(self.type_ids[keep])
+        item_ids = np.array(self.item_ids[keep])
+        for item_id, type_id in (retyped or {}).items():
+            position = np.searchsorted(item_ids, item_id)
+            if position < len(item_ids) and item_ids[position] == item_id:
+                type_ids[position] = type_id
+        return ExtraColumns(item_ids, type_ids, {key: np.array(values[keep]) for key, values in self.columns.items()})
+
+    def _column(self, key):
+        return self.columns[key] if key in self.columns else np.full(len(self), np.nan)
+
+    def summarize(self, accumulator, type_names):
+        """
+        Add the fields' totals to `accumulator`, which already counts these
+        items; `type_names` maps type ids to names.
+        """
+        if len(self):
+            ids, inverse = np.unique(self.type_ids, return_inverse=True)
+            labels = np.array([type_names[type_id] for type_id in ids.tolist()], dtype=object)
+            accumulator.add_columns(labels[inverse], self.columns, rows=False)
+        return accumulator
+
+    def histogram(self, key, bins, type_id=None):
+        """(counts, edges) of field `key` in `bins` equal-width bins, optionally for one type"""
+        values = self.columns[key]
+        if type_id is not None:
+            values = values[self.type_ids == type_id]
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return [], []
+        counts, edges = np.histogram(values, bins=bins)
+        return counts.tolist(), edges.tolist()
+
+
+def save_arrays(directory, arrays, compress=False):
+    """
+    Write `arrays` ({name: array}) to `directory` as .npy files (or one
+    compressed .npz), replacing whatever was there.
+
+    The files are written to a sibling directory first and swapped in with
+    a rename, so concurrent readers see either the old or the new arrays.
+    """
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    staging = directory.with_name(f'.{directory.name}-{uuid.uuid4().hex}')
+    staging.mkdir()
+    try:
+        if compress:
+            np.savez_compressed(staging / COMPRESSED_FILE, **arrays)
+        else:
+            for name, values in arrays.items():
+                np.save(staging / f'{name}.npy', values)
+        retired = None
+        if directory.exists():
+            retired = directory.with_name(f'.{directory.name}-{uuid.uuid4().hex}')
+            os.replace(directory, retired)
+        os.replace(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def remove_store(directory):
+    """Delete the store saved in `directory`, if any"""
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,108 @@
+"""
+Correlation of the numeric readings within each equipment type.
+
+`correlation_matrices` computes, for every group of rows sharing a label and
+for the dataset as a whole, the covariance, Pearson and Spearman matrices of
+NUMERIC_FIELDS. Rows are sorted by label once and the per-group sums of
+products are reduced with `np.add.reduceat`, so the work is a fixed number
+of vectorized passes over the columns however many types there are.
+
+Spearman's rho is Pearson's r over the ranks within each group (ties get
+their average rank). Entries that are undefined (fewer than two rows, or a
+constant field) are None.
+
+Only depends on NumPy; EquipmentDataset caches the result in
+`correlation_json`.
+"""
+
+import numpy as np
+
+from .summary import NUMERIC_FIELDS
+
+
+def correlation_matrices(labels, flowrate, pressure, temperature):
+    """
+    {'fields', 'dataset': stats, 'types': {label: stats}} where stats holds
+    `count` and 3x3 `covariance`, `pearson` and `spearman` matrices (nested
+    lists in NUMERIC_FIELDS order).
+    """
+    columns = np.column_stack([
+        np.asarray(values, dtype=np.float64) for values in (flowrate, pressure, temperature)
+    ])
+    result = {'fields': list(NUMERIC_FIELDS), 'dataset': _empty_stats(), 'types': {}}
+    if len(columns) == 0:
+        return result
+
+    keys, inverse = np.unique(np.asarray(labels), return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    groups = inverse[order]
+    columns = columns[order]
+    counts = np.bincount(groups, minlength=len(keys))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    ranks = _group_ranks(columns, groups, starts)
+    covariance, pearson = _moments(columns, groups, starts, counts)
+    _, spearman = _moments(ranks, groups, starts, counts)
+    for index, key in enumerate(keys.tolist()):
+        result['types'][key] = _stats(counts[index], covariance[index], pearson[index], spearman[index])
+
+    # The whole dataset is one group
+    whole = np.zeros(len(columns), dtype=np.int64)
+    origin = np.zeros(1, dtype=np.int64)
+    total = np.array([len(columns)])
+    covariance, pearson = _moments(columns, whole, origin, total)
+    _, spearman = _moments(_group_ranks(columns, whole, origin), whole, origin, total)
+    result['dataset'] = _stats(total[0], covariance[0], pearson[0], spearman[0])
+    return result
+
+
+def _moments(columns, groups, starts, counts):
+    """Per-group (covariance, correlation) arrays of shape (groups, fields, fields)"""
+    means = np.add.reduceat(columns, starts, axis=0) / counts[:, None]
+    centered = columns - means[groups]
+    # Sums of products of every pair of fields, per group (one column-length temporary at a time)
+    width = columns.shape[1]
+    products = np.empty((len(starts), width, width))
+    for i in range(width):
+        for j in range(i, width):
+            products[:, i, j] = products[:, j, i] = np.add.reduceat(centered[:, i] * centered[:, j], starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = products / (counts - 1)[:, None, None]
+        deviations = np.sqrt(np.diagonal(products, axis1=1, axis2=2))
+        correlation = products / (deviations[:, :, None] * deviations[:, None, :])
+    covariance[counts < 2] = np.nan
+    return covariance, np.clip(correlation, -1.0, 1.0)
+
+
+def _group_ranks(columns, groups, starts):
+    """Rank (1-based, ties averaged) of every value within its group, per column"""
+    ranks = np.empty_like(columns)
+    positions = np.arange(len(columns)) - starts[groups] + 1
+    for column in range(columns.shape[1]):
+        values = columns[:, column]
+        order = np.lexsort((values, groups))
+        sorted_values, sorted_groups = values[order], groups[order]
+        # Runs of equal values within a group share their average position
+        change = np.ones(len(order), dtype=bool)
+        change[1:] = (sorted_values[1:] != sorted_values[:-1]) | (sorted_groups[1:] != sorted_groups[:-1])
+        runs = np.cumsum(change) - 1
+        averages = np.bincount(runs, weights=positions) / np.bincount(runs)
+        ranks[order, column] = averages[runs]
+    return ranks
+
+
+def _stats(count, covariance, pearson, spearman):
+    return {
+        'count': int(count),
+        'covariance': _matrix(covariance),
+        'pearson': _matrix(pearson),
+        'spearman': _matrix(spearman),
+    }
+
+
+def _empty_stats():
+    return {'count': 0, 'covariance': None, 'pearson': None, 'spearman': None}
+
+
+def _matrix(values):
+    return [[None if np.isnan(value) else round(float(value), 6) for value in row] for row in values.tolist()]
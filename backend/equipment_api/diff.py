@@ -0,0 +1,132 @@
+"""
+Dataset comparison keyed on equipment name.
+
+Both sides are joined in the database through the (dataset, equipment_name)
+index, so only the requested page of differences is ever loaded into Python.
+Dataset `base` is the earlier side: `added` items exist only in `other`,
+`removed` items only in `base`, and `changed` items exist in both with a
+different type or a numeric field that moved by more than its threshold.
+
+Equipment names are expected to be unique within a dataset; duplicated names
+are paired with every item of the same name on the other side.
+"""
+
+from django.db import connection
+
+from .models import EquipmentItem, EquipmentType
+from .summary import NUMERIC_FIELDS
+
+
+SECTIONS = ('changed', 'added', 'removed')
+
+
+class DatasetDiff:
+    """Counts and pages of differences between two datasets"""
+
+    def __init__(self, base_id, other_id, thresholds=None):
+        self.base_id = base_id
+        self.other_id = other_id
+        # Absolute change a numeric field must exceed to count as changed
+        self.thresholds = {field: 0.0 for field in NUMERIC_FIELDS}
+        self.thresholds.update(thresholds or {})
+
+        quote = connection.ops.quote_name
+        meta = EquipmentItem._meta
+        self.table = quote(meta.db_table)
+        self.columns = {
+            name: quote(meta.get_field(name).column)
+            for name in ('id', 'dataset', 'equipment_name', 'type', *NUMERIC_FIELDS)
+        }
+
+    def _changed_condition(self):
+        """SQL condition (and params) comparing base row `a` with other row `b`"""
+        c = self.columns
+        clauses = [f'a.{c["type"]} <> b.{c["type"]}']
+        params = []
+        for field in NUMERIC_FIELDS:
+            clauses.append(f'ABS(b.{c[field]} - a.{c[field]}) > %s')
+            params.append(self.thresholds[field])
+        return '(' + ' OR '.join(clauses) + ')', params
+
+    def _join(self):
+        c = self.columns
+        return (
+            f'FROM {self.table} a LEFT JOIN {self.table} b '
+            f'ON b.{c["dataset"]} = %s AND b.{c["equipment_name"]} = a.{c["equipment_name"]} '
+            f'WHERE a.{c["dataset"]} = %s'
+        ), [self.other_id, self.base_id]
+
+    def _only_in(self, dataset_id, other_id, select):
+        c = self.columns
+        return (
+            f'SELECT {select} FROM {self.table} x WHERE x.{c["dataset"]} = %s AND NOT EXISTS ('
+            f'SELECT 1 FROM {self.table} y WHERE y.{c["dataset"]} = %s '
+            f'AND y.{c["equipment_name"]} = x.{c["equipment_name"]})'
+        ), [dataset_id, other_id]
+
+    def counts(self):
+        """{'changed', 'unchanged', 'added', 'removed'} in two queries"""
+        c = self.columns
+        condition, condition_params = self._changed_condition()
+        join, join_params = self._join()
+        matched = f'b.{c["id"]} IS NOT NULL'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT '
+                f'COALESCE(SUM(CASE WHEN b.{c["id"]} IS NULL THEN 1 ELSE 0 END), 0), '
+                f'COALESCE(SUM(CASE WHEN {matched} AND {condition} THEN 1 ELSE 0 END), 0), '
+                f'COALESCE(SUM(CASE WHEN {matched} AND NOT {condition} THEN 1 ELSE 0 END), 0) '
+                f'{join}',
+                condition_params + condition_params + join_params
+            )
+            removed, changed, unchanged = cursor.fetchone()
+            sql, params = self._only_in(self.other_id, self.base_id, 'COUNT(*)')
+            cursor.execute(sql, params)
+            added = cursor.fetchone()[0]
+        return {'changed': changed, 'unchanged': unchanged, 'added': added, 'removed': removed}
+
+    def changed(self, limit, offset):
+        c = self.columns
+        condition, condition_params = self._changed_condition()
+        join, join_params = self._join()
+        values = ', '.join(f'a.{c[field]}, b.{c[field]}' for field in NUMERIC_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT a.{c["equipment_name"]}, a.{c["type"]}, b.{c["type"]}, {values} '
+                f'{join} AND b.{c["id"]} IS NOT NULL AND {condition} '
+                f'ORDER BY a.{c["equipment_name"]}, a.{c["id"]}, b.{c["id"]} LIMIT %s OFFSET %s',
+                join_params + condition_params + [limit, offset]
+            )
+            rows = cursor.fetchall()
+        names = EquipmentType.names(type_id for row in rows for type_id in row[1:3])
+        return [self._changed_item(row, names) for row in rows]
+
+    def _changed_item(self, row, type_names):
+        name, base_type, other_type = row[0], type_names[row[1]], type_names[row[2]]
+        changes = {}
+        for index, field in enumerate(NUMERIC_FIELDS):
+            before, after = row[3 + 2 * index], row[4 + 2 * index]
+            if abs(after - before) > self.thresholds[field]:
+                changes[field] = {'from': before, 'to': after, 'delta': round(after - before, 6)}
+        if base_type != other_type:
+            changes['type'] = {'from': base_type, 'to': other_type}
+        return {'equipment_name': name, 'type': other_type, 'changes': changes}
+
+    def added(self, limit, offset):
+        return self._page_only_in(self.other_id, self.base_id, limit, offset)
+
+    def removed(self, limit, offset):
+        return self._page_only_in(self.base_id, self.other_id, limit, offset)
+
+    def _page_only_in(self, dataset_id, other_id, limit, offset):
+        c = self.columns
+        fields = ('equipment_name', 'type', *NUMERIC_FIELDS)
+        sql, params = self._only_in(dataset_id, other_id, ', '.join(f'x.{c[field]}' for field in fields))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{sql} ORDER BY x.{c["equipment_name"]}, x.{c["id"]} LIMIT %s OFFSET %s',
+                params + [limit, offset]
+            )
+            rows = cursor.fetchall()
+        names = EquipmentType.names(row[1] for row in rows)
+        return [dict(zip(fields, (row[0], names[row[1]], *row[2:]))) for row in rows]
@@ -0,0 +1,178 @@
+"""
+Bulk ingestion helpers shared by the upload endpoint and the management commands.
+
+`insert_items` writes equipment rows with a single prepared INSERT and
+`executemany`, which avoids building a model instance per row and is several
+times faster than `bulk_create` for multi-million-row loads. Type names are
+interned into EquipmentType once per distinct name and stored as integer keys.
+
+`build_column_store` turns the same parsed columns into the ColumnStore kept
+for datasets in column cache mode, and `build_extra_columns` the extra
+numeric columns of a file into the dataset's ExtraColumns.
+
+`record_violations` checks freshly inserted readings against the operating
+limits of their types (limits.py) and stores the LimitViolation rows;
+`recheck_violations` does the same for items already stored, after limits or
+items change. `detect_ingest_outliers` is the optional outlier stage
+(DATASET_OUTLIER_METHODS).
+"""
+
+import datetime
+import itertools
+
+import numpy as np
+from django.db import connection
+from django.utils import timezone
+
+from .columnar import ColumnStore, ExtraColumns
+from .limits import find_violations
+from .models import EquipmentItem, EquipmentType, LimitViolation, OperatingLimit
+from .outliers import detect_outliers, outlier_report
+from .summary import NUMERIC_FIELDS
+
+
+INSERT_BATCH_SIZE = 10_000
+
+
+def intern_types(types):
+    """EquipmentType ids for a sequence of type names, interning each distinct name once"""
+    labels, inverse = np.unique(np.asarray(types, dtype=object).astype(str), return_inverse=True)
+    interned = EquipmentType.intern(labels.tolist())
+    return np.array([interned[label] for label in labels.tolist()], dtype=np.int64)[inverse]
+
+
+def build_column_store(names, types, flowrate, pressure, temperature):
+    """ColumnStore of parsed readings (types given as names)"""
+    return ColumnStore.from_columns(names, intern_types(types), flowrate, pressure, temperature)
+
+
+def build_extra_columns(dataset, types, extra, after_id=0):
+    """
+    ExtraColumns of parsed extra fields ({key: array}) of the rows just
+    inserted into `dataset` with `insert_items` (its items above `after_id`).
+    """
+    return ExtraColumns.from_columns(inserted_item_ids(dataset, after_id), intern_types(types), extra)
+
+
+def insert_items(dataset, names, types, flowrate, pressure, temperature, timestamps=None,
+                 batch_size=INSERT_BATCH_SIZE):
+    """
+    Insert equipment readings (equal-length sequences) into `dataset`;
+    returns the row count. `timestamps` are datetime64 values in UTC (NaT
+    for none); without them `ts` is left null.
+    """
+    meta = EquipmentItem._meta
+    columns = [meta.get_field(name).column for name in (
+        'dataset', 'equipment_name', 'type', 'flowrate', 'pressure', 'temperature', 'ts', 'created_at'
+    )]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(meta.db_table),
+        ', '.join(connection.ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    type_ids = intern_types(types).tolist()
+    if timestamps is None:
+        ts = itertools.repeat(None)
+    else:
+        # datetime64[us] -> naive datetime (None for NaT), adapted as UTC
+        ts = (
+            None if value is None
+            else connection.ops.adapt_datetimefield_value(value.replace(tzinfo=datetime.timezone.utc))
+            for value in np.asarray(timestamps, dtype='datetime64[us]').astype(object)
+        )
+    rows = zip(
+        [dataset.id] * len(names), names, type_ids,
+        map(float, flowrate), map(float, pressure), map(float, temperature),
+        ts, [created_at] * len(names),
+    )
+    total = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                break
+            cursor.executemany(sql, batch)
+            total += len(batch)
+    return total
+
+
+def record_violations(dataset, types, flowrate, pressure, temperature, after_id=0):
+    """
+    Store the limit violations of readings just inserted into `dataset` with
+    `insert_items` (its items with ids above `after_id`, in insertion order).
+    Returns the number of violations.
+    """
+    envelopes = OperatingLimit.envelopes()
+    found = find_violations(types, dict(zip(NUMERIC_FIELDS, (flowrate, pressure, temperature))), envelopes)
+    if not len(found['positions']):
+        return 0
+    ids = inserted_item_ids(dataset, after_id)
+    _create_violations(itertools.repeat(dataset.id), ids[found['positions']], found)
+    return len(found['positions'])
+
+
+def detect_ingest_outliers(dataset, types, flowrate, pressure, temperature, methods):
+    """
+    outliers_json of a freshly inserted dataset for each of `methods`
+    (default thresholds), computed from the parsed columns.
+    """
+    columns = dict(zip(NUMERIC_FIELDS, (flowrate, pressure, temperature)))
+    types = np.asarray(types, dtype=object)
+    results = {}
+    ids = None
+    for method in methods:
+        found = detect_outliers(types, columns, method)
+        flagged = found['positions']
+        if len(flagged) and ids is None:
+            ids = inserted_item_ids(dataset)
+        item_ids = ids[flagged] if len(flagged) else flagged
+        results[method] = outlier_report(found, item_ids, types[flagged].tolist(), method)
+    return results
+
+
+def inserted_item_ids(dataset, after_id=0):
+    """
+    Ids of the items of `dataset` above `after_id`, ascending. Rows added
+    with `insert_items` in one transaction get ascending ids, so position i
+    of the inserted columns is item ids[i].
+    """
+    ids = dataset.equipment_items.filter(id__gt=after_id).order_by('id').values_list('id', flat=True)
+    return np.fromiter(ids.iterator(chunk_size=INSERT_BATCH_SIZE), dtype=np.int64)
+
+
+def recheck_violations(items, batch_size=INSERT_BATCH_SIZE):
+    """
+    Re-evaluate stored items (an EquipmentItem queryset) against the current
+    limits, replacing their violations. Reads the items in chunks of
+    `batch_size`. Returns the number of violations.
+    """
+    LimitViolation.objects.filter(item_id__in=items.values('id')).delete()
+    envelopes = OperatingLimit.envelopes(by_id=True)
+    if not envelopes:
+        return 0
+    dtype = [('id', np.int64), ('dataset_id', np.int64), ('type_id', np.int64)]
+    dtype += [(field, np.float64) for field in NUMERIC_FIELDS]
+    rows = items.order_by().values_list('id', 'dataset_id', 'type_id', *NUMERIC_FIELDS).iterator(chunk_size=batch_size)
+    total = 0
+    while True:
+        chunk = np.fromiter(itertools.islice(rows, batch_size), dtype=dtype)
+        if not len(chunk):
+            return total
+        found = find_violations(chunk['type_id'], {field: chunk[field] for field in NUMERIC_FIELDS}, envelopes)
+        positions = found['positions']
+        _create_violations(chunk['dataset_id'][positions].tolist(), chunk['id'][positions], found)
+        total += len(positions)
+
+
+def _create_violations(dataset_ids, item_ids, found):
+    LimitViolation.objects.bulk_create(
+        (
+            LimitViolation(dataset_id=dataset_id, item_id=item_id, field=field, bound=bound, value=value, limit=limit)
+            for dataset_id, item_id, field, bound, value, limit in zip(
+                dataset_ids, item_ids.tolist(), found['fields'].tolist(), found['bounds'].tolist(),
+                found['values'].tolist(), found['limits'].tolist()
+            )
+        ),
+        batch_size=INSERT_BATCH_SIZE
+    )
@@ -0,0 +1,65 @@
+"""
+Column-wise evaluation of operating limits.
+
+An envelope maps a type label to {field: (minimum, maximum)}; either bound
+may be None. `find_violations` checks every reading of a chunk against the
+envelope of its type in a few vectorized comparisons per field: the bounds
+are gathered into per-type arrays and indexed by each row's type, so there
+is no Python loop over rows.
+
+Labels can be type names (parsed files) or EquipmentType ids (stored rows);
+the caller keys the envelopes the same way. Only depends on NumPy.
+"""
+
+import numpy as np
+
+from .summary import NUMERIC_FIELDS
+
+
+MIN = 'min'
+MAX = 'max'
+
+
+def find_violations(labels, columns, envelopes):
+    """
+    Readings outside their type's envelope, as equal-length arrays:
+    `positions` (row index in the chunk), `fields`, `bounds` ('min'/'max'),
+    `values` and `limits`, ordered by position then field.
+
+    `columns` maps each of NUMERIC_FIELDS to an array of readings.
+    """
+    found = {'positions': [], 'fields': [], 'bounds': [], 'values': [], 'limits': []}
+    labels = np.asarray(labels)
+    if not envelopes or len(labels) == 0:
+        return _stack(found)
+    keys, inverse = np.unique(labels, return_inverse=True)
+    for field in NUMERIC_FIELDS:
+        lower = np.array([_bound(envelopes, key, field, 0, -np.inf) for key in keys.tolist()])
+        upper = np.array([_bound(envelopes, key, field, 1, np.inf) for key in keys.tolist()])
+        if np.isneginf(lower).all() and np.isposinf(upper).all():
+            continue
+        values = np.asarray(columns[field], dtype=np.float64)
+        lower, upper = lower[inverse], upper[inverse]
+        for bound, limits, outside in ((MIN, lower, values < lower), (MAX, upper, values > upper)):
+            positions = np.flatnonzero(outside)
+            found['positions'].append(positions)
+            found['fields'].append(np.full(len(positions), field, dtype=object))
+            found['bounds'].append(np.full(len(positions), bound, dtype=object))
+            found['values'].append(values[positions])
+            found['limits'].append(limits[positions])
+    result = _stack(found)
+    order = np.argsort(result['positions'], kind='stable')
+    return {name: values[order] for name, values in result.items()}
+
+
+def _bound(envelopes, key, field, index, default):
+    value = envelopes.get(key, {}).get(field, (None, None))[index]
+    return default if value is None else value
+
+
+def _stack(found):
+    dtypes = {'positions': np.int64, 'fields': object, 'bounds': object, 'values': np.float64, 'limits': np.float64}
+    return {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name])
+        for name, parts in found.items()
+    }
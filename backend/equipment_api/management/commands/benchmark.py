@@ -0,0 +1,106 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+)
+from rest_framework.test import APIClient
+from equipment_api.benchmarks import (
+    BenchmarkRunner, benchmark_parsers, default_output_path, parse_scales, write_results
+)
+from equipment_api.parsers import available_engines
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark upload and dataset endpoints with synthetic data in a throwaway test database, '
+        'or (--suite parsers) compare the CSV parsing engines'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--suite',
+            choices=['endpoints', 'parsers'],
+            default='endpoints',
+            help='What to benchmark (default: endpoints)'
+        )
+        parser.add_argument(
+            '--engines',
+            default=None,
+            help='Comma-separated parser engines for --suite parsers (default: all installed)'
+        )
+        parser.add_argument(
+            '--scales',
+            default='1k,100k',
+            help='Comma-separated dataset sizes: 1k, 10k, 100k, 1m or row counts (default: 1k,100k)'
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Iterations per scale (default: 3)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='JSON results file (default: benchmark_results/benchmark-<timestamp>.json)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = parse_scales(options['scales'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        if options['suite'] == 'parsers':
+            return self.handle_parsers(scales, options)
+
+        # Never touch the real database: uploads prune datasets beyond the last 5
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user = User.objects.create_user('benchmark', password=None, is_staff=True)
+            client = APIClient()
+            client.force_authenticate(user=user)
+            runner = BenchmarkRunner(
+                client, repeat=options['repeat'], seed=options['seed'], log=self.stdout.write
+            )
+            results = runner.run(scales)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        path = write_results(results, options['output'] or default_output_path())
+        for result in results['results']:
+            self.stdout.write(f"\n{result['scale']} ({result['rows']:,} rows)")
+            for name, stats in result['endpoints'].items():
+                self.stdout.write(
+                    f"  {name:<11} median {stats['median_seconds'] * 1000:10.1f} ms  "
+                    f"queries {stats['queries']:>5}  bytes {stats['bytes']:>12,}"
+                )
+        self.stdout.write(self.style.SUCCESS(f'\nResults written to {path}'))
+
+    def handle_parsers(self, scales, options):
+        engines = available_engines()
+        if options['engines']:
+            requested = [engine.strip() for engine in options['engines'].split(',') if engine.strip()]
+            unknown = [engine for engine in requested if engine not in engines]
+            if unknown:
+                raise CommandError(
+                    f'Unavailable engine(s): {", ".join(unknown)}. Installed: {", ".join(engines)}'
+                )
+            engines = requested
+
+        results = benchmark_parsers(
+            scales, engines, repeat=options['repeat'], seed=options['seed'], log=self.stdout.write
+        )
+        path = write_results(results, options['output'] or default_output_path('parsers'))
+        for result in results['results']:
+            self.stdout.write(
+                f"\n{result['scale']} ({result['rows']:,} rows, {result['csv_bytes'] / 2**20:.1f} MiB)"
+            )
+            for engine, stats in result['engines'].items():
+                self.stdout.write(
+                    f"  {engine:<8} median {stats['median_seconds'] * 1000:10.1f} ms  "
+                    f"{stats['rows_per_second']:>12,.0f} rows/s  "
+                    f"{stats['megabytes_per_second']:>7.1f} MiB/s  "
+                    f"peak {stats['peak_memory_bytes'] / 2**20:8.1f} MiB"
+                )
+        self.stdout.write(self.style.SUCCESS(f'\nResults written to {path}'))
@@ -0,0 +1,107 @@
+import math
+import os
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from equipment_api.ingest import insert_items, recheck_violations
+from equipment_api.models import DatasetEvent, EquipmentDataset
+from equipment_api.summary import SummaryAccumulator
+from equipment_api.synthetic import (
+    DISTRIBUTIONS, generate_chunks, parse_row_count, write_csv_parallel
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic equipment data as a CSV file or load it straight into a new dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('rows', help='Number of rows, e.g. 50000, 100k, 10m')
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--output', help='Write a CSV file to this path')
+        target.add_argument('--load', action='store_true', help='Insert into the database as a new dataset')
+        parser.add_argument('--filename', default=None, help='Dataset filename when using --load')
+        parser.add_argument('--types', type=int, default=20, help='Number of distinct equipment types (default: 20)')
+        parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='normal',
+                            help='Distribution of readings around each type\'s typical value')
+        parser.add_argument('--spread', type=float, default=0.1,
+                            help='Relative spread of readings (default: 0.1 = 10%%)')
+        parser.add_argument('--dirty', type=float, default=0.0,
+                            help='Fraction of invalid rows to inject (CSV output only)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Generator processes (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=500_000, help='Rows per worker chunk')
+
+    def handle(self, *args, **options):
+        try:
+            rows = parse_row_count(options['rows'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['types'] < 1:
+            raise CommandError('--types must be at least 1')
+        if not options['spread'] >= 0 or not math.isfinite(options['spread']):
+            raise CommandError('--spread must be a non-negative number')
+        if not 0 <= options['dirty'] < 1:
+            raise CommandError('--dirty must be between 0 and 1')
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1')
+        if options['load'] and options['dirty']:
+            raise CommandError('--dirty only applies to CSV output; invalid rows cannot be loaded')
+
+        generator_options = {
+            'type_count': options['types'],
+            'distribution': options['distribution'],
+            'spread': options['spread'],
+        }
+        started = time.perf_counter()
+
+        def progress(done):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  {done:,}/{rows:,} rows ({done / elapsed:,.0f} rows/s)')
+
+        if options['output']:
+            path = Path(options['output'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_csv_parallel(
+                path, rows, seed=options['seed'], workers=options['workers'],
+                chunk_size=options['chunk_size'], progress=progress,
+                dirty_fraction=options['dirty'], **generator_options
+            )
+            target = str(path)
+        else:
+            dataset = self.load(rows, options, generator_options, progress)
+            target = f'dataset {dataset.id}'
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {rows:,} rows into {target} in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)'
+        ))
+
+    def load(self, rows, options, generator_options, progress):
+        """Generate chunks in worker processes and insert them from this process only"""
+        summary = SummaryAccumulator()
+        done = 0
+        with transaction.atomic():
+            dataset = EquipmentDataset.objects.create(
+                filename=options['filename'] or f'synthetic_{rows}.csv'
+            )
+            for frame in generate_chunks(
+                rows, seed=options['seed'], workers=options['workers'],
+                chunk_size=options['chunk_size'], **generator_options
+            ):
+                names = frame['Equipment Name'].tolist()
+                types = frame['Type'].tolist()
+                insert_items(
+                    dataset, names, types,
+                    frame['Flowrate'].to_numpy(), frame['Pressure'].to_numpy(), frame['Temperature'].to_numpy()
+                )
+                summary.add(types, frame['Flowrate'], frame['Pressure'], frame['Temperature'])
+                done += len(frame)
+                progress(done)
+            recheck_violations(dataset.equipment_items.all())
+            dataset.summary_json = summary.to_summary()
+            dataset.summary_state = summary.to_state()
+            dataset.save()
+            DatasetEvent.record(DatasetEvent.CREATED, dataset)
+        return dataset
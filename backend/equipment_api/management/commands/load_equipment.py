@@ -1,85 +1,217 @@
-from django.core.management.base import BaseCommand
-import csv
-import json
+from django.core.management.base import BaseCommand, CommandError
+import glob
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from django.db.models import Avg, Max, Min, Count
-from equipment_api.models import EquipmentDataset, EquipmentItem
+from django.conf import settings
+from django.db import transaction
+from equipment_api.correlation import correlation_matrices
+from equipment_api.ingest import (
+    build_column_store, build_extra_columns, detect_ingest_outliers, insert_items, record_violations
+)
+from equipment_api.models import DatasetEvent, EquipmentDataset, EquipmentItem, IngestedFile
+from equipment_api.parsers import ENGINES, CSVFormatError, dataset_filename, detect_format, parse_equipment_file
 
 
 class Command(BaseCommand):
-    help = 'Load equipment data from CSV file into a dataset'
+    help = (
+        'Load equipment data from CSV files (optionally .csv.gz/.csv.zst) or Parquet files '
+        'into datasets (one dataset per file). '
+        'Accepts files, directories and glob patterns; files are parsed in parallel '
+        'and files already loaded are skipped, so an interrupted run can be resumed.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             'csv_file',
             type=str,
-            help='Path to CSV file',
-            nargs='?',
-            default=None
+            help='CSV files, directories or glob patterns (default: sample data)',
+            nargs='*'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Parser processes (default: CPU count)'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['auto', *ENGINES],
+            default='auto',
+            help='CSV parsing engine (default: auto, chosen by file size)'
+        )
+        parser.add_argument(
+            '--storage',
+            choices=[choice for choice, _ in EquipmentDataset.STORAGE_CHOICES],
+            default=None,
+            help='Dataset storage mode (default: the DATASET_STORAGE setting)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-ingest files that were already loaded'
         )
 
     def handle(self, *args, **options):
-        csv_file = options['csv_file']
-        
-        if not csv_file:
+        sources = options['csv_file']
+        if not sources:
             # Default to sample data
-            csv_file = Path(__file__).parent.parent.parent.parent.parent / 'sample_data' / 'sample_equipment_data.csv'
-        
-        csv_path = Path(csv_file)
-        
-        if not csv_path.exists():
-            self.stdout.write(self.style.ERROR(f'CSV file not found: {csv_path}'))
+            sources = [str(Path(__file__).parent.parent.parent.parent.parent / 'sample_data' / 'sample_equipment_data.csv')]
+
+        paths = self.expand_sources(sources)
+        if not paths:
+            raise CommandError(f'No CSV files found in: {", ".join(sources)}')
+
+        pending = [path for path in paths if options['force'] or not self.already_ingested(path)]
+        skipped = len(paths) - len(pending)
+        if skipped:
+            self.stdout.write(f'Skipping {skipped} file(s) already loaded (use --force to reload)')
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('Nothing to load.'))
             return
-        
-        self.stdout.write(f'Loading equipment data from {csv_path}...')
-        
-        # Create dataset
-        dataset = EquipmentDataset.objects.create(
-            filename=csv_path.name
-        )
-        
-        # Load equipment items
-        items = []
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                item = EquipmentItem(
-                    dataset=dataset,
-                    equipment_name=row['Equipment Name'],
-                    type=row['Type'],
-                    flowrate=float(row['Flowrate']),
-                    pressure=float(row['Pressure']),
-                    temperature=float(row['Temperature'])
-                )
-                items.append(item)
-        
-        # Bulk create items
-        EquipmentItem.objects.bulk_create(items)
-        
-        # Calculate summary statistics
-        items_queryset = dataset.equipment_items.all()
-        summary = {
-            'total_items': items_queryset.count(),
-            'equipment_types': list(items_queryset.values_list('type', flat=True).distinct()),
-            'avg_flowrate': items_queryset.aggregate(Avg('flowrate'))['flowrate__avg'] or 0,
-            'avg_pressure': items_queryset.aggregate(Avg('pressure'))['pressure__avg'] or 0,
-            'avg_temperature': items_queryset.aggregate(Avg('temperature'))['temperature__avg'] or 0,
-            'max_flowrate': items_queryset.aggregate(Max('flowrate'))['flowrate__max'] or 0,
-            'min_flowrate': items_queryset.aggregate(Min('flowrate'))['flowrate__min'] or 0,
-            'max_pressure': items_queryset.aggregate(Max('pressure'))['pressure__max'] or 0,
-            'min_pressure': items_queryset.aggregate(Min('pressure'))['pressure__min'] or 0,
-            'max_temperature': items_queryset.aggregate(Max('temperature'))['temperature__max'] or 0,
-            'min_temperature': items_queryset.aggregate(Min('temperature'))['temperature__min'] or 0,
-        }
-        
-        # Update dataset with summary
-        dataset.summary_json = summary
-        dataset.save()
-        
+
+        self.stdout.write(f'Loading {len(pending)} file(s) with {options["workers"]} worker(s)...')
+        started = time.perf_counter()
+        total_rows = loaded = failed = 0
+
+        for path, result in self.parse_in_parallel(pending, options['workers'], options['engine']):
+            if isinstance(result, Exception):
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'  {path}: {result}'))
+                continue
+            dataset = self.write_dataset(path, result, options['storage'] or settings.DATASET_STORAGE)
+            loaded += 1
+            total_rows += dataset.summary_json['total_equipment_count']
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'  [{loaded + failed}/{len(pending)}] {path.name}: '
+                f'{dataset.summary_json["total_equipment_count"]:,} rows -> dataset {dataset.id} '
+                f'({total_rows / elapsed:,.0f} rows/s overall)'
+            )
+
+        elapsed = time.perf_counter() - started
+        style = self.style.SUCCESS if not failed else self.style.WARNING
         self.stdout.write(
-            self.style.SUCCESS(
-                f'Successfully loaded {len(items)} equipment items into dataset {dataset.id}. '
+            style(
+                f'Loaded {total_rows:,} equipment items from {loaded} file(s) in {elapsed:.1f}s'
+                f'{f", {failed} failed" if failed else ""}. '
                 f'Total datasets: {EquipmentDataset.objects.count()}, '
                 f'Total equipment items: {EquipmentItem.objects.count()}'
             )
         )
+
+    def expand_sources(self, sources):
+        """Resolve files, directories (supported files inside) and glob patterns to unique sorted paths"""
+        paths = []
+        for source in sources:
+            matches = glob.glob(source, recursive=True) if glob.has_magic(source) else [source]
+            for match in matches:
+                match = Path(match)
+                if match.is_dir():
+                    paths.extend(sorted(path for path in match.iterdir() if detect_format(path.name)))
+                elif match.is_file():
+                    paths.append(match)
+                else:
+                    self.stdout.write(self.style.ERROR(f'CSV file not found: {match}'))
+        return sorted({path.resolve() for path in paths})
+
+    def already_ingested(self, path):
+        stat = path.stat()
+        return IngestedFile.objects.filter(
+            path=str(path), size=stat.st_size, modified_at=stat.st_mtime
+        ).exists()
+
+    def parse_in_parallel(self, paths, workers, engine='auto'):
+        """
+        Yield (path, ParseResult or exception) as files finish parsing.
+
+        Any error parsing a file (csv.Error, pandas ParserError, a decoding
+        error...) fails that file only. At most two files per worker are in
+        flight so parsed data does not pile up in memory while the single
+        writer is busy. If a worker process dies, the files in flight fail
+        with BrokenProcessPool and the rest continue in a new pool.
+        """
+        if workers <= 1:
+            for path in paths:
+                try:
+                    yield path, parse_file(path, engine)
+                except Exception as e:
+                    yield path, e
+            return
+
+        queue = list(reversed(paths))
+        while queue:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = {}
+                broken = False
+                while (queue and not broken) or in_flight:
+                    while queue and not broken and len(in_flight) < workers * 2:
+                        path = queue.pop()
+                        try:
+                            in_flight[pool.submit(parse_file, path, engine)] = path
+                        except BrokenProcessPool:
+                            queue.append(path)
+                            broken = True
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = in_flight.pop(future)
+                        try:
+                            yield path, future.result()
+                        except Exception as e:
+                            broken = broken or isinstance(e, BrokenProcessPool)
+                            yield path, e
+
+    def write_dataset(self, path, result, storage):
+        """Create the dataset, its items and the resume record in one transaction"""
+        stat = path.stat()
+        with transaction.atomic():
+            dataset = EquipmentDataset.objects.create(filename=dataset_filename(path), storage=storage)
+            insert_items(
+                dataset, result.names, result.types,
+                result.flowrate, result.pressure, result.temperature, timestamps=result.timestamps
+            )
+            if storage == EquipmentDataset.COLUMN_CACHE:
+                dataset.save_column_store(build_column_store(
+                    result.names, result.types,
+                    result.flowrate, result.pressure, result.temperature
+                ))
+            if result.extra:
+                dataset.save_extra_columns(build_extra_columns(dataset, result.types, result.extra))
+                dataset.extra_fields = result.extra_labels
+            record_violations(dataset, result.types, result.flowrate, result.pressure, result.temperature)
+            dataset.summary_json = result.summary.to_summary()
+            dataset.summary_state = result.summary.to_state()
+            if settings.DATASET_PRECOMPUTE_CORRELATION:
+                dataset.correlation_json = correlation_matrices(
+                    result.types, result.flowrate, result.pressure, result.temperature
+                )
+            if settings.DATASET_OUTLIER_METHODS:
+                dataset.outliers_json = detect_ingest_outliers(
+                    dataset, result.types, result.flowrate, result.pressure, result.temperature,
+                    settings.DATASET_OUTLIER_METHODS
+                )
+            dataset.save()
+            IngestedFile.objects.update_or_create(
+                path=str(path),
+                defaults={
+                    'size': stat.st_size,
+                    'modified_at': stat.st_mtime,
+                    'dataset': dataset,
+                    'row_count': len(result),
+                }
+            )
+            DatasetEvent.record(DatasetEvent.CREATED, dataset)
+        return dataset
+
+
+def parse_file(path, engine):
+    """Process-pool worker: parse one file, rejecting it if any row is invalid"""
+    result = parse_equipment_file(path, path.name, engine=engine)
+    if result.errors:
+        more = f' (+{result.error_count - 1} more)' if result.error_count > 1 else ''
+        raise CSVFormatError(result.errors[0] + more)
+    return result
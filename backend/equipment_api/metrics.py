@@ -0,0 +1,233 @@
+"""
+Per-endpoint request instrumentation.
+
+MetricsMiddleware records wall time, SQL query count, SQL time and response
+size for every request, keyed by view and action. The totals are exported in
+Prometheus text format by MetricsView (/api/metrics) and the numbers for the
+current request are sent back in a `Server-Timing` header.
+
+Views can time named phases of their own work with `phase(request, name)`;
+phase timings show up in the same header and in the exported metrics.
+
+Metrics are kept in process memory, so every server worker reports its own
+counters.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.db import connection
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+# Upper bounds (seconds) of the request latency histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class MetricsRegistry:
+    """Thread-safe in-process store of request and phase metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.endpoints = {}
+            self.phases = {}
+
+    def observe_request(self, view, action, method, status_code, duration,
+                        query_count, query_time, response_bytes):
+        with self._lock:
+            key = (view, action, method, str(status_code))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            stats = self.endpoints.get((view, action))
+            if stats is None:
+                stats = self.endpoints[(view, action)] = {
+                    'count': 0, 'duration': 0.0, 'buckets': [0] * len(DURATION_BUCKETS),
+                    'queries': 0, 'query_time': 0.0, 'response_bytes': 0,
+                }
+            stats['count'] += 1
+            stats['duration'] += duration
+            bucket = bisect_left(DURATION_BUCKETS, duration)
+            if bucket < len(DURATION_BUCKETS):
+                stats['buckets'][bucket] += 1
+            stats['queries'] += query_count
+            stats['query_time'] += query_time
+            stats['response_bytes'] += response_bytes
+
+    def observe_phase(self, view, phase_name, duration):
+        with self._lock:
+            stats = self.phases.setdefault((view, phase_name), {'count': 0, 'duration': 0.0})
+            stats['count'] += 1
+            stats['duration'] += duration
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            requests = dict(self.requests)
+            endpoints = {key: dict(value, buckets=list(value['buckets']))
+                         for key, value in self.endpoints.items()}
+            phases = {key: dict(value) for key, value in self.phases.items()}
+
+        lines = [
+            '# HELP equipment_api_requests_total Requests handled, by view, action, method and status.',
+            '# TYPE equipment_api_requests_total counter',
+        ]
+        for (view, action, method, status_code), count in sorted(requests.items()):
+            labels = _labels(view=view, action=action, method=method, status=status_code)
+            lines.append(f'equipment_api_requests_total{{{labels}}} {count}')
+
+        lines += [
+            '# HELP equipment_api_request_duration_seconds Wall time spent handling requests.',
+            '# TYPE equipment_api_request_duration_seconds histogram',
+        ]
+        for (view, action), stats in sorted(endpoints.items()):
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, stats['buckets']):
+                cumulative += count
+                labels = _labels(view=view, action=action, le=repr(bound))
+                lines.append(f'equipment_api_request_duration_seconds_bucket{{{labels}}} {cumulative}')
+            labels = _labels(view=view, action=action, le='+Inf')
+            lines.append(f'equipment_api_request_duration_seconds_bucket{{{labels}}} {stats["count"]}')
+            labels = _labels(view=view, action=action)
+            lines.append(f'equipment_api_request_duration_seconds_sum{{{labels}}} {stats["duration"]:.6f}')
+            lines.append(f'equipment_api_request_duration_seconds_count{{{labels}}} {stats["count"]}')
+
+        for name, field, kind, help_text in (
+            ('equipment_api_db_queries_total', 'queries', 'counter', 'SQL queries executed.'),
+            ('equipment_api_db_duration_seconds_total', 'query_time', 'counter', 'Time spent executing SQL.'),
+            ('equipment_api_response_bytes_total', 'response_bytes', 'counter', 'Response body bytes sent.'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for (view, action), stats in sorted(endpoints.items()):
+                value = stats[field]
+                value = f'{value:.6f}' if isinstance(value, float) else value
+                lines.append(f'{name}{{{_labels(view=view, action=action)}}} {value}')
+
+        lines += [
+            '# HELP equipment_api_phase_duration_seconds Time spent in named phases of a view.',
+            '# TYPE equipment_api_phase_duration_seconds summary',
+        ]
+        for (view, phase_name), stats in sorted(phases.items()):
+            labels = _labels(view=view, phase=phase_name)
+            lines.append(f'equipment_api_phase_duration_seconds_sum{{{labels}}} {stats["duration"]:.6f}')
+            lines.append(f'equipment_api_phase_duration_seconds_count{{{labels}}} {stats["count"]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def _labels(**labels):
+    """Format Prometheus labels, escaping backslashes, quotes and newlines"""
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+@contextmanager
+def phase(request, name):
+    """
+    Time a named phase of the current request.
+
+    Accepts either a DRF Request or a Django HttpRequest.
+    """
+    http_request = getattr(request, '_request', request)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = getattr(http_request, 'metrics_phases', None)
+        if phases is not None:
+            phases.append((name, time.perf_counter() - started))
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their total time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Record per-view request metrics and emit a Server-Timing header"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.metrics_phases = []
+        request.metrics_view = ('unresolved', '')
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        view, action = request.metrics_view
+        response_bytes = 0 if response.streaming else len(response.content)
+        registry.observe_request(
+            view, action, request.method, response.status_code,
+            duration, queries.count, queries.duration, response_bytes
+        )
+        for phase_name, phase_duration in request.metrics_phases:
+            registry.observe_phase(view, phase_name, phase_duration)
+
+        timings = [
+            f'app;dur={duration * 1000:.1f}',
+            f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries"',
+        ]
+        timings += [f'{phase_name};dur={phase_duration * 1000:.1f}'
+                    for phase_name, phase_duration in request.metrics_phases]
+        response['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        view = view_class.__name__ if view_class else view_func.__name__
+        # DRF viewsets map HTTP methods to actions, e.g. {'get': 'chart_data'}
+        actions = getattr(view_func, 'actions', None) or {}
+        request.metrics_view = (view, actions.get(request.method.lower(), request.method.lower()))
+        return None
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data.encode(self.charset) if isinstance(data, str) else str(data).encode(self.charset)
+
+
+class MetricsView(APIView):
+    """
+    GET /api/metrics
+    Request metrics in Prometheus text format
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(
+            registry.render_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetEvent',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('deleted', 'Deleted'), ('pruned', 'Pruned')], max_length=10)),
+                ('dataset_id', models.IntegerField(help_text='ID of the dataset the event refers to')),
+                ('payload', models.JSONField(default=dict, help_text='Dataset snapshot in the list format')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Dataset Event',
+                'verbose_name_plural': 'Dataset Events',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0002_datasetevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedFile',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('path', models.CharField(max_length=1024, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('modified_at', models.FloatField(help_text='File modification time (POSIX timestamp)')),
+                ('row_count', models.IntegerField(default=0)),
+                ('ingested_at', models.DateTimeField(auto_now_add=True)),
+                ('dataset', models.ForeignKey(help_text='Dataset created from this file', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='source_files', to='equipment_api.equipmentdataset')),
+            ],
+            options={
+                'verbose_name': 'Ingested File',
+                'verbose_name_plural': 'Ingested Files',
+                'ordering': ['-ingested_at'],
+            },
+        ),
+    ]
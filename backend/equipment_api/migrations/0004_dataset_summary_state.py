@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0003_ingestedfile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='summary_state',
+            field=models.JSONField(blank=True, default=dict, help_text='Unrounded mergeable totals (overall and per type) behind summary_json; empty when stale'),
+        ),
+        migrations.AlterField(
+            model_name='datasetevent',
+            name='kind',
+            field=models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('pruned', 'Pruned')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0004_dataset_summary_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipmentitem',
+            index=models.Index(fields=['equipment_name', 'dataset'], name='equipment_a_equipme_414f7b_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def intern_types(apps, schema_editor):
+    """Create one EquipmentType per distinct name and point items at it"""
+    EquipmentItem = apps.get_model('equipment_api', 'EquipmentItem')
+    EquipmentType = apps.get_model('equipment_api', 'EquipmentType')
+    names = EquipmentItem.objects.values_list('type_name', flat=True).distinct()
+    for name in names:
+        equipment_type = EquipmentType.objects.create(name=name)
+        EquipmentItem.objects.filter(type_name=name).update(type_ref=equipment_type)
+
+
+def restore_type_names(apps, schema_editor):
+    EquipmentItem = apps.get_model('equipment_api', 'EquipmentItem')
+    EquipmentType = apps.get_model('equipment_api', 'EquipmentType')
+    for equipment_type in EquipmentType.objects.all():
+        EquipmentItem.objects.filter(type_ref=equipment_type).update(type_name=equipment_type.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0005_equipmentitem_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentType',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Equipment Type',
+                'verbose_name_plural': 'Equipment Types',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RenameField(
+            model_name='equipmentitem',
+            old_name='type',
+            new_name='type_name',
+        ),
+        # Nullable while converting so the migration can also be reversed
+        migrations.AlterField(
+            model_name='equipmentitem',
+            name='type_name',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='equipmentitem',
+            name='type_ref',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.PROTECT,
+                related_name='+', to='equipment_api.equipmenttype'
+            ),
+        ),
+        migrations.RunPython(intern_types, restore_type_names),
+        migrations.RemoveField(
+            model_name='equipmentitem',
+            name='type_name',
+        ),
+        migrations.RenameField(
+            model_name='equipmentitem',
+            old_name='type_ref',
+            new_name='type',
+        ),
+        migrations.AlterField(
+            model_name='equipmentitem',
+            name='type',
+            field=models.ForeignKey(
+                help_text='Equipment type (interned name)',
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='items', to='equipment_api.equipmenttype'
+            ),
+        ),
+    ]
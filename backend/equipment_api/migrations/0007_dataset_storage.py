@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0006_equipmenttype'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='storage',
+            field=models.CharField(choices=[('rows', 'Rows'), ('column_cache', 'Rows with column cache')], default='rows', help_text="'column_cache' also keeps a copy of the readings as column files for whole-dataset reads", max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0007_dataset_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='correlation_json',
+            field=models.JSONField(blank=True, default=dict, help_text='Cached per-type correlation matrices of the readings; empty until computed or when stale'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0008_dataset_correlation_json'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperatingLimit',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('field', models.CharField(choices=[('flowrate', 'Flowrate'), ('pressure', 'Pressure'), ('temperature', 'Temperature')], max_length=20)),
+                ('minimum', models.FloatField(blank=True, help_text='Lowest safe reading (none when unbounded)', null=True)),
+                ('maximum', models.FloatField(blank=True, help_text='Highest safe reading (none when unbounded)', null=True)),
+                ('type', models.ForeignKey(help_text='Equipment type the limit applies to', on_delete=django.db.models.deletion.CASCADE, related_name='limits', to='equipment_api.equipmenttype')),
+            ],
+            options={
+                'verbose_name': 'Operating Limit',
+                'verbose_name_plural': 'Operating Limits',
+                'ordering': ['type__name', 'field'],
+                'unique_together': {('type', 'field')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LimitViolation',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('field', models.CharField(choices=[('flowrate', 'Flowrate'), ('pressure', 'Pressure'), ('temperature', 'Temperature')], max_length=20)),
+                ('bound', models.CharField(choices=[('min', 'Below minimum'), ('max', 'Above maximum')], max_length=3)),
+                ('value', models.FloatField(help_text='The reading')),
+                ('limit', models.FloatField(help_text='The limit it crossed')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='violations', to='equipment_api.equipmentdataset')),
+                ('item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='violations', to='equipment_api.equipmentitem')),
+            ],
+            options={
+                'verbose_name': 'Limit Violation',
+                'verbose_name_plural': 'Limit Violations',
+                'ordering': ['item_id', 'field'],
+                'indexes': [models.Index(fields=['dataset', 'item'], name='equipment_a_dataset_fd0166_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0009_operating_limits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='outliers_json',
+            field=models.JSONField(blank=True, default=dict, help_text='Cached outliers per detection method (default thresholds); empty until computed or when stale'),
+        ),
+    ]
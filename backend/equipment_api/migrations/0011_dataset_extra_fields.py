@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0010_dataset_outliers_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='extra_fields',
+            field=models.JSONField(blank=True, default=dict, help_text='Extra numeric columns as {field key: column header}; their values are in DatasetExtraColumns'),
+        ),
+        migrations.CreateModel(
+            name='DatasetExtraColumns',
+            fields=[
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='extra_columns_data', serialize=False, to='equipment_api.equipmentdataset')),
+                ('data', models.BinaryField()),
+            ],
+            options={
+                'verbose_name': 'Dataset Extra Columns',
+                'verbose_name_plural': 'Dataset Extra Columns',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0011_dataset_extra_fields'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='equipmentitem',
+            name='equipment_a_dataset_bcc379_idx',
+        ),
+        migrations.AddField(
+            model_name='equipmentitem',
+            name='ts',
+            field=models.DateTimeField(blank=True, help_text="Time of the reading, from the file's timestamp column when it has one", null=True),
+        ),
+        migrations.AddIndex(
+            model_name='equipmentitem',
+            index=models.Index(fields=['dataset', 'equipment_name', 'ts'], name='equipment_a_dataset_972be0_idx'),
+        ),
+    ]
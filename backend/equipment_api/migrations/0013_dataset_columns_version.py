@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_api', '0012_equipmentitem_ts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='columns_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped whenever the items change; column files saved for an older version are not read'),
+        ),
+    ]
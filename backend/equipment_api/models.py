@@ -1,13 +1,54 @@
-from django.db import models
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 import json
+from .columnar import COLUMNS_DIR, ColumnStore, ExtraColumns, remove_store
+from .correlation import correlation_matrices
+from .outliers import DEFAULT_THRESHOLDS, detect_outliers, outlier_report
+from .summary import NUMERIC_FIELDS, SummaryAccumulator
 
 
 class EquipmentDataset(models.Model):
     """Model to track uploaded equipment datasets"""
+    ROWS = 'rows'
+    COLUMN_CACHE = 'column_cache'
+    STORAGE_CHOICES = [
+        (ROWS, 'Rows'),
+        (COLUMN_CACHE, 'Rows with column cache'),
+    ]
+
     id = models.AutoField(primary_key=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     filename = models.CharField(max_length=255)
     summary_json = models.JSONField(default=dict, help_text="Summary statistics in JSON format")
+    summary_state = models.JSONField(
+        default=dict, blank=True,
+        help_text="Unrounded mergeable totals (overall and per type) behind summary_json; empty when stale"
+    )
+    storage = models.CharField(
+        max_length=20, choices=STORAGE_CHOICES, default=ROWS,
+        help_text="'column_cache' also keeps a copy of the readings as column files for whole-dataset reads"
+    )
+    correlation_json = models.JSONField(
+        default=dict, blank=True,
+        help_text="Cached per-type correlation matrices of the readings; empty until computed or when stale"
+    )
+    outliers_json = models.JSONField(
+        default=dict, blank=True,
+        help_text="Cached outliers per detection method (default thresholds); empty until computed or when stale"
+    )
+    extra_fields = models.JSONField(
+        default=dict, blank=True,
+        help_text="Extra numeric columns as {field key: column header}; their values are in DatasetExtraColumns"
+    )
+    columns_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped whenever the items change; column files saved for an older version are not read"
+    )
 
     class Meta:
         ordering = ['-uploaded_at']
@@ -17,6 +58,302 @@ class EquipmentDataset(models.Model):
     def __str__(self):
         return f"{self.filename} (Uploaded: {self.uploaded_at.strftime('%Y-%m-%d %H:%M')})"
 
+    def summary_accumulator(self):
+        """
+        SummaryAccumulator for the stored items.
+
+        Restored from summary_state when present; otherwise (datasets loaded
+        before it existed, or after individual items were edited) rebuilt with
+        one GROUP BY over the items, plus the extra column files.
+        """
+        if self.summary_state:
+            return SummaryAccumulator.from_state(self.summary_state)
+        accumulator = self._rebuild_accumulator()
+        if self.extra_fields:
+            extra = self.extra_columns()
+            extra.summarize(accumulator, EquipmentType.names(np.unique(extra.type_ids).tolist()))
+        return accumulator
+
+    def _rebuild_accumulator(self):
+        if self.storage == self.COLUMN_CACHE:
+            store = self.column_store()
+            return store.summary(EquipmentType.names(np.unique(store.type_ids).tolist()))
+        return self._accumulator_from_types(self._aggregate_rows([self.pk])[self.pk])
+
+    @staticmethod
+    def _accumulator_from_types(types):
+        """SummaryAccumulator of per-type aggregates as returned by _aggregate_rows"""
+        stats = types.values()
+        return SummaryAccumulator.from_state({
+            'count': sum(entry['count'] for entry in stats),
+            'sums': {field: sum(entry['sums'][field] for entry in stats) for field in NUMERIC_FIELDS},
+            'minimums': {field: min((entry['minimums'][field] for entry in stats), default=None)
+                         for field in NUMERIC_FIELDS},
+            'maximums': {field: max((entry['maximums'][field] for entry in stats), default=None)
+                         for field in NUMERIC_FIELDS},
+            'types': types,
+        })
+
+    def correlations(self):
+        """
+        Covariance, Pearson and Spearman matrices of the readings, overall and
+        per type (see correlation.py).
+
+        Served from correlation_json; computed from the column files or one
+        query over the items and stored when missing.
+        """
+        if self.correlation_json:
+            return self.correlation_json
+        _, type_ids, columns = self.readings()
+        result = correlation_matrices(type_ids, *(columns[field] for field in NUMERIC_FIELDS))
+        names = EquipmentType.names(result['types'])
+        result['types'] = {names[type_id]: stats for type_id, stats in result['types'].items()}
+        result['types'] = dict(sorted(result['types'].items()))
+        EquipmentDataset.objects.filter(pk=self.pk).update(correlation_json=result)
+        self.correlation_json = result
+        return result
+
+    def outliers(self, method, threshold=None):
+        """
+        Readings flagged by an outlier method (see outliers.py) as
+        {'method', 'threshold', 'count', 'items': [{item_id, type, field, value, score}]}.
+
+        Results for the default threshold are kept in outliers_json.
+        """
+        if threshold is None or threshold == DEFAULT_THRESHOLDS[method]:
+            if method in self.outliers_json:
+                return self.outliers_json[method]
+            threshold = None
+        item_ids, type_ids, columns = self.readings(item_ids=True)
+        found = detect_outliers(type_ids, columns, method, threshold)
+        flagged_types = type_ids[found['positions']]
+        names = EquipmentType.names(np.unique(flagged_types).tolist())
+        result = outlier_report(
+            found, item_ids[found['positions']], [names[type_id] for type_id in flagged_types.tolist()],
+            method, threshold
+        )
+        if threshold is None:
+            self.outliers_json = {**self.outliers_json, method: result}
+            EquipmentDataset.objects.filter(pk=self.pk).update(outliers_json=self.outliers_json)
+        return result
+
+    def readings(self, item_ids=False):
+        """
+        (item ids or None, type ids, {field: values}) of every item as NumPy
+        arrays, in id order; from the column files when the dataset has them.
+        """
+        items = self.equipment_items.order_by('id')
+        if self.storage == self.COLUMN_CACHE:
+            store = self.column_store()
+            columns = {field: getattr(store, field) for field in NUMERIC_FIELDS}
+            ids = None
+            if item_ids:
+                # The store keeps the items' id order
+                ids = np.fromiter(items.values_list('id', flat=True).iterator(chunk_size=10_000), dtype=np.int64)
+            return ids, store.type_ids, columns
+        rows = items.values_list('id', 'type_id', *NUMERIC_FIELDS)
+        dtype = [('id', np.int64), ('type_id', np.int64)] + [(field, np.float64) for field in NUMERIC_FIELDS]
+        table = np.fromiter(rows.iterator(chunk_size=10_000), dtype=dtype)
+        columns = {field: table[field] for field in NUMERIC_FIELDS}
+        return (table['id'] if item_ids else None), table['type_id'], columns
+
+    @classmethod
+    def type_aggregates(cls, datasets):
+        """
+        {dataset id: {type: {'count', 'sums', 'minimums', 'maximums'}}}, types sorted.
+        Extra fields are included, with `counts` of their values where they
+        differ from the type's count (see SummaryAccumulator.to_state).
+
+        Read from stored totals where available. The other datasets, whatever
+        their storage, share one GROUP BY dataset, type over the items, and
+        their extra fields are read in one query, so the query count does not
+        grow with the number of datasets.
+        """
+        aggregates = {}
+        stale = []
+        for dataset in datasets:
+            if dataset.summary_state:
+                aggregates[dataset.pk] = dataset.summary_accumulator().to_state()['types']
+            else:
+                stale.append(dataset)
+        if not stale:
+            return aggregates
+        types = cls._aggregate_rows([dataset.pk for dataset in stale])
+        extras = cls.load_extra_columns([dataset for dataset in stale if dataset.extra_fields])
+        names = EquipmentType.names(
+            np.unique(np.concatenate([extra.type_ids for extra in extras.values()])).tolist()
+        ) if extras else {}
+        for dataset in stale:
+            if dataset.pk in extras:
+                accumulator = extras[dataset.pk].summarize(cls._accumulator_from_types(types[dataset.pk]), names)
+                aggregates[dataset.pk] = accumulator.to_state()['types']
+            else:
+                aggregates[dataset.pk] = types[dataset.pk]
+        return aggregates
+
+    @staticmethod
+    def _aggregate_rows(dataset_ids):
+        """Per-type count, sums, minima and maxima of the items of `dataset_ids`"""
+        aggregates = {}
+        for field in NUMERIC_FIELDS:
+            aggregates[f'{field}_sum'] = models.Sum(field)
+            aggregates[f'{field}_min'] = models.Min(field)
+            aggregates[f'{field}_max'] = models.Max(field)
+        rows = list(
+            EquipmentItem.objects.filter(dataset_id__in=dataset_ids)
+            .order_by().values('dataset_id', 'type_id')
+            .annotate(count=models.Count('id'), **aggregates)
+        )
+        names = EquipmentType.names(row['type_id'] for row in rows)
+        types = {dataset_id: {} for dataset_id in dataset_ids}
+        for row in sorted(rows, key=lambda row: names[row['type_id']]):
+            types[row['dataset_id']][names[row['type_id']]] = {
+                'count': row['count'],
+                'sums': {field: row[f'{field}_sum'] for field in NUMERIC_FIELDS},
+                'minimums': {field: row[f'{field}_min'] for field in NUMERIC_FIELDS},
+                'maximums': {field: row[f'{field}_max'] for field in NUMERIC_FIELDS},
+            }
+        return types
+
+    @property
+    def columns_path(self):
+        # One directory per columns_version, so a store saved late by a transaction
+        # that raced with an item edit is never read in place of the edited rows
+        return Path(settings.MEDIA_ROOT) / COLUMNS_DIR / str(self.pk) / str(self.columns_version)
+
+    def column_store(self):
+        """
+        ColumnStore of a column-cache dataset's readings.
+
+        Memory-mapped from MEDIA_ROOT when saved for the current
+        columns_version; otherwise (after items were edited, or files were
+        lost) rebuilt from the rows in one query and saved.
+        """
+        try:
+            return ColumnStore.load(self.columns_path)
+        except FileNotFoundError:
+            pass
+        path = self.columns_path
+        rows = self.equipment_items.order_by('id').values_list(
+            'equipment_name', 'type_id', *NUMERIC_FIELDS
+        )
+        store = ColumnStore.from_columns(*(list(zip(*rows)) or [()] * 5))
+        self._write_column_store(store, path)
+        return store
+
+    def save_column_store(self, store):
+        """
+        Write `store` as this dataset's columns once the current transaction
+        commits. Callers that changed the items bump columns_version first.
+        """
+        path = self.columns_path
+        transaction.on_commit(lambda: self._write_column_store(store, path))
+
+    @staticmethod
+    def _write_column_store(store, path):
+        store.save(path, compress=settings.COLUMN_STORE_COMPRESSION)
+        # Stores of earlier versions are never read again
+        for previous in path.parent.glob('*'):
+            if previous.name.isdigit() and int(previous.name) < int(path.name):
+                remove_store(previous)
+
+    @classmethod
+    def drop_column_stores(cls, *dataset_ids):
+        """Discard saved columns of every version once the transaction commits"""
+        root = Path(settings.MEDIA_ROOT) / COLUMNS_DIR
+        for dataset_id in dataset_ids:
+            transaction.on_commit(lambda path=root / str(dataset_id): remove_store(path))
+
+    def extra_columns(self):
+        """
+        ExtraColumns holding the values of `extra_fields`. They cannot be
+        rebuilt from the rows, so a dataset with extra fields and no stored
+        values raises DatasetExtraColumns.DoesNotExist.
+        """
+        if not self.extra_fields:
+            return ExtraColumns.empty()
+        data = DatasetExtraColumns.objects.values_list('data', flat=True).get(dataset_id=self.pk)
+        return ExtraColumns.from_bytes(data, list(self.extra_fields))
+
+    @staticmethod
+    def load_extra_columns(datasets):
+        """{dataset id: ExtraColumns} of `datasets` (which have extra fields), read in one query"""
+        if not datasets:
+            return {}
+        stored = dict(
+            DatasetExtraColumns.objects.filter(dataset_id__in=[dataset.pk for dataset in datasets])
+            .values_list('dataset_id', 'data')
+        )
+        missing = [dataset.pk for dataset in datasets if dataset.pk not in stored]
+        if missing:
+            raise DatasetExtraColumns.DoesNotExist(f'No extra field values stored for datasets {missing}')
+        return {
+            dataset.pk: ExtraColumns.from_bytes(stored[dataset.pk], list(dataset.extra_fields))
+            for dataset in datasets
+        }
+
+    def save_extra_columns(self, extra):
+        """
+        Store `extra` as this dataset's extra fields in the current transaction.
+        Callers that derived it from the stored values hold the dataset's row
+        lock (select_for_update) from before reading them.
+        """
+        DatasetExtraColumns.objects.update_or_create(dataset_id=self.pk, defaults={'data': extra.to_bytes()})
+
+
+@receiver(post_delete, sender=EquipmentDataset)
+def remove_dataset_columns(sender, instance, **kwargs):
+    if instance.storage == EquipmentDataset.COLUMN_CACHE:
+        EquipmentDataset.drop_column_stores(instance.pk)
+
+
+class DatasetExtraColumns(models.Model):
+    """Values of a dataset's extra fields (ExtraColumns.to_bytes), apart so dataset queries skip them"""
+    dataset = models.OneToOneField(
+        EquipmentDataset, on_delete=models.CASCADE, primary_key=True, related_name='extra_columns_data'
+    )
+    data = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Dataset Extra Columns"
+        verbose_name_plural = "Dataset Extra Columns"
+
+
+class EquipmentType(models.Model):
+    """Dictionary of equipment type names; items reference it by integer key"""
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Equipment Type"
+        verbose_name_plural = "Equipment Types"
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def intern(cls, names):
+        """
+        Return {name: id} for `names`, creating the missing types.
+
+        Costs two or three queries however many rows share the names, so
+        ingest interns each distinct name once.
+        """
+        names = set(names)
+        ids = dict(cls.objects.filter(name__in=names).values_list('name', 'id'))
+        missing = names - ids.keys()
+        if missing:
+            # ignore_conflicts: a concurrent ingest may intern the same name first
+            cls.objects.bulk_create([cls(name=name) for name in sorted(missing)], ignore_conflicts=True)
+            ids.update(cls.objects.filter(name__in=missing).values_list('name', 'id'))
+        return ids
+
+    @classmethod
+    def names(cls, ids):
+        """{id: name} for the given type ids in one query"""
+        return dict(cls.objects.filter(id__in=set(ids)).values_list('id', 'name'))
+
 
 class EquipmentItem(models.Model):
     """Model for individual equipment items"""
@@ -28,10 +365,19 @@ class EquipmentItem(models.Model):
         help_text="The dataset this equipment belongs to"
     )
     equipment_name = models.CharField(max_length=200)
-    type = models.CharField(max_length=100)
+    type = models.ForeignKey(
+        EquipmentType,
+        on_delete=models.PROTECT,
+        related_name='items',
+        help_text="Equipment type (interned name)"
+    )
     flowrate = models.FloatField(help_text="Flowrate in L/min")
     pressure = models.FloatField(help_text="Pressure in bar")
     temperature = models.FloatField(help_text="Temperature in °C")
+    ts = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Time of the reading, from the file's timestamp column when it has one"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -39,8 +385,171 @@ class EquipmentItem(models.Model):
         verbose_name = "Equipment Item"
         verbose_name_plural = "Equipment Items"
         indexes = [
-            models.Index(fields=['dataset', 'equipment_name']),
+            # Name lookups within a dataset, and time series of one piece of equipment
+            models.Index(fields=['dataset', 'equipment_name', 'ts']),
+            # Trend lookups by name across datasets
+            models.Index(fields=['equipment_name', 'dataset']),
         ]
 
     def __str__(self):
         return f"{self.equipment_name} ({self.type})"
+
+
+class OperatingLimit(models.Model):
+    """Safe operating envelope of one numeric field for an equipment type"""
+    FIELD_CHOICES = [(field, field.capitalize()) for field in NUMERIC_FIELDS]
+
+    id = models.AutoField(primary_key=True)
+    type = models.ForeignKey(
+        EquipmentType,
+        on_delete=models.CASCADE,
+        related_name='limits',
+        help_text="Equipment type the limit applies to"
+    )
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    minimum = models.FloatField(null=True, blank=True, help_text="Lowest safe reading (none when unbounded)")
+    maximum = models.FloatField(null=True, blank=True, help_text="Highest safe reading (none when unbounded)")
+
+    class Meta:
+        ordering = ['type__name', 'field']
+        unique_together = [('type', 'field')]
+        verbose_name = "Operating Limit"
+        verbose_name_plural = "Operating Limits"
+
+    def __str__(self):
+        return f"{self.type} {self.field}: {self.minimum} .. {self.maximum}"
+
+    @classmethod
+    def envelopes(cls, by_id=False):
+        """{type name (or id): {field: (minimum, maximum)}} of every limit, in one query"""
+        envelopes = {}
+        key = 'type_id' if by_id else 'type__name'
+        for type_key, field, minimum, maximum in cls.objects.values_list(key, 'field', 'minimum', 'maximum'):
+            envelopes.setdefault(type_key, {})[field] = (minimum, maximum)
+        return envelopes
+
+
+class LimitViolation(models.Model):
+    """A reading outside the operating limits of its type, recorded when the item is stored"""
+    MIN = 'min'
+    MAX = 'max'
+    BOUND_CHOICES = [
+        (MIN, 'Below minimum'),
+        (MAX, 'Above maximum'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    dataset = models.ForeignKey(
+        EquipmentDataset,
+        on_delete=models.CASCADE,
+        related_name='violations'
+    )
+    # No cascade from items: deleting a dataset's items must stay a single
+    # DELETE; violations go with their dataset, and single-item deletes clear them
+    item = models.ForeignKey(
+        EquipmentItem,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='violations'
+    )
+    field = models.CharField(max_length=20, choices=OperatingLimit.FIELD_CHOICES)
+    bound = models.CharField(max_length=3, choices=BOUND_CHOICES)
+    value = models.FloatField(help_text="The reading")
+    limit = models.FloatField(help_text="The limit it crossed")
+
+    class Meta:
+        ordering = ['item_id', 'field']
+        verbose_name = "Limit Violation"
+        verbose_name_plural = "Limit Violations"
+        indexes = [
+            models.Index(fields=['dataset', 'item']),
+        ]
+
+    def __str__(self):
+        return f"item {self.item_id} {self.field} {self.value} ({self.bound} {self.limit})"
+
+
+class DatasetEvent(models.Model):
+    """Append-only log of dataset lifecycle changes, used as a version cursor by clients"""
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    PRUNED = 'pruned'
+    KIND_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+        (PRUNED, 'Pruned'),
+    ]
+
+    # Number of events kept in the log; clients whose cursor falls behind must resync
+    RETENTION = 500
+
+    id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    dataset_id = models.IntegerField(help_text="ID of the dataset the event refers to")
+    payload = models.JSONField(default=dict, help_text="Dataset snapshot in the list format")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Dataset Event"
+        verbose_name_plural = "Dataset Events"
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} dataset {self.dataset_id}"
+
+    @classmethod
+    def record(cls, kind, dataset):
+        """Append an event for the given dataset and trim the log to RETENTION entries"""
+        event = cls.objects.create(
+            kind=kind,
+            dataset_id=dataset.id,
+            payload={
+                'id': dataset.id,
+                'filename': dataset.filename,
+                'uploaded_at': dataset.uploaded_at.isoformat() if dataset.uploaded_at else None,
+                'summary': dataset.summary_json or {},
+            },
+        )
+        cls.objects.filter(id__lte=event.id - cls.RETENTION).delete()
+        return event
+
+    @classmethod
+    def latest_cursor(cls):
+        """Return the id of the newest event, or 0 when the log is empty"""
+        return cls.objects.aggregate(cursor=models.Max('id'))['cursor'] or 0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'dataset_id': self.dataset_id,
+            'dataset': self.payload,
+            'created_at': self.created_at,
+        }
+
+
+class IngestedFile(models.Model):
+    """Source file loaded by load_equipment, used to skip completed files when resuming"""
+    id = models.AutoField(primary_key=True)
+    path = models.CharField(max_length=1024, unique=True)
+    size = models.BigIntegerField()
+    modified_at = models.FloatField(help_text="File modification time (POSIX timestamp)")
+    dataset = models.ForeignKey(
+        EquipmentDataset,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='source_files',
+        help_text="Dataset created from this file"
+    )
+    row_count = models.IntegerField(default=0)
+    ingested_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-ingested_at']
+        verbose_name = "Ingested File"
+        verbose_name_plural = "Ingested Files"
+
+    def __str__(self):
+        return self.path
@@ -0,0 +1,129 @@
+"""
+Statistical outlier detection within each equipment type.
+
+`detect_outliers` scores every reading of NUMERIC_FIELDS against the other
+readings of its type and flags those beyond a threshold:
+
+- `zscore`: (value - mean) / standard deviation (ddof=1); default threshold 3
+- `mad`: robust z-score 0.6745 * (value - median) / median absolute deviation;
+  default threshold 3.5 (Iglewicz and Hoaglin)
+- `iqr`: distance beyond the first or third quartile in interquartile ranges
+  (negative below Q1); flagged beyond 1.5, Tukey's fences
+
+Group statistics come from one sort of the rows by (type, value) per field
+and `np.add.reduceat` / positional lookups into the sorted runs, so there is
+no Python loop over rows or types. Groups whose spread is zero flag nothing.
+
+Only depends on NumPy; EquipmentDataset caches results in `outliers_json`.
+"""
+
+import numpy as np
+
+from .summary import NUMERIC_FIELDS
+
+
+METHODS = ('zscore', 'mad', 'iqr')
+DEFAULT_THRESHOLDS = {'zscore': 3.0, 'mad': 3.5, 'iqr': 1.5}
+
+# Scales the MAD to the standard deviation of a normal distribution
+MAD_SCALE = 0.6745
+
+
+def detect_outliers(labels, columns, method='zscore', threshold=None):
+    """
+    Flagged readings as equal-length arrays: `positions` (row index),
+    `fields`, `values` and `scores`, ordered by position then field.
+
+    `columns` maps each of NUMERIC_FIELDS to an array of readings.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown outlier method '{method}'")
+    threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+    found = {'positions': [], 'fields': [], 'values': [], 'scores': []}
+    labels = np.asarray(labels)
+    if len(labels):
+        _, groups = np.unique(labels, return_inverse=True)
+        counts = np.bincount(groups)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        for field in NUMERIC_FIELDS:
+            values = np.asarray(columns[field], dtype=np.float64)
+            scores = _SCORERS[method](values, groups, starts, counts)
+            positions = np.flatnonzero(np.abs(scores) > threshold)
+            found['positions'].append(positions)
+            found['fields'].append(np.full(len(positions), field, dtype=object))
+            found['values'].append(values[positions])
+            found['scores'].append(scores[positions])
+    dtypes = {'positions': np.int64, 'fields': object, 'values': np.float64, 'scores': np.float64}
+    result = {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name])
+        for name, parts in found.items()
+    }
+    order = np.argsort(result['positions'], kind='stable')
+    return {name: values[order] for name, values in result.items()}
+
+
+def outlier_report(found, item_ids, types, method, threshold=None):
+    """
+    JSON-ready result of `detect_outliers`, given the item id and type name
+    of each flagged reading.
+    """
+    return {
+        'method': method,
+        'threshold': DEFAULT_THRESHOLDS[method] if threshold is None else threshold,
+        'count': len(found['positions']),
+        'items': [
+            {'item_id': item_id, 'type': label, 'field': field, 'value': value, 'score': round(score, 4)}
+            for item_id, label, field, value, score in zip(
+                np.asarray(item_ids).tolist(), types, found['fields'].tolist(),
+                found['values'].tolist(), found['scores'].tolist()
+            )
+        ],
+    }
+
+
+def _zscores(values, groups, starts, counts):
+    order = np.argsort(groups, kind='stable')
+    means = np.add.reduceat(values[order], starts) / counts
+    deviations = values - means[groups]
+    variances = np.add.reduceat(deviations[order] ** 2, starts) / np.maximum(counts - 1, 1)
+    return _ratio(deviations, np.sqrt(variances)[groups])
+
+
+def _mad_scores(values, groups, starts, counts):
+    medians = _group_quantiles(values, groups, starts, counts, 0.5)
+    deviations = values - medians[groups]
+    mads = _group_quantiles(np.abs(deviations), groups, starts, counts, 0.5)
+    return _ratio(MAD_SCALE * deviations, mads[groups])
+
+
+def _iqr_scores(values, groups, starts, counts):
+    first, third = _group_quantiles(values, groups, starts, counts, 0.25, 0.75)
+    spread = (third - first)[groups]
+    beyond = np.where(values > third[groups], values - third[groups], 0.0)
+    beyond = np.where(values < first[groups], values - first[groups], beyond)
+    return _ratio(beyond, spread)
+
+
+def _group_quantiles(values, groups, starts, counts, *quantiles):
+    """Per-group quantiles (linear interpolation, as np.quantile) from one sort"""
+    ordered = values[np.lexsort((values, groups))]
+    results = []
+    for quantile in quantiles:
+        position = quantile * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        fraction = position - lower
+        results.append(
+            ordered[starts + lower] * (1 - fraction) + ordered[starts + upper] * fraction
+        )
+    return results[0] if len(results) == 1 else results
+
+
+def _ratio(numerators, denominators):
+    """numerators / denominators, 0 where the spread is zero"""
+    scores = np.zeros(len(numerators))
+    np.divide(numerators, denominators, out=scores, where=denominators > 0)
+    return scores
+
+
+_SCORERS = {'zscore': _zscores, 'mad': _mad_scores, 'iqr': _iqr_scores}
@@ -0,0 +1,652 @@
+"""
+CSV parsing engines for equipment files.
+
+Every engine reads the five required columns with explicit types and
+returns the same columnar ParseResult, so the upload endpoint and the
+load_equipment command share one code path:
+
+- `python`  - stdlib csv reader, streaming row by row; lowest overhead for
+              small files
+- `pandas`  - pandas C parser with explicit `dtype` and `usecols`
+- `pyarrow` - Arrow's multithreaded CSV reader (optional dependency)
+
+`engine='auto'` picks one from the file size. Validation is vectorized and
+reports the same per-row messages whichever engine ran.
+
+Other columns whose values are all numbers (blanks allowed) are read too and
+kept in `ParseResult.extra`, keyed by `field_key` of their header. A column
+named like a timestamp (see TIMESTAMP_KEYS) becomes `ParseResult.timestamps`,
+the time of each reading in UTC.
+
+`parse_equipment_file` also accepts gzip or zstd compressed CSV (decompressed
+as a stream while the engine reads it) and Parquet (read column-wise with
+pyarrow), choosing by file name.
+
+Kept free of Django imports so the functions can run in worker processes
+(including spawned processes on Windows) without configuring settings.
+"""
+
+import csv
+import gzip
+import io
+import os
+import re
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from .summary import NUMERIC_FIELDS, SummaryAccumulator
+
+try:
+    import pyarrow
+    import pyarrow.csv as pyarrow_csv
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+TEXT_COLUMNS = ['Equipment Name', 'Type']
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+
+# Header keys (see field_key) of the optional reading timestamp column, in order of preference.
+# Generic 'Time' or 'Date' columns are left alone: they may hold durations, shift
+# labels or local date formats that were never meant as reading times
+TIMESTAMP_KEYS = ('timestamp', 'ts', 'datetime', 'date_time')
+
+# Extra numeric columns kept per file, in header order; the rest are ignored
+EXTRA_COLUMNS_MAX = 32
+# Field keys an extra column cannot take (item fields)
+RESERVED_KEYS = {'id', 'dataset', 'equipment_name', 'type', 'created_at', *NUMERIC_FIELDS, *TIMESTAMP_KEYS}
+
+# Files below SMALL_FILE_BYTES use the stdlib reader (pandas overtakes it at about
+# 1,000 rows in `benchmark --suite parsers`); files above LARGE_FILE_BYTES use
+# pyarrow when it is installed; everything in between uses pandas
+SMALL_FILE_BYTES = 64 * 1024
+LARGE_FILE_BYTES = 32 * 1024 * 1024
+
+MAX_REPORTED_ERRORS = 10
+
+# Compressed sizes are scaled by this when choosing an engine; equipment CSVs
+# typically compress 4-6x
+COMPRESSION_RATIO_ESTIMATE = 5
+
+# File name suffix -> format, checked in order
+FORMATS = [
+    ('.csv.gz', 'gzip'),
+    ('.csv.zst', 'zstd'),
+    ('.parquet', 'parquet'),
+    ('.csv', 'csv'),
+]
+
+
+class CSVFormatError(ValueError):
+    """Raised when a file does not match the equipment CSV format"""
+
+
+class EmptyCSVError(CSVFormatError):
+    """Raised when a file has no header row"""
+
+
+class MissingColumnsError(CSVFormatError):
+    """Raised when required columns are absent; carries the columns found"""
+
+    def __init__(self, missing, found):
+        super().__init__(f'Missing required columns: {", ".join(missing)}')
+        self.missing = missing
+        self.found = found
+
+
+class ParseResult:
+    """
+    Columnar equipment data parsed from one file.
+
+    `extra` holds the numeric extra columns as {field key: float64 array}
+    (NaN for blanks) and `extra_labels` their header names; `raw_extra`
+    passed in maps the same keys to the values as read. `timestamps` is a
+    datetime64[us] array in UTC (NaT for blanks), or None when the file has
+    no timestamp column (given as read in `raw_timestamps`).
+    """
+
+    def __init__(self, names, types, flowrate, pressure, temperature, columns, engine,
+                 raw_extra=None, raw_timestamps=None):
+        self.names = names
+        self.types = types
+        self.flowrate = flowrate
+        self.pressure = pressure
+        self.temperature = temperature
+        self.columns = columns
+        self.engine = engine
+        self.extra = {}
+        self.extra_labels = {}
+        labels = extra_columns(columns)
+        for key, values in (raw_extra or {}).items():
+            numbers = _numeric_or_none(values)
+            if numbers is not None:
+                self.extra[key] = numbers
+                self.extra_labels[key] = labels[key]
+        self.timestamps = None
+        bad_timestamps = None
+        if raw_timestamps is not None:
+            timestamps, bad_timestamps = _to_timestamps(raw_timestamps)
+            if not np.isnat(timestamps).all():
+                self.timestamps = timestamps
+        self.errors, self.error_count = validate_columns(
+            names, types, flowrate, pressure, temperature, bad_timestamps
+        )
+        # Only valid files are ingested, so only they get a summary
+        self.summary = None if self.error_count else SummaryAccumulator().add(
+            types, flowrate, pressure, temperature, extra=self.extra
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+
+def validate_columns(names, types, flowrate, pressure, temperature, bad_timestamps=None):
+    """
+    Check required values without a per-row Python loop; `bad_timestamps`
+    optionally flags timestamps that could not be read.
+
+    Returns (first MAX_REPORTED_ERRORS messages in row order, total error count).
+    Row numbers count the header as row 1.
+    """
+    blank_name = _blank(names)
+    blank_type = _blank(types)
+    bad_number = ~(np.isfinite(flowrate) & np.isfinite(pressure) & np.isfinite(temperature))
+    problems = [
+        (blank_name, 'Equipment Name is required'),
+        (blank_type, 'Type is required'),
+        (bad_number, 'Flowrate, Pressure, and Temperature must be numeric'),
+    ]
+    if bad_timestamps is not None:
+        problems.append((bad_timestamps, 'Timestamp must be an ISO 8601 date and time'))
+    error_count = int(sum(mask.sum() for mask, _ in problems))
+    if not error_count:
+        return [], 0
+
+    errors = []
+    for index in np.flatnonzero(np.logical_or.reduce([mask for mask, _ in problems])):
+        for mask, message in problems:
+            if mask[index]:
+                errors.append(f'Row {index + 2}: {message}')
+        if len(errors) >= MAX_REPORTED_ERRORS:
+            break
+    return errors[:MAX_REPORTED_ERRORS], error_count
+
+
+def _blank(values):
+    # Text columns are already stripped; missing cells are NaN or ''
+    return pd.isna(values) | (values == '')
+
+
+def _to_float(values):
+    """Coerce a column to float64; unparseable values become NaN and fail validation"""
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+
+def field_key(column):
+    """Field name of an extra column: its header lowercased, other characters runs replaced by '_'"""
+    return re.sub(r'[^0-9a-z]+', '_', str(column).strip().lower()).strip('_')
+
+
+def timestamp_column(header):
+    """The header column holding reading timestamps (see TIMESTAMP_KEYS), or None"""
+    columns = {}
+    for column in header:
+        columns.setdefault(field_key(column), column)
+    return next((columns[key] for key in TIMESTAMP_KEYS if key in columns), None)
+
+
+def _to_timestamps(values):
+    """
+    (datetime64[us] UTC array with NaT for blanks, mask of values that are not
+    ISO 8601 dates). Only ISO 8601 is accepted, since guessing could read
+    05/01 as May 1st or January 5th; times without an offset are taken as UTC.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[us]'), np.zeros(len(values), dtype=bool)
+    text = pd.Series(_strip(values), dtype=object)
+    blank = _blank(text.to_numpy())
+    timestamps = pd.to_datetime(text, errors='coerce', utc=True, format='ISO8601')
+    timestamps = timestamps.dt.tz_localize(None).to_numpy().astype('datetime64[us]')
+    return timestamps, np.isnat(timestamps) & ~blank
+
+
+def extra_columns(header):
+    """
+    {field key: column} for the header columns beyond REQUIRED_COLUMNS that
+    can become extra fields (unique, non-reserved keys; at most EXTRA_COLUMNS_MAX).
+    """
+    selected = {}
+    for column in header:
+        key = field_key(column)
+        if column in REQUIRED_COLUMNS or not key or key in RESERVED_KEYS or key in selected:
+            continue
+        if len(selected) == EXTRA_COLUMNS_MAX:
+            break
+        selected[key] = column
+    return selected
+
+
+def _numeric_or_none(values):
+    """float64 copy of an extra column (blanks and non-finite values as NaN), or None when it is not numeric"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        numbers = values.astype(np.float64)
+    elif values.dtype.kind == 'O':
+        text = _strip(values)
+        numbers = _to_float(text)
+        if (np.isnan(numbers) & ~_blank(text)).any():
+            return None
+    else:
+        return None
+    numbers = np.where(np.isfinite(numbers), numbers, np.nan)
+    return None if np.isnan(numbers).all() else numbers
+
+
+def _strip(values):
+    return pd.Series(values, dtype=object).str.strip().to_numpy(dtype=object)
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def _read_header(source):
+    """Return the header row, raising EmptyCSVError or MissingColumnsError"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf-8-sig', newline='') as f:
+            header = next(csv.reader(f), None)
+    else:
+        _rewind(source)
+        text = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+        try:
+            header = next(csv.reader(text), None)
+        finally:
+            text.detach()
+        _rewind(source)
+    if not header:
+        raise EmptyCSVError('No columns to parse from file')
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise MissingColumnsError(missing, header)
+    return header
+
+
+# Separators recognised when reporting a header that is not comma-separated
+OTHER_DELIMITERS = {';': 'semicolons', '\t': 'tabs', '|': 'pipes'}
+
+
+def sniff_header(prefix, final=False):
+    """
+    Check the header row at the start of a CSV file from its first bytes.
+
+    Returns the header once `prefix` holds its complete first line, or None
+    while more bytes are needed (with `final`, `prefix` is the whole file).
+    Raises EmptyCSVError, MissingColumnsError, or CSVFormatError for a header
+    that is not UTF-8 or not comma-separated, so uploads can be rejected
+    before the rest of the file arrives.
+    """
+    end = prefix.find(b'\n')
+    if end < 0 and not final:
+        return None
+    line = prefix if end < 0 else prefix[:end]
+    try:
+        text = line.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise CSVFormatError('The file is not UTF-8 encoded. Please save it as UTF-8 CSV.')
+    header = next(csv.reader([text.rstrip('\r')]), None)
+    if not header:
+        raise EmptyCSVError('No columns to parse from file')
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        for delimiter, label in OTHER_DELIMITERS.items():
+            fields = next(csv.reader([text.rstrip('\r')], delimiter=delimiter))
+            if all(column in fields for column in REQUIRED_COLUMNS):
+                raise CSVFormatError(f'Columns are separated by {label}; expected commas.')
+        raise MissingColumnsError(missing, header)
+    return header
+
+
+class CSVParser(ABC):
+    """Base class for parsing engines; `source` is a path or a binary file object"""
+    name = None
+
+    @abstractmethod
+    def parse(self, source):
+        """Return a ParseResult for the file"""
+
+
+class PythonCSVParser(CSVParser):
+    """Stream rows through the stdlib csv module"""
+    name = 'python'
+
+    def parse(self, source):
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'r', encoding='utf-8-sig', newline='') as f:
+                return self._parse_text(f)
+        _rewind(source)
+        text = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+        try:
+            return self._parse_text(text)
+        finally:
+            text.detach()
+
+    def _parse_text(self, f):
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise EmptyCSVError('No columns to parse from file')
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise MissingColumnsError(missing, header)
+        positions = [header.index(column) for column in REQUIRED_COLUMNS]
+        extras = {key: header.index(column) for key, column in extra_columns(header).items()}
+        timestamp = timestamp_column(header)
+        timestamp = None if timestamp is None else header.index(timestamp)
+        width = max(positions + list(extras.values()) + [timestamp or 0]) + 1
+
+        names, types, flowrate, pressure, temperature, timestamps = [], [], [], [], [], []
+        extra = {key: [] for key in extras}
+        for row in reader:
+            if not row:
+                continue  # csv.reader yields [] for blank lines; pandas skips them too
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            names.append(row[positions[0]])
+            types.append(row[positions[1]])
+            flowrate.append(row[positions[2]])
+            pressure.append(row[positions[3]])
+            temperature.append(row[positions[4]])
+            for key, position in extras.items():
+                extra[key].append(row[position])
+            if timestamp is not None:
+                timestamps.append(row[timestamp])
+
+        return ParseResult(
+            _strip(names), _strip(types),
+            _to_float(flowrate), _to_float(pressure), _to_float(temperature),
+            header, self.name, {key: np.array(values, dtype=object) for key, values in extra.items()},
+            None if timestamp is None else np.array(timestamps, dtype=object)
+        )
+
+
+class PandasCSVParser(CSVParser):
+    """pandas C parser restricted to the required and extra columns, required ones with explicit dtypes"""
+    name = 'pandas'
+
+    def parse(self, source):
+        header = _read_header(source)
+        extras = extra_columns(header)
+        timestamp = timestamp_column(header)
+        text_columns = TEXT_COLUMNS + ([timestamp] if timestamp else [])
+        usecols = REQUIRED_COLUMNS + list(extras.values()) + text_columns[len(TEXT_COLUMNS):]
+        dtypes = {column: 'float64' for column in NUMERIC_COLUMNS}
+        dtypes.update({column: object for column in text_columns})
+        blanks = {column: [''] for column in NUMERIC_COLUMNS + list(extras.values())}
+        _rewind(source)
+        try:
+            frame = pd.read_csv(source, usecols=usecols, dtype=dtypes,
+                                keep_default_na=False, na_values=blanks,
+                                encoding='utf-8-sig', engine='c')
+        except ValueError as e:
+            if isinstance(e, pd.errors.ParserError):
+                raise CSVFormatError(f'Error parsing CSV file: {e}')
+            # A non-numeric value in a numeric column: reread those columns as text
+            # so validation can point at the offending rows
+            _rewind(source)
+            frame = pd.read_csv(source, usecols=usecols, dtype=object,
+                                keep_default_na=False, encoding='utf-8-sig', engine='c')
+
+        return ParseResult(
+            _strip(frame['Equipment Name'].to_numpy(dtype=object)),
+            _strip(frame['Type'].to_numpy(dtype=object)),
+            *(_to_float(frame[column]) if frame[column].dtype == object
+              else frame[column].to_numpy(dtype=np.float64) for column in NUMERIC_COLUMNS),
+            header, self.name, {key: frame[column].to_numpy() for key, column in extras.items()},
+            None if timestamp is None else frame[timestamp].to_numpy(dtype=object)
+        )
+
+
+class ArrowCSVParser(CSVParser):
+    """pyarrow's multithreaded CSV reader"""
+    name = 'pyarrow'
+
+    def __init__(self, memory_pool=None):
+        self.memory_pool = memory_pool
+
+    def parse(self, source):
+        if pyarrow is None:
+            raise CSVFormatError('The pyarrow engine requires the pyarrow package')
+        header = _read_header(source)
+        extras = extra_columns(header)
+        timestamp = timestamp_column(header)
+        text_columns = TEXT_COLUMNS + ([timestamp] if timestamp else [])
+        included = REQUIRED_COLUMNS + list(extras.values()) + text_columns[len(TEXT_COLUMNS):]
+        column_types = {column: pyarrow.float64() for column in NUMERIC_COLUMNS}
+        column_types.update({column: pyarrow.string() for column in text_columns})
+        try:
+            table = self._read(source, included, column_types)
+        except pyarrow.ArrowInvalid as e:
+            if 'conversion error' not in str(e).lower():
+                raise CSVFormatError(f'Error parsing CSV file: {e}')
+            # A non-numeric value in a numeric column: reread everything as text
+            # so validation can point at the offending rows
+            table = self._read(source, included, {column: pyarrow.string() for column in included})
+
+        columns = {column: table.column(column).to_numpy(zero_copy_only=False) for column in included}
+        return ParseResult(
+            _strip(columns['Equipment Name']), _strip(columns['Type']),
+            *(_to_float(columns[column]) if columns[column].dtype == object
+              else columns[column].astype(np.float64) for column in NUMERIC_COLUMNS),
+            header, self.name, {key: columns[column] for key, column in extras.items()},
+            None if timestamp is None else columns[timestamp]
+        )
+
+    def _read(self, source, included, column_types):
+        _rewind(source)
+        if not isinstance(source, (str, os.PathLike)):
+            source = pyarrow.PythonFile(source, mode='r')
+        return pyarrow_csv.read_csv(
+            source,
+            read_options=pyarrow_csv.ReadOptions(use_threads=True),
+            convert_options=pyarrow_csv.ConvertOptions(
+                include_columns=included,
+                column_types=column_types,
+                strings_can_be_null=False,
+            ),
+            memory_pool=self.memory_pool,
+        )
+
+
+ENGINES = {
+    PythonCSVParser.name: PythonCSVParser,
+    PandasCSVParser.name: PandasCSVParser,
+    ArrowCSVParser.name: ArrowCSVParser,
+}
+
+
+def available_engines():
+    return [name for name in ENGINES if name != 'pyarrow' or pyarrow is not None]
+
+
+def select_engine(size):
+    """Choose an engine for a file of `size` bytes (None when unknown)"""
+    if size is not None and size < SMALL_FILE_BYTES:
+        return 'python'
+    if size is not None and size >= LARGE_FILE_BYTES and pyarrow is not None:
+        return 'pyarrow'
+    return 'pandas'
+
+
+def get_parser(engine='auto', size=None):
+    if engine == 'auto':
+        engine = select_engine(size)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown CSV engine '{engine}'. Use auto or one of {', '.join(ENGINES)}.")
+    return ENGINES[engine]()
+
+
+def detect_format(filename):
+    """Return 'csv', 'gzip', 'zstd' or 'parquet' for a file name, or None"""
+    lowered = str(filename).lower()
+    for suffix, file_format in FORMATS:
+        if lowered.endswith(suffix):
+            return file_format
+    return None
+
+
+def dataset_filename(filename):
+    """
+    Name to store for an uploaded file: compression is a transport detail,
+    so 'plant.csv.gz' and 'plant.csv' both name the dataset 'plant.csv'.
+    """
+    name = os.path.basename(str(filename))
+    if detect_format(name) in ('gzip', 'zstd'):
+        return name.rsplit('.', 1)[0]
+    return name
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    Read-only stream decompressing `raw` on the fly.
+
+    Seeking back to the start restarts decompression, which is all the
+    engines need (they rewind after peeking at the header). Corrupt input
+    surfaces as CSVFormatError.
+    """
+
+    def __init__(self, raw, file_format):
+        self.raw = raw
+        self.file_format = file_format
+        self._open()
+
+    def _open(self):
+        self.raw.seek(0)
+        self.position = 0
+        if self.file_format == 'gzip':
+            self.stream = gzip.GzipFile(fileobj=self.raw, mode='rb')
+        else:
+            self.stream = zstandard.ZstdDecompressor().stream_reader(self.raw, closefd=False)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if (offset, whence) != (0, io.SEEK_SET):
+            raise io.UnsupportedOperation('Compressed uploads can only be rewound to the start')
+        self._open()
+        return 0
+
+    def tell(self):
+        return self.position
+
+    def readinto(self, buffer):
+        try:
+            data = self.stream.read(len(buffer))
+        except (OSError, EOFError) as e:
+            raise CSVFormatError(f'The file could not be decompressed: {e}')
+        except Exception as e:
+            if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                raise CSVFormatError(f'The file could not be decompressed: {e}')
+            raise
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+def parse_parquet(source):
+    """Read the required and extra columns of a Parquet file straight into arrays"""
+    if pyarrow is None:
+        raise CSVFormatError('Reading Parquet files requires the pyarrow package')
+    import pyarrow.parquet as pyarrow_parquet
+
+    _rewind(source)
+    try:
+        parquet_file = pyarrow_parquet.ParquetFile(source)
+    except pyarrow.ArrowInvalid as e:
+        raise CSVFormatError(f'Error reading Parquet file: {e}')
+    header = parquet_file.schema_arrow.names
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise MissingColumnsError(missing, header)
+    extras = extra_columns(header)
+    timestamp = timestamp_column(header)
+    table = parquet_file.read(
+        columns=REQUIRED_COLUMNS + list(extras.values()) + ([timestamp] if timestamp else []), use_threads=True
+    )
+
+    def text(column):
+        values = table.column(column).cast(pyarrow.string()).to_numpy(zero_copy_only=False)
+        return _strip(values)
+
+    def number(column):
+        values = table.column(column)
+        if pyarrow.types.is_integer(values.type) or pyarrow.types.is_floating(values.type):
+            return values.cast(pyarrow.float64()).to_numpy(zero_copy_only=False)
+        return _to_float(values.cast(pyarrow.string()).to_numpy(zero_copy_only=False))
+
+    def extra(column):
+        values = table.column(column)
+        if pyarrow.types.is_integer(values.type) or pyarrow.types.is_floating(values.type):
+            return values.cast(pyarrow.float64()).to_numpy(zero_copy_only=False)
+        return values.to_numpy(zero_copy_only=False)
+
+    return ParseResult(
+        text('Equipment Name'), text('Type'), *(number(column) for column in NUMERIC_COLUMNS),
+        header, 'parquet', {key: extra(column) for key, column in extras.items()},
+        None if timestamp is None else table.column(timestamp).to_numpy(zero_copy_only=False)
+    )
+
+
+def parse_equipment_file(source, filename, engine='auto', size=None):
+    """
+    Parse an equipment file in any supported format.
+
+    `source` is a path or a binary file object and `filename` decides the
+    format (see FORMATS). Compressed CSV is decompressed as a stream while the
+    engine reads it.
+    """
+    file_format = detect_format(filename)
+    if file_format is None:
+        raise CSVFormatError(f'Unsupported file type: {filename}')
+    if size is None and isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+    if file_format == 'csv':
+        return parse_equipment_csv(source, engine, size)
+    if file_format == 'zstd' and zstandard is None:
+        raise CSVFormatError('Reading .csv.zst files requires the zstandard package')
+
+    opened = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else None
+    try:
+        if file_format == 'parquet':
+            return parse_parquet(opened or source)
+        stream = io.BufferedReader(DecompressingReader(opened or source, file_format), 1 << 20)
+        estimated = size * COMPRESSION_RATIO_ESTIMATE if size is not None else None
+        return get_parser(engine, estimated).parse(stream)
+    finally:
+        if opened is not None:
+            opened.close()
+
+
+def parse_equipment_csv(source, engine='auto', size=None):
+    """
+    Parse an equipment CSV from a path or binary file object.
+
+    `size` (bytes) drives automatic engine selection; it is read from the file
+    system when `source` is a path.
+    """
+    if size is None and isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+    return get_parser(engine, size).parse(source)
@@ -0,0 +1,114 @@
+"""
+On-demand request profiling for staff users.
+
+A staff user can profile a single request by adding `?_profile=cpu` (or
+`memory` to also trace allocations with tracemalloc) to the URL, or by sending
+the `X-Profile` header with the same values. By default the sorted cProfile
+statistics are returned in place of the response body. With
+`_profile_output=save` (or `X-Profile-Output: save`) the normal response is
+returned and the statistics are written to PROFILE_DIR as `<request id>.prof`
+and `<request id>.txt`; the request id is echoed in `X-Profile-Id`.
+
+Requests that do not ask for profiling only pay for the trigger lookup.
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import tracemalloc
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+
+PROFILE_MODES = ('1', 'cpu', 'memory')
+SORT_KEYS = ('cumulative', 'tottime', 'calls', 'ncalls')
+# Client-supplied request ids become file names, so only accept safe ones
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def _is_staff(request):
+    """Resolve the user from the session or the API token and check is_staff"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b'token':
+        return False
+    try:
+        user, _ = TokenAuthentication().authenticate_credentials(auth[1].decode())
+    except (AuthenticationFailed, UnicodeError):
+        return False
+    return user.is_staff
+
+
+class ProfilingMiddleware:
+    """Run the view under cProfile (and optionally tracemalloc) when requested"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.GET.get('_profile') or request.headers.get('X-Profile')
+        if not mode or mode not in PROFILE_MODES or not _is_staff(request):
+            return self.get_response(request)
+        return self.profile(request, mode)
+
+    def profile(self, request, mode):
+        output = request.GET.get('_profile_output') or request.headers.get('X-Profile-Output', 'inline')
+        sort_key = request.GET.get('_profile_sort', 'cumulative')
+        if sort_key not in SORT_KEYS:
+            sort_key = 'cumulative'
+        try:
+            limit = int(request.GET.get('_profile_limit', 50))
+        except ValueError:
+            limit = 50
+        request_id = request.headers.get('X-Request-ID', '')
+        if not REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        trace_memory = mode == 'memory' and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        try:
+            response = profiler.runcall(self.get_response, request)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                profiler.runcall(response.render)
+            memory = self.memory_report(limit) if trace_memory else ''
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+
+        stream = io.StringIO()
+        stream.write(f'Profile {request_id}: {request.method} {request.get_full_path()} '
+                     f'-> {response.status_code}\n\n')
+        pstats.Stats(profiler, stream=stream).sort_stats(sort_key).print_stats(limit)
+        report = stream.getvalue() + memory
+
+        if output == 'save':
+            profile_dir = Path(settings.PROFILE_DIR)
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(profile_dir / f'{request_id}.prof'))
+            (profile_dir / f'{request_id}.txt').write_text(report, encoding='utf-8')
+        else:
+            response = HttpResponse(report, content_type='text/plain; charset=utf-8')
+        response['X-Profile-Id'] = request_id
+        return response
+
+    @staticmethod
+    def memory_report(limit):
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        lines = [
+            '\nMemory (tracemalloc)',
+            f'current: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB',
+            f'Top {limit} allocation sites:',
+        ]
+        lines += [str(stat) for stat in snapshot.statistics('lineno')[:limit]]
+        return '\n'.join(lines) + '\n'
@@ -1,18 +1,93 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.db import transaction
 from rest_framework.authtoken.models import Token
-from .models import EquipmentDataset, EquipmentItem
+from .models import EquipmentDataset, EquipmentItem, EquipmentType, OperatingLimit
 
 
-class EquipmentItemSerializer(serializers.ModelSerializer):
+class EquipmentTypeField(serializers.SlugRelatedField):
+    """
+    Reads and writes equipment types by name. A name not seen before becomes
+    an unsaved EquipmentType, interned by InternedTypeMixin when the instance
+    is saved, so requests that fail validation create no types.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(slug_field='name', queryset=EquipmentType.objects.all(), **kwargs)
+        self.validators.extend(EquipmentType._meta.get_field('name').validators)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data.strip():
+            self.fail('invalid')
+        name = data.strip()
+        return EquipmentType.objects.filter(name=name).first() or EquipmentType(name=name)
+
+    def run_validators(self, value):
+        super().run_validators(value.name)
+
+
+class InternedTypeMixin:
+    """Saves the new EquipmentType of a validated `type` in the transaction that saves the instance"""
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return super().create(self._intern_type(validated_data))
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return super().update(instance, self._intern_type(validated_data))
+
+    @staticmethod
+    def _intern_type(validated_data):
+        equipment_type = validated_data.get('type')
+        if equipment_type is not None and equipment_type.pk is None:
+            # intern() tolerates a concurrent request creating the same name first
+            equipment_type.pk = EquipmentType.intern([equipment_type.name])[equipment_type.name]
+        return validated_data
+
+
+class EquipmentItemSerializer(InternedTypeMixin, serializers.ModelSerializer):
     """Serializer for EquipmentItem model"""
+    type = EquipmentTypeField()
+
     class Meta:
         model = EquipmentItem
-        fields = ['id', 'dataset', 'equipment_name', 'type', 'flowrate', 'pressure', 'temperature', 'created_at']
+        fields = [
+            'id', 'dataset', 'equipment_name', 'type', 'flowrate', 'pressure', 'temperature', 'ts', 'created_at'
+        ]
         read_only_fields = ['id', 'created_at']
 
 
+class OperatingLimitSerializer(InternedTypeMixin, serializers.ModelSerializer):
+    """Serializer for OperatingLimit model"""
+    type = EquipmentTypeField()
+
+    class Meta:
+        model = OperatingLimit
+        fields = ['id', 'type', 'field', 'minimum', 'maximum']
+        read_only_fields = ['id']
+        # UniqueTogetherValidator cannot filter on a type that is not saved yet; see validate()
+        validators = []
+
+    def validate(self, attrs):
+        equipment_type = attrs.get('type', getattr(self.instance, 'type', None))
+        field = attrs.get('field', getattr(self.instance, 'field', None))
+        if equipment_type is not None and equipment_type.pk is not None:
+            existing = OperatingLimit.objects.filter(type=equipment_type, field=field)
+            if self.instance is not None:
+                existing = existing.exclude(pk=self.instance.pk)
+            if existing.exists():
+                raise serializers.ValidationError("The fields type, field must make a unique set.")
+        minimum = attrs.get('minimum', getattr(self.instance, 'minimum', None))
+        maximum = attrs.get('maximum', getattr(self.instance, 'maximum', None))
+        if minimum is None and maximum is None:
+            raise serializers.ValidationError("Set a minimum, a maximum or both.")
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise serializers.ValidationError({"maximum": "Maximum must not be below the minimum."})
+        return attrs
+
+
 class EquipmentDatasetSerializer(serializers.ModelSerializer):
     """Serializer for EquipmentDataset model"""
     equipment_items = EquipmentItemSerializer(many=True, read_only=True)
@@ -31,12 +31,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'equipment_api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'equipment_api.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -99,6 +101,41 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Request profiles saved by ProfilingMiddleware (?_profile=cpu&_profile_output=save)
+PROFILE_DIR = BASE_DIR / 'profiles'
+
+# CSV parsing engine for uploads: 'auto' (chosen by file size), 'python', 'pandas' or 'pyarrow'
+CSV_PARSER_ENGINE = 'auto'
+
+# Largest accepted upload (request body) in bytes; larger uploads are refused with 413
+# before they are read, and the header row of every upload is checked as it arrives
+UPLOAD_MAX_BYTES = 1024 * 1024 * 1024
+
+# Upload admission control (per server process): at most this many uploads/appends
+# ingest at once, with at most this many request bytes between them. Others wait up
+# to UPLOAD_QUEUE_TIMEOUT seconds, then get 429 with Retry-After: UPLOAD_RETRY_AFTER.
+UPLOAD_MAX_CONCURRENT_INGESTS = 2
+UPLOAD_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+UPLOAD_QUEUE_TIMEOUT = 10
+UPLOAD_RETRY_AFTER = 5
+
+# Storage of new datasets: 'rows' (item table only) or 'column_cache' (item table plus
+# a copy of the readings as memory-mapped column files under MEDIA_ROOT/columnar,
+# for whole-dataset reads; it takes more space, not less)
+DATASET_STORAGE = 'rows'
+
+# Save column files as one compressed .npz (about 3x smaller, but decompressed into
+# memory on every read) instead of memory-mappable .npy files
+COLUMN_STORE_COMPRESSION = False
+
+# Compute the per-type correlation matrices (/api/datasets/<id>/correlation/) while
+# ingesting uploads instead of on first request
+DATASET_PRECOMPUTE_CORRELATION = False
+
+# Outlier methods ('zscore', 'mad', 'iqr') run while ingesting uploads; their
+# results are cached for /api/datasets/<id>/outliers/ and counted in the response
+DATASET_OUTLIER_METHODS = ()
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,245 @@
+"""
+Mergeable dataset summary statistics.
+
+SummaryAccumulator keeps count, sums, minima and maxima overall and per
+equipment type. Chunks of a dataset can be added independently (or
+accumulated separately and merged), and `to_summary` produces the
+`summary_json` format written by the upload endpoint.
+
+Besides NUMERIC_FIELDS it can carry any extra numeric columns of a dataset
+(see `add_columns`). Extra columns may have gaps (NaN), so every field also
+has a count of the values present; averages divide by it.
+
+`to_state`/`from_state` round-trip the unrounded totals through JSON
+(EquipmentDataset.summary_state), so appending rows to a dataset merges their
+summary in O(new rows) instead of rescanning the stored items. Value counts
+are only stored where they differ from the row count.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+
+NUMERIC_FIELDS = ('flowrate', 'pressure', 'temperature')
+
+TOTALS = ('counts', 'sums', 'minimums', 'maximums')
+
+
+class SummaryAccumulator:
+    """Running count/sum/min/max and type distribution for equipment readings"""
+
+    def __init__(self, fields=NUMERIC_FIELDS):
+        self.fields = []
+        self.count = 0
+        self.counts = {}
+        self.sums = {}
+        self.minimums = {}
+        self.maximums = {}
+        self.type_counts = Counter()
+        # type -> {'counts': {field: values present}, 'sums': {field: total}, 'minimums': {...}, 'maximums': {...}}
+        self.type_stats = {}
+        for field in fields:
+            self._add_field(field)
+
+    def add(self, types, flowrate, pressure, temperature, extra=None):
+        """Add a chunk of readings given as equal-length arrays; `extra` maps more fields to arrays"""
+        return self.add_columns(types, {
+            'flowrate': flowrate, 'pressure': pressure, 'temperature': temperature, **(extra or {})
+        })
+
+    def add_columns(self, types, columns, rows=True):
+        """
+        Add a chunk of readings given as {field: array}, aligned with `types`;
+        NaN values are skipped.
+
+        With `rows=False` only the totals of these fields are added, for
+        columns of rows this accumulator has already counted.
+        """
+        columns = {field: np.asarray(values, dtype=np.float64) for field, values in columns.items()}
+        size = len(types)
+        if size == 0:
+            return self
+        for field in columns:
+            self._add_field(field)
+        labels, inverse, counts = np.unique(
+            np.asarray(types, dtype=object).astype(str), return_inverse=True, return_counts=True
+        )
+        if rows:
+            self.count += size
+            self.type_counts.update(dict(zip(labels.tolist(), counts.tolist())))
+
+        # Per-type totals: sort rows by type once, then reduce each run
+        order = np.argsort(inverse, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        per_type = {}
+        for field, values in columns.items():
+            missing = np.isnan(values)
+            if missing.any():
+                present = np.add.reduceat((~missing)[order].astype(np.int64), starts)
+                summable = np.where(missing, 0.0, values)
+            else:
+                present, summable = counts, values
+            # fmin/fmax ignore NaN; a type without values reduces to NaN
+            grouped = values[order]
+            per_type[field] = (
+                present.tolist(),
+                np.add.reduceat(summable[order], starts).tolist(),
+                [_number(value) for value in np.fmin.reduceat(grouped, starts).tolist()],
+                [_number(value) for value in np.fmax.reduceat(grouped, starts).tolist()],
+            )
+            self.counts[field] += size - int(missing.sum())
+            self.sums[field] += float(summable.sum())
+            _widen(
+                self.minimums, self.maximums, field,
+                _number(np.fmin.reduce(values)), _number(np.fmax.reduce(values))
+            )
+        for index, label in enumerate(labels.tolist()):
+            self._merge_type(label, {
+                key: {field: per_type[field][position][index] for field in columns}
+                for position, key in enumerate(TOTALS)
+            })
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator into this one"""
+        self.count += other.count
+        for field in other.fields:
+            self._add_field(field)
+            self.counts[field] += other.counts[field]
+            self.sums[field] += other.sums[field]
+            _widen(self.minimums, self.maximums, field, other.minimums[field], other.maximums[field])
+        self.type_counts.update(other.type_counts)
+        for label, stats in other.type_stats.items():
+            self._merge_type(label, stats)
+        return self
+
+    def _add_field(self, field):
+        if field in self.counts:
+            return
+        self.fields.append(field)
+        self.counts[field] = 0
+        self.sums[field] = 0.0
+        self.minimums[field] = self.maximums[field] = None
+        for stats in self.type_stats.values():
+            self._add_type_field(stats, field)
+
+    @staticmethod
+    def _add_type_field(stats, field):
+        stats['counts'][field] = 0
+        stats['sums'][field] = 0.0
+        stats['minimums'][field] = stats['maximums'][field] = None
+
+    def _merge_type(self, label, stats):
+        current = self.type_stats.get(label)
+        if current is None:
+            current = self.type_stats[label] = {key: {} for key in TOTALS}
+            for field in self.fields:
+                self._add_type_field(current, field)
+        for field in stats['sums']:
+            current['counts'][field] += stats['counts'][field]
+            current['sums'][field] += stats['sums'][field]
+            _widen(current['minimums'], current['maximums'], field, stats['minimums'][field], stats['maximums'][field])
+
+    @property
+    def extra_fields(self):
+        """Fields carried besides NUMERIC_FIELDS, in the order they were added"""
+        return [field for field in self.fields if field not in NUMERIC_FIELDS]
+
+    def average(self, field):
+        return self.sums[field] / self.counts[field] if self.counts[field] else 0
+
+    def type_averages(self):
+        """{type: {field: mean}} for every type, sorted by type; None where a type has no values"""
+        return {
+            label: {
+                field: stats['sums'][field] / stats['counts'][field] if stats['counts'][field] else None
+                for field in self.fields
+            }
+            for label, stats in sorted(self.type_stats.items())
+        }
+
+    def to_state(self):
+        """JSON-serializable unrounded totals, restored by `from_state`"""
+        state = {
+            'count': self.count,
+            'sums': dict(self.sums),
+            'minimums': dict(self.minimums),
+            'maximums': dict(self.maximums),
+            'types': {},
+        }
+        gaps = _gaps(self.counts, self.count)
+        if gaps:
+            state['counts'] = gaps
+        for label, stats in sorted(self.type_stats.items()):
+            entry = state['types'][label] = {'count': self.type_counts[label]}
+            entry.update({key: dict(stats[key]) for key in TOTALS[1:]})
+            gaps = _gaps(stats['counts'], self.type_counts[label])
+            if gaps:
+                entry['counts'] = gaps
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        accumulator = cls(fields=state['sums'])
+        accumulator.count = state['count']
+        accumulator.counts.update({field: state['count'] for field in accumulator.fields})
+        accumulator.counts.update(state.get('counts', {}))
+        accumulator.sums.update(state['sums'])
+        accumulator.minimums.update(state['minimums'])
+        accumulator.maximums.update(state['maximums'])
+        for label, stats in state['types'].items():
+            accumulator.type_counts[label] = stats['count']
+            counts = {field: stats['count'] for field in stats['sums']}
+            counts.update(stats.get('counts', {}))
+            accumulator._merge_type(label, {'counts': counts, **{key: stats[key] for key in TOTALS[1:]}})
+        return accumulator
+
+    def to_summary(self):
+        """Summary in the format stored in EquipmentDataset.summary_json"""
+        summary = {
+            'total_equipment_count': self.count,
+            'average_flowrate': round(self.average('flowrate'), 2),
+            'average_pressure': round(self.average('pressure'), 2),
+            'average_temperature': round(self.average('temperature'), 2),
+            'equipment_type_distribution': dict(sorted(self.type_counts.items())),
+            'max_flowrate': round(self.maximums['flowrate'] or 0, 2),
+            'min_flowrate': round(self.minimums['flowrate'] or 0, 2),
+            'max_pressure': round(self.maximums['pressure'] or 0, 2),
+            'min_pressure': round(self.minimums['pressure'] or 0, 2),
+            'max_temperature': round(self.maximums['temperature'] or 0, 2),
+            'min_temperature': round(self.minimums['temperature'] or 0, 2),
+        }
+        if self.extra_fields:
+            summary['extra_fields'] = {
+                field: {
+                    'count': self.counts[field],
+                    'average': round(self.average(field), 2) if self.counts[field] else None,
+                    'min': _rounded(self.minimums[field]),
+                    'max': _rounded(self.maximums[field]),
+                }
+                for field in self.extra_fields
+            }
+        return summary
+
+
+def _widen(minimums, maximums, field, minimum, maximum):
+    """Extend the range of `field` by [minimum, maximum]; None means no values"""
+    if minimum is not None:
+        minimums[field] = minimum if minimums[field] is None else min(minimums[field], minimum)
+    if maximum is not None:
+        maximums[field] = maximum if maximums[field] is None else max(maximums[field], maximum)
+
+
+def _number(value):
+    """float of a reduced value, None for NaN (no values)"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _rounded(value):
+    return None if value is None else round(value, 2)
+
+
+def _gaps(counts, rows):
+    return {field: count for field, count in counts.items() if count != rows}
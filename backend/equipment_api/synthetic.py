@@ -0,0 +1,260 @@
+"""
+Synthetic equipment data for benchmarks, load tests and generate_equipment.
+
+The catalog mirrors the equipment types in sample_data/sample_equipment_data.csv,
+with typical operating values per type. Type frequencies follow a Zipf-like
+distribution so a few types dominate, as in real plant exports.
+
+Generation is vectorized with NumPy; `write_csv_parallel` splits large row
+counts into chunks generated and written by a process pool.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# (type, name prefix, tag prefix, mean flowrate, mean pressure, mean temperature)
+EQUIPMENT_CATALOG = [
+    ('Centrifugal Pump', 'Pump', 'P', 550.0, 12.5, 45.0),
+    ('Shell and Tube Heat Exchanger', 'Heat Exchanger', 'HE', 280.75, 5.8, 95.0),
+    ('Continuous Stirred Tank Reactor', 'Reactor', 'R', 450.5, 8.2, 125.0),
+    ('Distillation Column', 'Distillation Column', 'DC', 320.0, 2.5, 85.5),
+    ('Centrifugal Compressor', 'Compressor', 'C', 180.25, 25.0, 120.0),
+    ('Static Mixer', 'Mixer', 'M', 425.5, 6.8, 55.0),
+    ('Gravity Separator', 'Separator', 'S', 310.0, 2.0, 40.0),
+    ('Air Cooler', 'Cooler', 'CO', 290.0, 3.5, 25.0),
+    ('Shell and Tube Heater', 'Heater', 'HT', 340.25, 7.2, 200.0),
+    ('Packed Column Absorber', 'Absorber', 'AB', 220.0, 3.2, 65.0),
+    ('Forced Circulation Evaporator', 'Evaporator', 'EV', 380.5, 1.8, 110.0),
+    ('Plate and Frame Filter', 'Filter', 'F', 150.25, 4.5, 50.0),
+    ('Spray Dryer', 'Dryer', 'DR', 275.0, 1.0, 180.0),
+    ('Venturi Scrubber', 'Scrubber', 'SC', 165.75, 1.5, 35.0),
+    ('Packed Tower', 'Tower', 'T', 360.0, 4.2, 70.0),
+    ('Liquid-Liquid Extractor', 'Extractor', 'EX', 185.0, 2.8, 60.0),
+    ('Forced Circulation Crystallizer', 'Crystallizer', 'CR', 195.0, 1.2, 75.5),
+    ('Activated Carbon Adsorber', 'Adsorber', 'AD', 135.5, 1.2, 30.0),
+    ('Reverse Osmosis Membrane', 'Membrane Module', 'MM', 245.0, 15.0, 25.0),
+    ('Process Furnace', 'Furnace', 'FU', 195.75, 0.8, 450.0),
+]
+
+CSV_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+
+DISTRIBUTIONS = ('normal', 'lognormal', 'uniform')
+
+# Kinds of invalid rows injected by `dirty_fraction`
+DIRTY_KINDS = ('blank_name', 'blank_type', 'non_numeric')
+
+
+def parse_row_count(text):
+    """Parse '5000', '100k', '2.5m' into an integer row count"""
+    text = str(text).strip().lower().replace('_', '')
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    number = text[:-1] if multiplier > 1 else text
+    try:
+        rows = int(float(number) * multiplier)
+    except ValueError:
+        raise ValueError(f"Invalid row count '{text}'")
+    if rows < 1:
+        raise ValueError('Row count must be positive')
+    return rows
+
+
+def build_catalog(type_count=None):
+    """
+    Return `type_count` catalog entries.
+
+    Counts above the 20 base types add numbered series of the base types
+    (e.g. "Centrifugal Pump Series 2") with shifted operating values.
+    """
+    if not type_count or type_count <= len(EQUIPMENT_CATALOG):
+        return EQUIPMENT_CATALOG[:type_count] if type_count else list(EQUIPMENT_CATALOG)
+    catalog = list(EQUIPMENT_CATALOG)
+    series = 2
+    while len(catalog) < type_count:
+        for eq_type, name, tag, flowrate, pressure, temperature in EQUIPMENT_CATALOG:
+            if len(catalog) == type_count:
+                break
+            shift = 1 + 0.05 * (series - 1)
+            catalog.append((
+                f'{eq_type} Series {series}', name, f'{tag}{series}',
+                flowrate * shift, pressure * shift, temperature * shift
+            ))
+        series += 1
+    return catalog
+
+
+def type_weights(count, skew=1.1):
+    """Zipf-like probabilities for `count` types"""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+
+def sample_values(rng, means, distribution='normal', spread=0.1):
+    """Draw values around per-row means with the given relative spread"""
+    if not spread >= 0 or not np.isfinite(spread):
+        raise ValueError(f'Spread must be a non-negative number, got {spread}')
+    if distribution == 'normal':
+        factors = rng.normal(1.0, spread, size=means.shape)
+    elif distribution == 'lognormal':
+        # Mean-preserving lognormal: E[exp(N(mu, sigma))] == 1
+        sigma = np.sqrt(np.log1p(spread ** 2))
+        factors = rng.lognormal(-sigma ** 2 / 2, sigma, size=means.shape)
+    elif distribution == 'uniform':
+        half_width = spread * np.sqrt(3)
+        factors = rng.uniform(1 - half_width, 1 + half_width, size=means.shape)
+    else:
+        raise ValueError(f"Unknown distribution '{distribution}'. Use one of {', '.join(DISTRIBUTIONS)}.")
+    return np.round(np.clip(means * factors, 0.01, None), 2)
+
+
+def generate_frame(rows, seed=0, type_count=None, distribution='normal', spread=0.1,
+                   dirty_fraction=0.0, start=0):
+    """
+    Build a DataFrame of `rows` synthetic equipment readings.
+
+    Equipment names are unique (serials start after `start`, so chunks of one
+    dataset never collide). Numeric values are drawn around each type's
+    typical value, clipped to stay positive. `dirty_fraction` of the rows get a
+    blank name, a blank type or a non-numeric reading.
+    """
+    rng = np.random.default_rng(seed)
+    catalog = build_catalog(type_count)
+    codes = rng.choice(len(catalog), size=rows, p=type_weights(len(catalog)))
+
+    types = np.array([entry[0] for entry in catalog], dtype=object)
+    prefixes = np.array([f'{entry[1]} {entry[2]}-' for entry in catalog], dtype=object)
+    means = np.array([entry[3:] for entry in catalog], dtype=np.float64)
+
+    values = sample_values(rng, means[codes], distribution, spread)
+    serials = pd.Series(np.arange(start + 1, start + rows + 1)).astype(str).str.zfill(7)
+
+    frame = pd.DataFrame({
+        'Equipment Name': pd.Series(prefixes[codes]) + serials,
+        'Type': types[codes],
+        'Flowrate': values[:, 0],
+        'Pressure': values[:, 1],
+        'Temperature': values[:, 2],
+    }, columns=CSV_COLUMNS)
+
+    if dirty_fraction:
+        dirty = np.flatnonzero(rng.random(rows) < dirty_fraction)
+        kinds = rng.integers(0, len(DIRTY_KINDS), size=len(dirty))
+        frame.loc[dirty[kinds == 0], 'Equipment Name'] = ''
+        frame.loc[dirty[kinds == 1], 'Type'] = ''
+        non_numeric = dirty[kinds == 2]
+        if len(non_numeric):
+            columns = rng.choice(['Flowrate', 'Pressure', 'Temperature'], size=len(non_numeric))
+            for column in ('Flowrate', 'Pressure', 'Temperature'):
+                frame[column] = frame[column].astype(object)
+                frame.loc[non_numeric[columns == column], column] = 'n/a'
+    return frame
+
+
+def generate_csv_bytes(rows, seed=0, type_count=None):
+    """Return a synthetic dataset encoded as UTF-8 CSV"""
+    buffer = io.StringIO()
+    generate_frame(rows, seed=seed, type_count=type_count).to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+def chunk_plan(rows, chunk_size, seed):
+    """Split `rows` into (start, size, seed) chunks with independent random streams"""
+    starts = list(range(0, rows, chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    return [
+        (start, min(chunk_size, rows - start), int(child.generate_state(1)[0]))
+        for start, child in zip(starts, seeds)
+    ]
+
+
+def _write_chunk(task):
+    """Process-pool worker: generate one chunk and write it (headerless) to a part file"""
+    path, start, size, seed, options = task
+    generate_frame(size, seed=seed, start=start, **options).to_csv(path, index=False, header=False)
+    return size
+
+
+def write_csv_parallel(path, rows, seed=0, workers=None, chunk_size=500_000, progress=None, **options):
+    """
+    Write `rows` synthetic rows to `path` using a process pool.
+
+    Each worker generates and formats one chunk into a temporary part file;
+    the parts are then concatenated after a single header line. `options` are
+    passed to generate_frame (type_count, distribution, spread, dirty_fraction).
+    """
+    workers = workers or os.cpu_count() or 1
+    plan = chunk_plan(rows, chunk_size, seed)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as tmp:
+        tasks = [(os.path.join(tmp, f'part-{index:05d}.csv'), start, size, chunk_seed, options)
+                 for index, (start, size, chunk_seed) in enumerate(plan)]
+        if workers == 1 or len(tasks) == 1:
+            written = _drain(map(_write_chunk, tasks), progress)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                written = _drain(ordered_results(pool, _write_chunk, tasks, workers * 2), progress)
+
+        with open(path, 'wb') as out:
+            out.write((','.join(CSV_COLUMNS) + '\n').encode('utf-8'))
+            for task in tasks:
+                with open(task[0], 'rb') as part:
+                    shutil.copyfileobj(part, out, length=16 * 2**20)
+    return written
+
+
+def _drain(results, progress):
+    written = 0
+    for size in results:
+        written += size
+        if progress:
+            progress(written)
+    return written
+
+
+def ordered_results(pool, function, tasks, ahead):
+    """
+    Yield function(task) for each task in order, run in `pool` with at most
+    `ahead` tasks submitted but not yet consumed.
+
+    Unlike Executor.map, which submits every task up front and keeps every
+    finished result until it is consumed, memory stays bounded when the
+    consumer is slower than the pool. Unstarted tasks are cancelled if the
+    consumer stops early.
+    """
+    in_flight = deque()
+    try:
+        for task in tasks:
+            if len(in_flight) >= ahead:
+                yield in_flight.popleft().result()
+            in_flight.append(pool.submit(function, task))
+        while in_flight:
+            yield in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def generate_chunks(rows, seed=0, workers=None, chunk_size=500_000, **options):
+    """
+    Yield synthetic DataFrame chunks in order, generated in a process pool
+    when workers > 1; at most workers * 2 chunks are held at a time.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(size, chunk_seed, start, options) for start, size, chunk_seed in chunk_plan(rows, chunk_size, seed)]
+    if workers == 1 or len(tasks) == 1:
+        yield from map(_generate_chunk, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from ordered_results(pool, _generate_chunk, tasks, workers * 2)
+
+
+def _generate_chunk(task):
+    size, seed, start, options = task
+    return generate_frame(size, seed=seed, start=start, **options)
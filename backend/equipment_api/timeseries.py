@@ -0,0 +1,56 @@
+"""
+Downsampling of timestamped readings for plotting.
+
+`lttb` picks the readings of a series that best keep its visual shape with
+Largest-Triangle-Three-Buckets (Steinarsson, 2013): the first and last
+points are kept, and every bucket in between contributes the point forming
+the largest triangle with the point chosen before it and the mean of the
+next bucket. Bucket means come from one cumulative sum; the choice within a
+bucket is one vectorized step, so the Python loop runs once per bucket, not
+per reading.
+
+Time-bucket min/max/mean aggregation runs in the database (see the
+timeseries endpoint). Only depends on NumPy.
+"""
+
+import numpy as np
+
+
+def lttb(x, y, points):
+    """
+    Indices (ascending) of `points` (at least 3) readings of the series
+    (x, y), x sorted ascending. Series of at most `points` readings are
+    returned whole.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    size = len(x)
+    if points >= size:
+        return np.arange(size)
+    if points < 3:
+        raise ValueError('LTTB keeps at least 3 points')
+
+    # Areas do not change under translation; shifting keeps the sums of epoch times precise
+    x = x - x[0]
+    # Readings 1 .. size-2 split into points-2 buckets of near-equal length
+    edges = np.linspace(1, size - 1, points - 1).astype(np.int64)
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    lengths = edges[1:] - edges[:-1]
+    x_means = (x_sums[edges[1:]] - x_sums[edges[:-1]]) / lengths
+    y_means = (y_sums[edges[1:]] - y_sums[edges[:-1]]) / lengths
+    # The bucket after the last one is the final reading
+    x_means = np.append(x_means, x[-1])
+    y_means = np.append(y_means, y[-1])
+
+    chosen = np.empty(points, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = x_means[bucket + 1], y_means[bucket + 1]
+        areas = np.abs((ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay))
+        previous = start + int(np.argmax(areas))
+        chosen[bucket + 1] = previous
+    return chosen
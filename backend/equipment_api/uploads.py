@@ -0,0 +1,154 @@
+"""
+Upload handler that validates equipment files while they stream in.
+
+Django normally spools the whole request body to a temporary file before the
+view sees it, so a wrong file was only rejected after being received and
+parsed in full. SniffingUploadHandler runs ahead of Django's own handlers:
+
+- the request is refused before any of the body is read when its
+  Content-Length exceeds UPLOAD_MAX_BYTES, and the upload is stopped once
+  that many file bytes have arrived;
+- the header row is checked (`parsers.sniff_header`: UTF-8, comma-separated,
+  required columns) as soon as its first line has arrived, decompressing
+  the first bytes of .csv.gz/.csv.zst files; Parquet files must start with
+  their magic number.
+
+On a mismatch the handler records the error and stops the upload without
+storing the rest of the body; `error_response()` returns the response.
+"""
+
+import zlib
+
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from rest_framework import status
+from rest_framework.response import Response
+
+from .parsers import (
+    REQUIRED_COLUMNS, CSVFormatError, EmptyCSVError, MissingColumnsError,
+    detect_format, sniff_header, zstandard
+)
+
+
+# Decompressed bytes searched for the header line before giving up on sniffing
+SNIFF_BYTES = 64 * 1024
+
+PARQUET_MAGIC = b'PAR1'
+
+DECOMPRESSION_ERRORS = (zlib.error, *((zstandard.ZstdError,) if zstandard else ()))
+
+
+class SniffingUploadHandler(FileUploadHandler):
+    """Checks size and header of the `file` field before the rest of the upload is stored"""
+
+    def __init__(self, request=None, max_size=None, field_name='file'):
+        super().__init__(request)
+        self.max_size = max_size
+        self.target_field = field_name
+        self.error = None
+        self._reset()
+
+    def _reset(self):
+        self.sniffing = False
+        self.received = 0
+        self.buffer = b''
+        self.compressed = b''
+        self.decompressor = None
+        self.format = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if self.max_size and content_length and content_length > self.max_size:
+            self._fail_too_large()
+            # Claim the request so Django does not read the body at all
+            return QueryDict(), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self._reset()
+        if field_name != self.target_field:
+            return
+        self.format = detect_format(file_name)
+        self.sniffing = self.format is not None
+        if self.format == 'gzip':
+            self.decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        elif self.format == 'zstd':
+            # Without zstandard the parser reports the missing dependency instead
+            self.sniffing = zstandard is not None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.field_name != self.target_field:
+            return raw_data
+        self.received += len(raw_data)
+        if self.max_size and self.received > self.max_size:
+            self._fail_too_large()
+            raise StopUpload(connection_reset=True)
+        if self.sniffing:
+            try:
+                self._sniff(raw_data)
+            except (CSVFormatError, *DECOMPRESSION_ERRORS) as e:
+                self.error = self._format_error(e)
+                raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def _sniff(self, raw_data):
+        if self.format == 'parquet':
+            self.buffer += raw_data[:len(PARQUET_MAGIC) - len(self.buffer)]
+            if len(self.buffer) >= len(PARQUET_MAGIC):
+                self.sniffing = False
+                if self.buffer != PARQUET_MAGIC:
+                    raise CSVFormatError('The file is not a valid Parquet file.')
+            return
+        if self.format == 'gzip':
+            raw_data = self.decompressor.decompress(
+                self.decompressor.unconsumed_tail + raw_data, SNIFF_BYTES - len(self.buffer)
+            )
+        elif self.format == 'zstd':
+            # zstandard's decompressobj has no output limit, so a small chunk could
+            # expand without bound; decompress the prefix received so far through
+            # a reader that stops at SNIFF_BYTES instead
+            self.compressed += raw_data
+            reader = zstandard.ZstdDecompressor().stream_reader(self.compressed)
+            self.buffer = b''
+            raw_data = reader.read(SNIFF_BYTES)
+        self.buffer += raw_data[:SNIFF_BYTES - len(self.buffer)]
+        if sniff_header(self.buffer) is not None or len(self.buffer) >= SNIFF_BYTES \
+                or len(self.compressed) >= SNIFF_BYTES:
+            # Header checked, or too long to judge early; the parser has the last word
+            self.sniffing = False
+
+    def file_complete(self, file_size):
+        if self.field_name == self.target_field and self.sniffing and self.format != 'parquet':
+            # The whole file was shorter than one line
+            try:
+                sniff_header(self.buffer, final=True)
+            except CSVFormatError as e:
+                self.error = self._format_error(e)
+            self.sniffing = False
+        return None
+
+    def _fail_too_large(self):
+        self.error = Response(
+            {
+                'error': f'File exceeds the maximum upload size of {self.max_size // (1024 * 1024)} MB.',
+                'max_bytes': self.max_size
+            },
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    @staticmethod
+    def _format_error(e):
+        if isinstance(e, MissingColumnsError):
+            data = {'error': str(e), 'required_columns': REQUIRED_COLUMNS, 'found_columns': e.found}
+        elif isinstance(e, EmptyCSVError):
+            data = {'error': 'The CSV file is empty or invalid.'}
+        elif isinstance(e, CSVFormatError):
+            data = {'error': str(e)}
+        else:
+            data = {'error': 'The file could not be decompressed.'}
+        return Response(data, status=status.HTTP_400_BAD_REQUEST)
+
+    def error_response(self):
+        """The 400/413 Response for a rejected upload, or None"""
+        return self.error
@@ -1,22 +1,97 @@
-import pandas as pd
-from collections import defaultdict
+import csv
+import datetime
+import functools
+import io
+import itertools
+import json
+import math
+import time
+import numpy as np
+from django.conf import settings
 from django.db import models, transaction
-from django.db.models import Avg, Max, Min, Count
+from django.db.models.functions import Cast, Floor, Greatest, Least, RowNumber
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.contrib.auth.models import User
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, parser_classes, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
-from .models import EquipmentDataset, EquipmentItem
+from .admission import AdmissionRejected, upload_admission
+from .correlation import correlation_matrices
+from .outliers import METHODS as OUTLIER_METHODS
+from .diff import SECTIONS, DatasetDiff
+from .ingest import (
+    build_column_store, build_extra_columns, detect_ingest_outliers, insert_items, recheck_violations,
+    record_violations
+)
+from .metrics import phase
+from .models import (
+    DatasetEvent, EquipmentDataset, EquipmentItem, EquipmentType, LimitViolation, OperatingLimit
+)
+from .parsers import (
+    REQUIRED_COLUMNS, CSVFormatError, EmptyCSVError, MissingColumnsError,
+    dataset_filename, detect_format, parse_equipment_file
+)
+from .summary import NUMERIC_FIELDS
+from .timeseries import lttb
+from .uploads import SniffingUploadHandler
 from .serializers import (
-    EquipmentDatasetSerializer, EquipmentItemSerializer,
+    EquipmentDatasetSerializer, EquipmentItemSerializer, OperatingLimitSerializer,
     UserRegistrationSerializer, UserLoginSerializer, UserSerializer
 )
 
 
+class EventStreamRenderer(BaseRenderer):
+    """Lets content negotiation accept `Accept: text/event-stream` for the events action"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only reached for error responses; the stream itself bypasses rendering
+        return f"event: error\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n".encode(self.charset)
+
+
+def admission_controlled(method):
+    """
+    Run an ingest view method under the upload admission limits.
+
+    Requests that cannot be admitted within the queue timeout get
+    429 Too Many Requests with a Retry-After header, before their body is read.
+    """
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        try:
+            size = max(int(request.META.get('CONTENT_LENGTH') or 0), 0)
+        except ValueError:
+            size = 0
+        admission = upload_admission()
+        try:
+            with phase(request, 'admission'):
+                admission.acquire(size)
+        except AdmissionRejected as e:
+            return Response(
+                {'error': str(e), 'retry_after': e.retry_after},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(e.retry_after)}
+            )
+        try:
+            return method(self, request, *args, **kwargs)
+        finally:
+            admission.release(size)
+    return wrapper
+
+
 class EquipmentDatasetViewSet(viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing equipment datasets.
@@ -47,20 +122,22 @@ class EquipmentDatasetViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         """
-        GET /api/datasets/<id>/
+        GET /api/datasets/<id>/?fields=type,flowrate
         Get specific dataset details including all equipment items
+        (only the item fields listed in `fields`, when given)
         """
+        fields, error = requested_item_fields(request)
+        if error is not None:
+            return error
         dataset = self.get_object()
-        items = dataset.equipment_items.all()
-        
-        items_serializer = EquipmentItemSerializer(items, many=True)
+        items = dataset.equipment_items.select_related('type')
         
         return Response({
             'id': dataset.id,
             'filename': dataset.filename,
             'uploaded_at': dataset.uploaded_at,
             'summary': dataset.summary_json or {},
-            'equipment_items': items_serializer.data
+            'equipment_items': serialize_items(items, fields)
         })
 
     @action(detail=True, methods=['get'])
@@ -70,22 +147,431 @@ class EquipmentDatasetViewSet(viewsets.ModelViewSet):
         Get summary statistics only
         """
         dataset = self.get_object()
-        summary = dataset.summary_json or {}
-        
-        # Format summary in the requested format
-        formatted_summary = {
+        return Response(summary_payload(dataset))
+
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    @admission_controlled
+    def append(self, request, pk=None):
+        """
+        POST /api/datasets/<id>/append/
+        Add the rows of an uploaded file to an existing dataset.
+
+        Only the new rows are summarized; their totals are merged into the
+        stored summary state, so the cost does not grow with the dataset.
+        """
+        dataset = self.get_object()
+        try:
+            result, error = parse_uploaded_file(request)
+            if error is not None:
+                return error
+
+            with transaction.atomic():
+                # Serialize concurrent appends to the same dataset (no-op on SQLite,
+                # where the write transaction already does)
+                dataset = EquipmentDataset.objects.select_for_update().get(pk=dataset.pk)
+                # Read (or rebuild) the existing totals before the new rows land
+                accumulator = dataset.summary_accumulator()
+                columnar = dataset.storage == EquipmentDataset.COLUMN_CACHE
+                store = dataset.column_store() if columnar else None
+                extra = dataset.extra_columns() if result.extra else None
+                last_id = dataset.equipment_items.aggregate(last=models.Max('id'))['last'] or 0
+                with phase(request, 'insert'):
+                    insert_items(
+                        dataset, result.names, result.types,
+                        result.flowrate, result.pressure, result.temperature, timestamps=result.timestamps
+                    )
+                    if columnar:
+                        dataset.columns_version += 1
+                        dataset.save_column_store(store.concat(build_column_store(
+                            result.names, result.types,
+                            result.flowrate, result.pressure, result.temperature
+                        )))
+                    if extra is not None:
+                        dataset.save_extra_columns(extra.concat(
+                            build_extra_columns(dataset, result.types, result.extra, after_id=last_id)
+                        ))
+                        dataset.extra_fields = {**dataset.extra_fields, **result.extra_labels}
+
+                with phase(request, 'limits'):
+                    record_violations(
+                        dataset, result.types, result.flowrate, result.pressure, result.temperature,
+                        after_id=last_id
+                    )
+
+                with phase(request, 'summarize'):
+                    accumulator.merge(result.summary)
+                    dataset.summary_json = accumulator.to_summary()
+                    dataset.summary_state = accumulator.to_state()
+                    # Correlations and outliers depend on every row; recomputed on next request
+                    dataset.correlation_json = {}
+                    dataset.outliers_json = {}
+                    dataset.save(update_fields=[
+                        'summary_json', 'summary_state', 'correlation_json', 'outliers_json', 'extra_fields',
+                        'columns_version'
+                    ])
+                    DatasetEvent.record(DatasetEvent.UPDATED, dataset)
+        except Exception as e:
+            return Response(
+                {'error': f'An error occurred while processing the file: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({
+            'success': True,
+            'message': f'Successfully appended {len(result)} equipment items',
             'dataset_id': dataset.id,
             'filename': dataset.filename,
-            'total_count': summary.get('total_equipment_count', 0),
-            'averages': {
-                'flowrate': summary.get('average_flowrate', 0),
-                'pressure': summary.get('average_pressure', 0),
-                'temperature': summary.get('average_temperature', 0)
-            },
-            'type_distribution': summary.get('equipment_type_distribution', {})
-        }
-        
-        return Response(formatted_summary)
+            'uploaded_at': dataset.uploaded_at,
+            'appended_count': len(result),
+            'summary': dataset.summary_json
+        })
+
+    DIFF_MAX_PAGE_SIZE = 1000
+
+    @action(detail=True, methods=['get'], url_path=r'diff/(?P<other_pk>[^/.]+)')
+    def diff(self, request, pk=None, other_pk=None):
+        """
+        GET /api/datasets/<a>/diff/<b>/?threshold=&flowrate_threshold=&page=&page_size=&section=
+        Equipment added, removed and changed between dataset <a> and dataset <b>.
+
+        Items are matched on equipment name with an indexed join in the
+        database. A numeric field counts as changed when it moved by more than
+        its threshold (`<field>_threshold`, else `threshold`, else 0); a type
+        change always counts. Each page holds up to `page_size` items of every
+        section, or of `section` alone.
+        """
+        base = self.get_object()
+        other = get_object_or_404(self.get_queryset(), pk=other_pk)
+        try:
+            default = float(request.query_params.get('threshold', 0))
+            thresholds = {
+                field: float(request.query_params.get(f'{field}_threshold', default))
+                for field in NUMERIC_FIELDS
+            }
+            page = int(request.query_params.get('page', 1))
+            page_size = int(request.query_params.get('page_size', settings.REST_FRAMEWORK['PAGE_SIZE']))
+        except ValueError:
+            return Response(
+                {'error': "Thresholds must be numbers and 'page'/'page_size' integers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        sections = [request.query_params['section']] if 'section' in request.query_params else list(SECTIONS)
+        if page < 1 or page_size < 1 \
+                or any(not math.isfinite(value) or value < 0 for value in thresholds.values()) \
+                or any(section not in SECTIONS for section in sections):
+            return Response(
+                {'error': f"'page' and 'page_size' must be positive, thresholds finite and non-negative "
+                          f"and 'section' one of {', '.join(SECTIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        page_size = min(page_size, self.DIFF_MAX_PAGE_SIZE)
+
+        diff = DatasetDiff(base.id, other.id, thresholds)
+        counts = diff.counts()
+        offset = (page - 1) * page_size
+        url = request.build_absolute_uri()
+        has_next = any(counts[section] > offset + page_size for section in sections)
+        return Response({
+            'base': {'id': base.id, 'filename': base.filename, 'uploaded_at': base.uploaded_at},
+            'other': {'id': other.id, 'filename': other.filename, 'uploaded_at': other.uploaded_at},
+            'thresholds': thresholds,
+            'counts': counts,
+            'page': page,
+            'page_size': page_size,
+            'next': replace_query_param(url, 'page', page + 1) if has_next else None,
+            'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+            **{section: getattr(diff, section)(page_size, offset) for section in sections},
+        })
+
+    BATCH_MAX_IDS = 20
+    BATCH_INCLUDES = ('summary', 'chart_data', 'items_page')
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        GET /api/datasets/batch/?ids=1,2,3&include=summary,chart_data,items_page&fields=
+        Summary, chart data and the first page of items (as returned by
+        /api/equipment/?dataset=<id>, limited to `fields` when given) for
+        several datasets in one response. `include` defaults to all three.
+
+        The query count does not depend on the number of datasets or items:
+        one query for the datasets, one GROUP BY (plus the type names, and the
+        extra field values with their type names) for chart data not covered
+        by stored totals, one for the item counts and
+        one windowed query for the first page of every dataset.
+        """
+        ids = requested_dataset_ids(request)
+        include = request.query_params.get('include')
+        if include:
+            include = [name.strip() for name in include.split(',') if name.strip()]
+        else:
+            include = list(self.BATCH_INCLUDES)
+        if not ids or len(ids) > self.BATCH_MAX_IDS or any(name not in self.BATCH_INCLUDES for name in include):
+            return Response(
+                {'error': f"'ids' must list 1 to {self.BATCH_MAX_IDS} dataset ids and 'include' "
+                          f"be a subset of {', '.join(self.BATCH_INCLUDES)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        fields, error = requested_item_fields(request)
+        if error is not None:
+            return error
+
+        found = {dataset.id: dataset for dataset in self.get_queryset().filter(pk__in=ids)}
+        datasets = [found[dataset_id] for dataset_id in ids if dataset_id in found]
+        averages = type_averages_by_dataset(datasets) if 'chart_data' in include else {}
+        pages = first_item_pages(request, [dataset.id for dataset in datasets], fields) \
+            if 'items_page' in include and datasets else {}
+
+        results = []
+        for dataset in datasets:
+            entry = {'id': dataset.id, 'filename': dataset.filename, 'uploaded_at': dataset.uploaded_at}
+            if 'summary' in include:
+                entry['summary'] = summary_payload(dataset)
+            if 'chart_data' in include:
+                entry['chart_data'] = chart_payload(averages[dataset.id], dataset.extra_fields)
+            if 'items_page' in include:
+                entry['items_page'] = pages[dataset.id]
+            results.append(entry)
+        return Response({
+            'datasets': results,
+            'missing': [dataset_id for dataset_id in ids if dataset_id not in found],
+        })
+
+    COMPARE_STATS = ('mean', 'min', 'max')
+
+    @action(detail=False, methods=['get'])
+    def compare(self, request):
+        """
+        GET /api/datasets/compare/?ids=1,2,3
+        Per-type count, mean, min and max of each numeric field across
+        datasets (all retained datasets, oldest first, when `ids` is omitted),
+        as a dense datasets x types x metrics matrix for grouped bar charts.
+        Types a dataset lacks have count 0 and null statistics. Extra numeric
+        fields of any of the datasets follow the built-in ones (null where a
+        dataset or type has no values).
+
+        Stored per-type totals are used where present; the other datasets
+        share one GROUP BY dataset, type query and one query for their extra
+        field values.
+        """
+        if 'ids' in request.query_params:
+            ids = requested_dataset_ids(request)
+            if not ids or len(ids) > self.BATCH_MAX_IDS:
+                return Response(
+                    {'error': f"'ids' must list 1 to {self.BATCH_MAX_IDS} dataset ids."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            found = {dataset.id: dataset for dataset in self.get_queryset().filter(pk__in=ids)}
+            datasets = [found[dataset_id] for dataset_id in ids if dataset_id in found]
+        else:
+            datasets = list(self.get_queryset().order_by('uploaded_at', 'id'))
+            ids, found = [], {}
+
+        aggregates = EquipmentDataset.type_aggregates(datasets)
+        types = sorted({label for dataset in datasets for label in aggregates[dataset.id]})
+        extra_fields = {}
+        for dataset in datasets:
+            for key, label in dataset.extra_fields.items():
+                extra_fields.setdefault(key, label)
+        fields = [*NUMERIC_FIELDS, *extra_fields]
+        metrics = ['count'] + [f'{field}_{stat}' for field in fields for stat in self.COMPARE_STATS]
+        empty = [0] + [None] * (len(metrics) - 1)
+        values = []
+        for dataset in datasets:
+            rows = []
+            for label in types:
+                stats = aggregates[dataset.id].get(label)
+                if stats is None:
+                    rows.append(empty)
+                    continue
+                row = [stats['count']]
+                for field in fields:
+                    if field not in stats['sums']:
+                        row += [None] * len(self.COMPARE_STATS)
+                        continue
+                    row += [
+                        rounded(field_mean(stats, field)),
+                        rounded(stats['minimums'][field]),
+                        rounded(stats['maximums'][field]),
+                    ]
+                rows.append(row)
+            values.append(rows)
+
+        return Response({
+            'datasets': [
+                {'id': dataset.id, 'filename': dataset.filename, 'uploaded_at': dataset.uploaded_at}
+                for dataset in datasets
+            ],
+            'types': types,
+            'metrics': metrics,
+            'extra_fields': extra_fields,
+            'values': values,
+            'missing': [dataset_id for dataset_id in ids if dataset_id not in found],
+        })
+
+    @action(detail=True, methods=['get'])
+    def violations(self, request, pk=None):
+        """
+        GET /api/datasets/<id>/violations/?field=pressure&bound=max
+        Readings outside the operating limits of their type, as recorded at
+        ingest (paginated, by item). Optionally filtered by field and by bound
+        ('min' or 'max').
+        """
+        dataset = self.get_object()
+        violations = dataset.violations.all()
+        for name in ('field', 'bound'):
+            value = request.query_params.get(name)
+            if value is not None:
+                violations = violations.filter(**{name: value})
+        page = self.paginate_queryset(violations.values(
+            'item_id', 'field', 'bound', 'value', 'limit',
+            equipment_name=models.F('item__equipment_name'), type=models.F('item__type__name'),
+        ))
+        return self.get_paginated_response(page)
+
+    @action(detail=True, methods=['get'])
+    def outliers(self, request, pk=None):
+        """
+        GET /api/datasets/<id>/outliers/?method=zscore&threshold=3&field=pressure
+        Items whose readings are outliers within their equipment type, with
+        scores: `method` is zscore (default), mad or iqr; `threshold`
+        defaults to the method's conventional cut-off. Results for the
+        default threshold are cached until the dataset changes.
+        """
+        method = request.query_params.get('method', 'zscore')
+        field = request.query_params.get('field')
+        try:
+            threshold = request.query_params.get('threshold')
+            threshold = None if threshold is None else float(threshold)
+        except ValueError:
+            threshold = -1
+        if method not in OUTLIER_METHODS or (threshold is not None and not threshold > 0) \
+                or (field is not None and field not in NUMERIC_FIELDS):
+            return Response(
+                {'error': f"'method' must be one of {', '.join(OUTLIER_METHODS)}, 'threshold' a positive "
+                          f"number and 'field' one of {', '.join(NUMERIC_FIELDS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        dataset = self.get_object()
+        report = dataset.outliers(method, threshold)
+        items = report['items']
+        if field is not None:
+            items = [item for item in items if item['field'] == field]
+        return Response({'dataset_id': dataset.id, **report, 'count': len(items), 'items': items})
+
+    CORRELATION_GROUPINGS = ('type', 'dataset')
+
+    @action(detail=True, methods=['get'])
+    def correlation(self, request, pk=None):
+        """
+        GET /api/datasets/<id>/correlation/?by=type
+        Covariance, Pearson and Spearman matrices of flowrate, pressure and
+        temperature within each equipment type (`by=dataset`: over all rows).
+        Undefined entries (one reading, constant field) are null.
+        """
+        by = request.query_params.get('by', 'type')
+        if by not in self.CORRELATION_GROUPINGS:
+            return Response(
+                {'error': f"'by' must be one of {', '.join(self.CORRELATION_GROUPINGS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        dataset = self.get_object()
+        correlations = dataset.correlations()
+        payload = {'dataset_id': dataset.id, 'by': by, 'fields': correlations['fields']}
+        if by == 'type':
+            payload['types'] = correlations['types']
+        else:
+            payload['dataset'] = correlations['dataset']
+        return Response(payload)
+
+    # Long-poll / SSE tuning for the events action (seconds)
+    EVENTS_POLL_INTERVAL = 0.5
+    EVENTS_MAX_WAIT = 30
+    EVENTS_STREAM_DURATION = 300
+    EVENTS_HEARTBEAT = 15
+
+    @action(detail=False, methods=['get'],
+            renderer_classes=[JSONRenderer, BrowsableAPIRenderer, EventStreamRenderer])
+    def events(self, request):
+        """
+        GET /api/datasets/events/?since=<cursor>&timeout=<seconds>
+        Dataset created/deleted/pruned notifications.
+
+        With `Accept: text/event-stream` the response is a Server-Sent Events
+        stream (resumable through `Last-Event-ID`). Otherwise it is a long-poll
+        that returns as soon as events newer than `since` exist, or an empty list
+        after `timeout` seconds. Omitting `since` returns the current cursor
+        immediately. `reset: true` means the cursor is older than the retained
+        log and the client should refetch the dataset list.
+        """
+        since = request.query_params.get('since', request.headers.get('Last-Event-ID'))
+        try:
+            since = int(since) if since not in (None, '') else None
+            timeout = float(request.query_params.get('timeout', self.EVENTS_MAX_WAIT))
+        except ValueError:
+            return Response(
+                {'error': "'since' must be an integer and 'timeout' a number."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        timeout = max(0.0, min(timeout, self.EVENTS_MAX_WAIT))
+
+        if request.accepted_renderer.format == 'sse':
+            response = StreamingHttpResponse(
+                self._event_stream(since if since is not None else DatasetEvent.latest_cursor()),
+                content_type='text/event-stream'
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        if since is None:
+            return Response({'cursor': DatasetEvent.latest_cursor(), 'reset': False, 'events': []})
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._cursor_expired(since):
+                return Response({'cursor': DatasetEvent.latest_cursor(), 'reset': True, 'events': []})
+            events = list(DatasetEvent.objects.filter(id__gt=since))
+            if events or time.monotonic() >= deadline:
+                break
+            time.sleep(self.EVENTS_POLL_INTERVAL)
+
+        return Response({
+            'cursor': events[-1].id if events else since,
+            'reset': False,
+            'events': [event.to_dict() for event in events]
+        })
+
+    @staticmethod
+    def _cursor_expired(since):
+        """True when events after `since` may already have been trimmed from the log"""
+        oldest = DatasetEvent.objects.aggregate(oldest=models.Min('id'))['oldest']
+        return oldest is not None and since < oldest - 1
+
+    def _event_stream(self, since):
+        """Yield SSE frames for new events until the stream duration elapses"""
+        cursor = since
+        started = last_write = time.monotonic()
+        yield f"retry: 3000\nid: {cursor}\nevent: ready\ndata: {{}}\n\n"
+        while time.monotonic() - started < self.EVENTS_STREAM_DURATION:
+            if self._cursor_expired(cursor):
+                cursor = DatasetEvent.latest_cursor()
+                yield f"id: {cursor}\nevent: reset\ndata: {{}}\n\n"
+                last_write = time.monotonic()
+            for event in DatasetEvent.objects.filter(id__gt=cursor):
+                cursor = event.id
+                data = json.dumps(event.to_dict(), cls=JSONEncoder)
+                yield f"id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n"
+                last_write = time.monotonic()
+            if time.monotonic() - last_write >= self.EVENTS_HEARTBEAT:
+                yield ": keep-alive\n\n"
+                last_write = time.monotonic()
+            time.sleep(self.EVENTS_POLL_INTERVAL)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            DatasetEvent.record(DatasetEvent.DELETED, instance)
+            instance.delete()
 
     @action(detail=True, methods=['get'])
     def chart_data(self, request, pk=None):
@@ -93,53 +579,247 @@ class EquipmentDatasetViewSet(viewsets.ModelViewSet):
         GET /api/datasets/<id>/chart-data/
         Return data formatted for Chart.js
         Group by equipment type and calculate averages per type
+        (extra numeric columns under 'extra', null for types without values)
         """
         dataset = self.get_object()
-        items = dataset.equipment_items.all()
-        
-        # Group by equipment type and calculate averages
-        type_data = defaultdict(lambda: {'flowrates': [], 'pressures': [], 'temperatures': [], 'count': 0})
-        
-        for item in items:
-            type_data[item.type]['flowrates'].append(item.flowrate)
-            type_data[item.type]['pressures'].append(item.pressure)
-            type_data[item.type]['temperatures'].append(item.temperature)
-            type_data[item.type]['count'] += 1
-        
-        # Calculate averages per type - simplified format
-        labels = []
-        flowrate_data = []
-        pressure_data = []
-        temperature_data = []
-        
-        for eq_type, data in sorted(type_data.items()):
-            labels.append(eq_type)
-            
-            # Calculate averages
-            avg_flowrate = sum(data['flowrates']) / len(data['flowrates']) if data['flowrates'] else 0
-            avg_pressure = sum(data['pressures']) / len(data['pressures']) if data['pressures'] else 0
-            avg_temperature = sum(data['temperatures']) / len(data['temperatures']) if data['temperatures'] else 0
-            
-            flowrate_data.append(round(avg_flowrate, 2))
-            pressure_data.append(round(avg_pressure, 2))
-            temperature_data.append(round(avg_temperature, 2))
-        
-        chart_data = {
-            'labels': labels,
-            'flowrate': flowrate_data,
-            'pressure': pressure_data,
-            'temperature': temperature_data
-        }
-        
-        return Response(chart_data)
+        return Response(chart_payload(type_averages_by_dataset([dataset])[dataset.id], dataset.extra_fields))
+
+    HISTOGRAM_DEFAULT_BINS = 20
+    HISTOGRAM_MAX_BINS = 200
+
+    @action(detail=True, methods=['get'])
+    def histogram(self, request, pk=None):
+        """
+        GET /api/datasets/<id>/histogram/?field=flowrate&bins=20&type=<name>
+        Counts of `field` in equal-width bins spanning its range, optionally
+        for one equipment type. Datasets with a column cache bin the
+        memory-mapped column; others group the items by bin in the database.
+        Extra numeric fields are binned from their stored arrays, skipping
+        missing values.
+        """
+        dataset = self.get_object()
+        field = request.query_params.get('field', 'flowrate')
+        try:
+            bins = int(request.query_params.get('bins', self.HISTOGRAM_DEFAULT_BINS))
+        except ValueError:
+            bins = 0
+        fields = [*NUMERIC_FIELDS, *dataset.extra_fields]
+        if field not in fields or not 1 <= bins <= self.HISTOGRAM_MAX_BINS:
+            return Response(
+                {'error': f"'field' must be one of {', '.join(fields)} "
+                          f"and 'bins' an integer from 1 to {self.HISTOGRAM_MAX_BINS}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        type_name = request.query_params.get('type')
+        type_id = None
+        if type_name is not None:
+            type_id = EquipmentType.objects.filter(name=type_name).values_list('id', flat=True).first()
+
+        if type_name is not None and type_id is None:
+            counts, edges = [], []
+        elif field in dataset.extra_fields:
+            counts, edges = dataset.extra_columns().histogram(field, bins, type_id)
+        elif dataset.storage == EquipmentDataset.COLUMN_CACHE:
+            counts, edges = dataset.column_store().histogram(field, bins, type_id)
+        else:
+            items = dataset.equipment_items.order_by()
+            if type_id is not None:
+                items = items.filter(type_id=type_id)
+            counts, edges = self._sql_histogram(items, field, bins)
+        return Response({
+            'dataset_id': dataset.id,
+            'field': field,
+            'type': type_name,
+            'bins': bins,
+            'edges': edges,
+            'counts': counts,
+        })
+
+    @staticmethod
+    def _sql_histogram(items, field, bins):
+        """(counts, edges) with the same binning as numpy.histogram, in two aggregate queries"""
+        bounds = items.aggregate(low=models.Min(field), high=models.Max(field))
+        low, high = bounds['low'], bounds['high']
+        if low is None:
+            return [], []
+        if low == high:
+            # numpy widens a zero-width range by 0.5 on each side
+            low, high = low - 0.5, high + 0.5
+        index = Least(
+            Cast(Floor((models.F(field) - low) * bins / (high - low)), models.IntegerField()),
+            models.Value(bins - 1)
+        )
+        counts = [0] * bins
+        for bucket, count in items.annotate(bucket=index).values('bucket').annotate(count=models.Count('id')) \
+                .values_list('bucket', 'count'):
+            counts[bucket] += count
+        step = (high - low) / bins
+        return counts, [low + step * i for i in range(bins)] + [high]
+
+    TIMESERIES_DEFAULT_BUCKETS = 500
+    TIMESERIES_MAX_BUCKETS = 5000
+    TIMESERIES_METHODS = ('minmax', 'lttb')
+
+    @action(detail=True, methods=['get'])
+    def timeseries(self, request, pk=None):
+        """
+        GET /api/datasets/<id>/timeseries/?name=<equipment>&fields=pressure&buckets=500&method=minmax&start=&end=
+        Timestamped readings downsampled to at most `buckets` points for
+        plotting, for one piece of equipment (`name`) or the whole dataset,
+        optionally between `start` (inclusive) and `end` (exclusive), given in
+        ISO 8601. Readings without a timestamp are left out.
+
+        `minmax` (default) splits the time range into equal buckets and
+        returns the reading count and min, max and mean of each field per
+        non-empty bucket, grouped in the database. `lttb` (needs `name`)
+        returns actual readings chosen per field by Largest-Triangle-Three-
+        Buckets. Times in `series` are Unix epoch milliseconds.
+        """
+        dataset = self.get_object()
+        params = request.query_params
+        method = params.get('method', 'minmax')
+        name = params.get('name')
+        fields = list(dict.fromkeys(
+            field.strip() for field in params.get('fields', ','.join(NUMERIC_FIELDS)).split(',') if field.strip()
+        ))
+        try:
+            buckets = int(params.get('buckets', self.TIMESERIES_DEFAULT_BUCKETS))
+        except ValueError:
+            buckets = 0
+        bounds = {key: time_bound(params[key]) for key in ('start', 'end') if key in params}
+        smallest = 3 if method == 'lttb' else 1
+        if method not in self.TIMESERIES_METHODS or not fields or any(field not in NUMERIC_FIELDS for field in fields) \
+                or not smallest <= buckets <= self.TIMESERIES_MAX_BUCKETS or None in bounds.values() \
+                or (method == 'lttb' and not name):
+            return Response(
+                {'error': f"'method' must be one of {', '.join(self.TIMESERIES_METHODS)} ('lttb' needs 'name'), "
+                          f"'fields' a subset of {', '.join(NUMERIC_FIELDS)}, 'buckets' an integer from "
+                          f"{smallest} to {self.TIMESERIES_MAX_BUCKETS} and 'start'/'end' ISO 8601 times."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        items = dataset.equipment_items.order_by().filter(ts__isnull=False)
+        if name is not None:
+            items = items.filter(equipment_name=name)
+        if 'start' in bounds:
+            items = items.filter(ts__gte=bounds['start'])
+        if 'end' in bounds:
+            items = items.filter(ts__lt=bounds['end'])
+        if method == 'lttb':
+            count, series = self._lttb_series(items, fields, buckets)
+        else:
+            count, series = self._bucket_series(items, fields, buckets, bounds)
+        return Response({
+            'dataset_id': dataset.id,
+            'name': name,
+            'method': method,
+            'fields': fields,
+            'buckets': buckets,
+            'count': count,
+            'series': series,
+        })
+
+    @staticmethod
+    def _bucket_series(items, fields, buckets, bounds):
+        """
+        (reading count, {'ts', 'count', field: {'min', 'max', 'avg'}}) per
+        non-empty equal-time bucket, in one aggregate query (plus one for the
+        time range when `bounds` lacks it)
+        """
+        epoch = EpochSeconds('ts')
+        low = bounds['start'].timestamp() if 'start' in bounds else None
+        high = bounds['end'].timestamp() if 'end' in bounds else None
+        if low is None or high is None:
+            found = items.aggregate(low=models.Min(epoch), high=models.Max(epoch))
+            low = found['low'] if low is None else low
+            high = found['high'] if high is None else high
+        series = {'ts': [], 'count': [], **{field: {'min': [], 'max': [], 'avg': []} for field in fields}}
+        if low is None or high is None:
+            return 0, series
+        # A single instant still gets one bucket of a second
+        width = (high - low) / buckets if high > low else 1.0
+        index = Greatest(
+            Least(Cast(Floor((epoch - low) / width), models.IntegerField()), models.Value(buckets - 1)),
+            models.Value(0)
+        )
+        aggregates = {'count': models.Count('id')}
+        for field in fields:
+            aggregates.update({
+                f'{field}_min': models.Min(field), f'{field}_max': models.Max(field), f'{field}_avg': models.Avg(field)
+            })
+        rows = items.annotate(bucket=index).values('bucket').annotate(**aggregates).order_by('bucket')
+        total = 0
+        for row in rows:
+            series['ts'].append(round((low + row['bucket'] * width) * 1000))
+            series['count'].append(row['count'])
+            total += row['count']
+            for field in fields:
+                for stat in ('min', 'max', 'avg'):
+                    series[field][stat].append(row[f'{field}_{stat}'])
+        return total, series
+
+    @staticmethod
+    def _lttb_series(items, fields, points):
+        """(reading count, {field: {'ts', 'values'}}) with `points` readings per field chosen by LTTB"""
+        rows = items.order_by('ts', 'id').values_list(EpochSeconds('ts'), *fields)
+        dtype = [('ts', np.float64)] + [(field, np.float64) for field in fields]
+        table = np.fromiter(rows.iterator(chunk_size=10_000), dtype=dtype)
+        series = {}
+        for field in fields:
+            chosen = lttb(table['ts'], table[field], points)
+            series[field] = {
+                'ts': np.round(table['ts'][chosen] * 1000).astype(np.int64).tolist(),
+                'values': table[field][chosen].tolist(),
+            }
+        return len(table), series
+
+    EXPORT_CHUNK_ROWS = 2000
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """
+        GET /api/datasets/<id>/export/
+        Stream the dataset's readings as CSV with the upload column names.
+        Datasets with a column cache are read from its files in chunks; others
+        are iterated from the item table with a server-side cursor.
+        """
+        dataset = self.get_object()
+        if dataset.storage == EquipmentDataset.COLUMN_CACHE:
+            store = dataset.column_store()
+            chunks = store.iter_rows(
+                EquipmentType.names(np.unique(store.type_ids).tolist()), self.EXPORT_CHUNK_ROWS
+            )
+        else:
+            rows = dataset.equipment_items.order_by('id').values_list(
+                'equipment_name', 'type__name', *NUMERIC_FIELDS
+            ).iterator(chunk_size=self.EXPORT_CHUNK_ROWS)
+            chunks = iter(lambda: list(itertools.islice(rows, self.EXPORT_CHUNK_ROWS)), [])
+
+        def render():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(REQUIRED_COLUMNS)
+            for chunk in chunks:
+                writer.writerows(chunk)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+        response = StreamingHttpResponse(render(), content_type='text/csv')
+        filename = dataset.filename.split('.', 1)[0] or f'dataset-{dataset.id}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
 
     @action(detail=True, methods=['get'])
     def items(self, request, pk=None):
-        """Get all equipment items for a specific dataset"""
+        """Get all equipment items for a specific dataset (`?fields=` selects item fields)"""
+        fields, error = requested_item_fields(request)
+        if error is not None:
+            return error
         dataset = self.get_object()
-        items = dataset.equipment_items.all()
-        serializer = EquipmentItemSerializer(items, many=True)
-        return Response(serializer.data)
+        items = dataset.equipment_items.select_related('type')
+        return Response(serialize_items(items, fields))
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -156,25 +836,185 @@ class EquipmentItemViewSet(viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing equipment items.
     """
-    queryset = EquipmentItem.objects.all()
+    queryset = EquipmentItem.objects.select_related('type')
     serializer_class = EquipmentItemSerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        """
+        GET /api/equipment/?dataset=<id>&type=<name>&fields=type,flowrate
+        Paginated items; `fields` limits the columns read and returned.
+        """
+        fields, error = requested_item_fields(request)
+        if error is not None:
+            return error
+        if fields is None:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(project_items(self.filter_queryset(self.get_queryset()), fields))
+        return self.get_paginated_response(sparse_items(page, fields))
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            item = serializer.save()
+            self._invalidate_summary_state(item.dataset_id)
+            recheck_violations(EquipmentItem.objects.filter(pk=item.pk))
+
+    def perform_update(self, serializer):
+        previous_dataset_id = serializer.instance.dataset_id
+        previous_type_id = serializer.instance.type_id
+        with transaction.atomic():
+            item = serializer.save()
+            self._invalidate_summary_state(previous_dataset_id, item.dataset_id)
+            recheck_violations(EquipmentItem.objects.filter(pk=item.pk))
+            if item.dataset_id != previous_dataset_id or item.type_id != previous_type_id:
+                self._edit_extra_columns(item.pk, previous_dataset_id, item.dataset_id, item.type_id)
+
+    def perform_destroy(self, instance):
+        dataset_id = instance.dataset_id
+        with transaction.atomic():
+            LimitViolation.objects.filter(item_id=instance.pk).delete()
+            self._edit_extra_columns(instance.pk, dataset_id)
+            instance.delete()
+            self._invalidate_summary_state(dataset_id)
+
+    @staticmethod
+    def _edit_extra_columns(item_id, dataset_id, new_dataset_id=None, type_id=None):
+        """
+        Keep the extra field values of item `item_id` of dataset `dataset_id` in step with its items
+        (they cannot be rebuilt from rows): dropped when the item is deleted (no `new_dataset_id`),
+        retyped to `type_id`, and carried over with the item when it moves to `new_dataset_id`.
+
+        Runs in the edit's transaction. The dataset row locks are taken before the values are read,
+        so an append to the same dataset either commits first or waits for this edit.
+        """
+        datasets = {
+            dataset.pk: dataset for dataset in EquipmentDataset.objects.select_for_update()
+            .only('id', 'extra_fields').filter(pk__in={dataset_id, new_dataset_id}).order_by('pk')
+        }
+        dataset = datasets.get(dataset_id)
+        if dataset is None or not dataset.extra_fields:
+            return
+        extra = dataset.extra_columns()
+        retyped = {item_id: type_id} if type_id is not None else None
+        if new_dataset_id == dataset_id:
+            dataset.save_extra_columns(extra.edited(retyped=retyped))
+            return
+        dataset.save_extra_columns(extra.edited(removed=[item_id]))
+        target = datasets.get(new_dataset_id)
+        carried = extra.select([item_id]).edited(retyped=retyped)
+        if target is not None and carried.columns:
+            target.save_extra_columns(target.extra_columns().merged(carried))
+            target.extra_fields = {
+                **target.extra_fields, **{key: dataset.extra_fields[key] for key in carried.columns}
+            }
+            target.save(update_fields=['extra_fields'])
+
+    @staticmethod
+    def _invalidate_summary_state(*dataset_ids):
+        """
+        Editing single items makes the stored totals, correlations, outliers and column files stale;
+        they are rebuilt from the items when next needed. Bumping columns_version in this transaction
+        also retires any column store a concurrent append saves for the previous version.
+        """
+        EquipmentDataset.objects.filter(pk__in=dataset_ids).update(
+            summary_state={}, correlation_json={}, outliers_json={},
+            columns_version=models.F('columns_version') + 1
+        )
+        EquipmentDataset.drop_column_stores(*dataset_ids)
+
     def get_queryset(self):
-        """Optionally filter by dataset"""
-        queryset = EquipmentItem.objects.all()
+        """Optionally filter by dataset and by type name"""
+        queryset = EquipmentItem.objects.select_related('type').order_by(*ITEM_ORDERING)
         dataset_id = self.request.query_params.get('dataset', None)
         if dataset_id is not None:
             queryset = queryset.filter(dataset_id=dataset_id)
+        type_name = self.request.query_params.get('type', None)
+        if type_name is not None:
+            # Resolve the name once so the item filter runs on the integer key
+            queryset = queryset.filter(type_id=EquipmentType.objects.filter(name=type_name).values('id')[:1])
         return queryset
 
+    TREND_MAX_NAMES = 500
+
+    @action(detail=False, methods=['get'])
+    def trend(self, request):
+        """
+        GET /api/equipment/trend/?name=<equipment name>
+        Flowrate, pressure and temperature of one piece of equipment across all
+        retained datasets, ordered by dataset upload time.
+        """
+        name = request.query_params.get('name', '').strip()
+        if not name:
+            return Response({'error': "'name' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        series = self._trend_series([name])
+        if name not in series:
+            return Response(
+                {'error': f"No readings found for equipment '{name}'."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(series[name])
+
+    @action(detail=False, methods=['get', 'post'], url_path='trend/batch')
+    def trend_batch(self, request):
+        """
+        GET /api/equipment/trend/batch/?names=<name>,<name>,...
+        POST /api/equipment/trend/batch/ {"names": [...]} (for long lists)
+        Trend series for many pieces of equipment in one query, keyed by name.
+        Names without readings are omitted.
+        """
+        if request.method == 'POST':
+            names = request.data.get('names')
+            if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+                return Response({'error': "'names' must be a list of strings."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            names = request.query_params.get('names', '').split(',')
+        names = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+        if not names:
+            return Response({'error': "'names' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(names) > self.TREND_MAX_NAMES:
+            return Response(
+                {'error': f'At most {self.TREND_MAX_NAMES} names per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'series': self._trend_series(names)})
+
+    @staticmethod
+    def _trend_series(names):
+        """Columnar series per name from a single indexed query joined to the datasets"""
+        rows = (
+            EquipmentItem.objects
+            .filter(equipment_name__in=names)
+            .order_by('equipment_name', 'dataset__uploaded_at', 'dataset_id', 'id')
+            .values_list(
+                'equipment_name', 'dataset_id', 'dataset__uploaded_at',
+                'type__name', 'flowrate', 'pressure', 'temperature'
+            )
+        )
+        series = {}
+        for name, dataset_id, uploaded_at, eq_type, flowrate, pressure, temperature in rows:
+            entry = series.get(name)
+            if entry is None:
+                entry = series[name] = {
+                    'equipment_name': name, 'dataset_ids': [], 'uploaded_at': [], 'type': [],
+                    'flowrate': [], 'pressure': [], 'temperature': []
+                }
+            entry['dataset_ids'].append(dataset_id)
+            entry['uploaded_at'].append(uploaded_at)
+            entry['type'].append(eq_type)
+            entry['flowrate'].append(flowrate)
+            entry['pressure'].append(pressure)
+            entry['temperature'].append(temperature)
+        return series
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get statistics about equipment items"""
         queryset = self.get_queryset()
         stats = {
             'total_items': queryset.count(),
-            'equipment_types': list(queryset.values_list('type', flat=True).distinct()),
+            'equipment_types': list(EquipmentType.names(
+                queryset.order_by().values_list('type_id', flat=True).distinct()
+            ).values()),
             'avg_flowrate': queryset.aggregate(models.Avg('flowrate'))['flowrate__avg'] or 0,
             'avg_pressure': queryset.aggregate(models.Avg('pressure'))['pressure__avg'] or 0,
             'avg_temperature': queryset.aggregate(models.Avg('temperature'))['temperature__avg'] or 0,
@@ -182,182 +1022,127 @@ class EquipmentItemViewSet(viewsets.ModelViewSet):
         return Response(stats)
 
 
+class OperatingLimitViewSet(viewsets.ModelViewSet):
+    """
+    Operating limits per equipment type and field. Changing a limit
+    re-evaluates the stored items of that type, so /violations/ stays current.
+    """
+    queryset = OperatingLimit.objects.select_related('type')
+    serializer_class = OperatingLimitSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        limit = serializer.save()
+        recheck_violations(EquipmentItem.objects.filter(type_id=limit.type_id))
+
+    def perform_update(self, serializer):
+        previous_type_id = serializer.instance.type_id
+        limit = serializer.save()
+        recheck_violations(EquipmentItem.objects.filter(type_id__in={previous_type_id, limit.type_id}))
+
+    def perform_destroy(self, instance):
+        type_id = instance.type_id
+        instance.delete()
+        recheck_violations(EquipmentItem.objects.filter(type_id=type_id))
+
+
 class UploadCSVView(APIView):
     permission_classes = [IsAuthenticated]
     """
     API endpoint for uploading and parsing CSV files containing equipment data.
+    Also accepts gzip/zstd compressed CSV (.csv.gz, .csv.zst) and Parquet files.
     """
     parser_classes = [MultiPartParser, FormParser]
     
-    REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+    REQUIRED_COLUMNS = REQUIRED_COLUMNS
     
+    @admission_controlled
     def post(self, request, *args, **kwargs):
         """
         Handle CSV file upload, parse data, and create dataset with equipment items.
         """
-        if 'file' not in request.FILES:
-            return Response(
-                {'error': 'No file provided. Please upload a CSV file.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        csv_file = request.FILES['file']
-        
-        # Validate file extension
-        if not csv_file.name.endswith('.csv'):
-            return Response(
-                {'error': 'Invalid file type. Please upload a CSV file.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         try:
-            # Read CSV file using pandas
-            df = pd.read_csv(csv_file)
-            
-            # Validate required columns
-            missing_columns = [col for col in self.REQUIRED_COLUMNS if col not in df.columns]
-            if missing_columns:
-                return Response(
-                    {
-                        'error': f'Missing required columns: {", ".join(missing_columns)}',
-                        'required_columns': self.REQUIRED_COLUMNS,
-                        'found_columns': list(df.columns)
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Validate data types and non-empty values
-            errors = []
-            for idx, row in df.iterrows():
-                row_num = idx + 2  # +2 because index is 0-based and we skip header
-                
-                # Check for empty required fields
-                if pd.isna(row['Equipment Name']) or str(row['Equipment Name']).strip() == '':
-                    errors.append(f'Row {row_num}: Equipment Name is required')
-                
-                if pd.isna(row['Type']) or str(row['Type']).strip() == '':
-                    errors.append(f'Row {row_num}: Type is required')
-                
-                # Validate numeric fields
-                try:
-                    flowrate = float(row['Flowrate'])
-                    pressure = float(row['Pressure'])
-                    temperature = float(row['Temperature'])
-                except (ValueError, TypeError):
-                    errors.append(f'Row {row_num}: Flowrate, Pressure, and Temperature must be numeric')
-            
-            if errors:
+            result, error = parse_uploaded_file(request)
+            if error is not None:
+                return error
+
+            csv_file = request.FILES['file']
+            storage = request.data.get('storage', settings.DATASET_STORAGE)
+            if storage not in dict(EquipmentDataset.STORAGE_CHOICES):
                 return Response(
-                    {
-                        'error': 'Data validation failed',
-                        'errors': errors[:10]  # Limit to first 10 errors
-                    },
+                    {'error': f"'storage' must be one of {', '.join(dict(EquipmentDataset.STORAGE_CHOICES))}."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
+
             # Process data in a transaction
             with transaction.atomic():
-                # Create dataset
-                dataset = EquipmentDataset.objects.create(
-                    filename=csv_file.name
-                )
-                
-                # Prepare equipment items for bulk creation
-                equipment_items = []
-                for _, row in df.iterrows():
-                    item = EquipmentItem(
-                        dataset=dataset,
-                        equipment_name=str(row['Equipment Name']).strip(),
-                        type=str(row['Type']).strip(),
-                        flowrate=float(row['Flowrate']),
-                        pressure=float(row['Pressure']),
-                        temperature=float(row['Temperature'])
+                with phase(request, 'insert'):
+                    dataset = EquipmentDataset.objects.create(
+                        filename=dataset_filename(csv_file.name),
+                        storage=storage
                     )
-                    equipment_items.append(item)
-                
-                # Bulk create equipment items
-                EquipmentItem.objects.bulk_create(equipment_items)
-                
-                # Calculate summary statistics
-                items_queryset = dataset.equipment_items.all()
-                
-                # Equipment type distribution
-                type_distribution = {
-                    item['type']: item['count']
-                    for item in items_queryset.values('type')
-                    .annotate(count=Count('id'))
-                }
-                
-                # Create summary in the requested format
-                summary = {
-                    'total_equipment_count': items_queryset.count(),
-                    'average_flowrate': round(
-                        items_queryset.aggregate(Avg('flowrate'))['flowrate__avg'] or 0, 2
-                    ),
-                    'average_pressure': round(
-                        items_queryset.aggregate(Avg('pressure'))['pressure__avg'] or 0, 2
-                    ),
-                    'average_temperature': round(
-                        items_queryset.aggregate(Avg('temperature'))['temperature__avg'] or 0, 2
-                    ),
-                    'equipment_type_distribution': type_distribution,
-                    # Additional statistics for detailed view
-                    'max_flowrate': round(
-                        items_queryset.aggregate(Max('flowrate'))['flowrate__max'] or 0, 2
-                    ),
-                    'min_flowrate': round(
-                        items_queryset.aggregate(Min('flowrate'))['flowrate__min'] or 0, 2
-                    ),
-                    'max_pressure': round(
-                        items_queryset.aggregate(Max('pressure'))['pressure__max'] or 0, 2
-                    ),
-                    'min_pressure': round(
-                        items_queryset.aggregate(Min('pressure'))['pressure__min'] or 0, 2
-                    ),
-                    'max_temperature': round(
-                        items_queryset.aggregate(Max('temperature'))['temperature__max'] or 0, 2
-                    ),
-                    'min_temperature': round(
-                        items_queryset.aggregate(Min('temperature'))['temperature__min'] or 0, 2
-                    ),
-                }
-                
-                # Update dataset with summary
-                dataset.summary_json = summary
-                dataset.save()
-                
-                # Keep only last 5 datasets (delete older ones)
-                all_datasets = EquipmentDataset.objects.all().order_by('-uploaded_at')
-                if all_datasets.count() > 5:
-                    datasets_to_delete = all_datasets[5:]
-                    for old_dataset in datasets_to_delete:
-                        # Delete associated equipment items first
-                        old_dataset.equipment_items.all().delete()
-                        old_dataset.delete()
-            
+                    insert_items(
+                        dataset, result.names, result.types,
+                        result.flowrate, result.pressure, result.temperature, timestamps=result.timestamps
+                    )
+                    if storage == EquipmentDataset.COLUMN_CACHE:
+                        dataset.save_column_store(build_column_store(
+                            result.names, result.types,
+                            result.flowrate, result.pressure, result.temperature
+                        ))
+                    if result.extra:
+                        # Extra numeric columns are stored once per dataset, not as item rows
+                        dataset.save_extra_columns(build_extra_columns(dataset, result.types, result.extra))
+                        dataset.extra_fields = result.extra_labels
+
+                with phase(request, 'limits'):
+                    record_violations(dataset, result.types, result.flowrate, result.pressure, result.temperature)
+
+                with phase(request, 'summarize'):
+                    # Summary statistics come from the parsed columns, not extra queries
+                    summary = result.summary.to_summary()
+                    dataset.summary_json = summary
+                    dataset.summary_state = result.summary.to_state()
+                    if settings.DATASET_PRECOMPUTE_CORRELATION:
+                        dataset.correlation_json = correlation_matrices(
+                            result.types, result.flowrate, result.pressure, result.temperature
+                        )
+                    dataset.save()
+
+                if settings.DATASET_OUTLIER_METHODS:
+                    with phase(request, 'outliers'):
+                        dataset.outliers_json = detect_ingest_outliers(
+                            dataset, result.types, result.flowrate, result.pressure, result.temperature,
+                            settings.DATASET_OUTLIER_METHODS
+                        )
+                        dataset.save(update_fields=['outliers_json'])
+                DatasetEvent.record(DatasetEvent.CREATED, dataset)
+
+                with phase(request, 'prune'):
+                    # Keep only last 5 datasets (delete older ones)
+                    all_datasets = EquipmentDataset.objects.all().order_by('-uploaded_at')
+                    if all_datasets.count() > 5:
+                        datasets_to_delete = all_datasets[5:]
+                        for old_dataset in datasets_to_delete:
+                            DatasetEvent.record(DatasetEvent.PRUNED, old_dataset)
+                            # Delete associated equipment items first
+                            old_dataset.equipment_items.all().delete()
+                            old_dataset.delete()
+
             # Return success response
             return Response(
                 {
                     'success': True,
-                    'message': f'Successfully uploaded and processed {len(equipment_items)} equipment items',
+                    'message': f'Successfully uploaded and processed {len(result)} equipment items',
                     'dataset_id': dataset.id,
                     'filename': dataset.filename,
                     'uploaded_at': dataset.uploaded_at,
-                    'summary': summary
+                    'summary': summary,
+                    'outliers': {method: report['count'] for method, report in dataset.outliers_json.items()}
                 },
                 status=status.HTTP_201_CREATED
             )
-            
-        except pd.errors.EmptyDataError:
-            return Response(
-                {'error': 'The CSV file is empty or invalid.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        except pd.errors.ParserError as e:
-            return Response(
-                {'error': f'Error parsing CSV file: {str(e)}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+
         except Exception as e:
             return Response(
                 {'error': f'An error occurred while processing the file: {str(e)}'},
@@ -365,6 +1150,279 @@ class UploadCSVView(APIView):
             )
 
 
+class EpochSeconds(models.Func):
+    """Seconds since the Unix epoch of a datetime expression, as a float"""
+    output_field = models.FloatField()
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite stores datetimes as UTC text; julianday() reads them (2440587.5 is the epoch's Julian day)
+        return self.as_sql(
+            compiler, connection, template='((julianday(%(expressions)s) - 2440587.5) * 86400.0)', **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='UNIX_TIMESTAMP(%(expressions)s)', **extra_context)
+
+
+def time_bound(value):
+    """Aware datetime from an ISO 8601 date or date and time (UTC when no offset is given), or None"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = None if day is None else datetime.datetime.combine(day, datetime.time())
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+    return parsed
+
+
+def requested_dataset_ids(request):
+    """Distinct integer ids from `?ids=1,2,3` in the given order, or None when malformed"""
+    values = [value.strip() for value in request.query_params.get('ids', '').split(',') if value.strip()]
+    try:
+        return list(dict.fromkeys(int(value) for value in values))
+    except ValueError:
+        return None
+
+
+def summary_payload(dataset):
+    """The /summary/ representation of a dataset, from its stored summary"""
+    summary = dataset.summary_json or {}
+    payload = {
+        'dataset_id': dataset.id,
+        'filename': dataset.filename,
+        'total_count': summary.get('total_equipment_count', 0),
+        'averages': {
+            'flowrate': summary.get('average_flowrate', 0),
+            'pressure': summary.get('average_pressure', 0),
+            'temperature': summary.get('average_temperature', 0)
+        },
+        'type_distribution': summary.get('equipment_type_distribution', {})
+    }
+    if dataset.extra_fields:
+        extra = summary.get('extra_fields', {})
+        payload['extra_fields'] = {
+            key: {'label': label, **extra.get(key, {})} for key, label in dataset.extra_fields.items()
+        }
+    return payload
+
+
+def rounded(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+def field_mean(stats, field):
+    """Mean of `field` in per-type aggregates (see EquipmentDataset.type_aggregates), None without values"""
+    count = stats.get('counts', {}).get(field, stats['count'])
+    return stats['sums'][field] / count if count else None
+
+
+def type_averages_by_dataset(datasets):
+    """{dataset id: {type name: {field: mean}}}, types sorted by name; extra fields included"""
+    fields = {dataset.id: [*NUMERIC_FIELDS, *dataset.extra_fields] for dataset in datasets}
+    return {
+        dataset_id: {
+            label: {field: field_mean(stats, field) for field in fields[dataset_id]}
+            for label, stats in types.items()
+        }
+        for dataset_id, types in EquipmentDataset.type_aggregates(datasets).items()
+    }
+
+
+def chart_payload(type_averages, extra_fields=None):
+    """chart_data representation of per-type averages; `extra_fields` maps extra field keys to labels"""
+    payload = {
+        'labels': list(type_averages),
+        **{field: [round(row[field], 2) for row in type_averages.values()] for field in NUMERIC_FIELDS}
+    }
+    if extra_fields:
+        payload['extra'] = {
+            key: {
+                'label': label,
+                'values': [rounded(row[key]) for row in type_averages.values()],
+            }
+            for key, label in extra_fields.items()
+        }
+    return payload
+
+
+def first_item_pages(request, dataset_ids, fields):
+    """
+    {dataset id: first page of /api/equipment/?dataset=<id>} for several
+    datasets, from one count query and one ROW_NUMBER() windowed query.
+    """
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    counts = dict(
+        EquipmentItem.objects.filter(dataset_id__in=dataset_ids).order_by()
+        .values_list('dataset_id').annotate(count=models.Count('id'))
+    )
+    ranked = (
+        EquipmentItem.objects
+        .filter(dataset_id__in=dataset_ids)
+        .annotate(position=models.Window(
+            RowNumber(), partition_by=[models.F('dataset_id')], order_by=ITEM_ORDERING
+        ))
+        .filter(position__lte=page_size)
+        .order_by('dataset_id', 'position')
+    )
+    results = {dataset_id: [] for dataset_id in dataset_ids}
+    if fields is None:
+        for item in ranked.select_related('type'):
+            results[item.dataset_id].append(item)
+        results = {
+            dataset_id: EquipmentItemSerializer(items, many=True).data for dataset_id, items in results.items()
+        }
+    else:
+        rows = ranked.values_list('dataset_id', *(ITEM_FIELD_LOOKUPS.get(name, name) for name in fields))
+        for row in rows:
+            results[row[0]].append(row[1:])
+        results = {dataset_id: sparse_items(rows, fields) for dataset_id, rows in results.items()}
+
+    list_url = request.build_absolute_uri(reverse('equipment-list'))
+    pages = {}
+    for dataset_id in dataset_ids:
+        count = counts.get(dataset_id, 0)
+        next_url = None
+        if count > page_size:
+            next_url = replace_query_param(list_url, 'dataset', dataset_id)
+            if fields is not None:
+                next_url = replace_query_param(next_url, 'fields', ','.join(fields))
+            next_url = replace_query_param(next_url, 'page', 2)
+        pages[dataset_id] = {'count': count, 'next': next_url, 'previous': None, 'results': results[dataset_id]}
+    return pages
+
+
+def requested_item_fields(request):
+    """
+    Item fields listed in `?fields=a,b`, or None for all of them.
+
+    Returns (fields, None), or (None, 400 Response) naming the unknown fields.
+    """
+    param = request.query_params.get('fields')
+    if param is None:
+        return None, None
+    fields = list(dict.fromkeys(name.strip() for name in param.split(',') if name.strip()))
+    available = EquipmentItemSerializer.Meta.fields
+    unknown = [name for name in fields if name not in available]
+    if unknown or not fields:
+        return None, Response(
+            {'error': f"Unknown fields: {', '.join(unknown) or '(none given)'}.", 'available_fields': available},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return fields, None
+
+
+# Order of items in the equipment list (ties broken by id so pages are stable)
+ITEM_ORDERING = [models.F('created_at').desc(), models.F('id').asc()]
+
+# Item fields read through a relation
+ITEM_FIELD_LOOKUPS = {'type': 'type__name', 'dataset': 'dataset_id'}
+
+
+def project_items(queryset, fields):
+    """Rows of just the columns behind `fields`, via .values_list() (the type is joined only if asked for)"""
+    return queryset.select_related(None).values_list(*(ITEM_FIELD_LOOKUPS.get(name, name) for name in fields))
+
+
+def sparse_items(rows, fields):
+    """
+    Item dicts from `project_items` rows, formatted like EquipmentItemSerializer
+    but without building a model instance or serializer per item.
+    """
+    items = [dict(zip(fields, row)) for row in rows]
+    serializer_fields = EquipmentItemSerializer().fields
+    for name in ('created_at', 'ts'):
+        if name in fields:
+            field = serializer_fields[name]
+            for item in items:
+                item[name] = field.to_representation(item[name])
+    return items
+
+
+def serialize_items(items, fields):
+    """All items of a queryset, with every field or only `fields`"""
+    if fields is None:
+        return EquipmentItemSerializer(items, many=True).data
+    return sparse_items(project_items(items, fields), fields)
+
+
+def parse_uploaded_file(request):
+    """
+    Parse and validate the uploaded `file` of a request.
+
+    Returns (ParseResult, None), or (None, 400 Response) when the file is
+    missing, of an unsupported type, malformed or has invalid rows. Shared by
+    the upload endpoint and the dataset append action.
+    """
+    sniffer = SniffingUploadHandler(request, max_size=settings.UPLOAD_MAX_BYTES)
+    # Must run ahead of Django's handlers, i.e. before the body is first parsed
+    request.upload_handlers.insert(0, sniffer)
+    with phase(request, 'receive'):
+        files = request.FILES
+    if sniffer.error_response() is not None:
+        return None, sniffer.error_response()
+
+    if 'file' not in files:
+        return None, Response(
+            {'error': 'No file provided. Please upload a CSV file.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    csv_file = request.FILES['file']
+
+    # Validate file extension
+    if detect_format(csv_file.name) is None:
+        return None, Response(
+            {'error': 'Invalid file type. Please upload a CSV file (.csv, .csv.gz, .csv.zst) or a Parquet file.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Large uploads are spooled to disk; hand parsers the path so they can read it natively
+    if hasattr(csv_file, 'temporary_file_path'):
+        source = csv_file.temporary_file_path()
+    else:
+        source = csv_file.file
+
+    try:
+        with phase(request, 'parse'):
+            result = parse_equipment_file(
+                source, csv_file.name, engine=settings.CSV_PARSER_ENGINE, size=csv_file.size
+            )
+    except MissingColumnsError as e:
+        return None, Response(
+            {
+                'error': str(e),
+                'required_columns': REQUIRED_COLUMNS,
+                'found_columns': e.found
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except (EmptyCSVError, UnicodeDecodeError):
+        return None, Response(
+            {'error': 'The CSV file is empty or invalid.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except CSVFormatError as e:
+        return None, Response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    with phase(request, 'validate'):
+        if result.errors:
+            return None, Response(
+                {
+                    'error': 'Data validation failed',
+                    'errors': result.errors  # Limited to the first 10 errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    return result, None
+
+
 class RegisterView(APIView):
     """User registration endpoint"""
     permission_classes = [AllowAny]
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+"""
+HTTP load generator for the equipment API.
+
+Simulates concurrent dashboard users against a running server: each virtual
+user logs in through /api/auth/login/ and then replays a weighted mix of
+history polling, dataset selection (items + chart_data) and CSV uploads.
+Reports throughput, p50/p95/p99 latency per endpoint, error rate and SQLite
+lock-timeout rate.
+
+Only the standard library is used for HTTP (asyncio streams, HTTP/1.1
+keep-alive). Upload payloads come from equipment_api.synthetic.
+
+Run (with the server started via `python manage.py runserver`):
+    python loadtest.py --username admin --password secret --users 20 --duration 60
+    python loadtest.py ... --mix history=60,select=35,upload=5 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from equipment_api.synthetic import generate_csv_bytes
+
+
+DEFAULT_MIX = 'history=70,select=25,upload=5'
+LOCK_MARKERS = (b'database is locked', b'database table is locked')
+# Requests that may be retried on a new connection without side effects
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+class HTTPError(Exception):
+    pass
+
+
+class Connection:
+    """Minimal persistent HTTP/1.1 connection on asyncio streams"""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=b''):
+        """
+        Send one request and return (status, body).
+
+        A kept-alive socket the server has closed fails on first use, so
+        idempotent requests are retried once on a new connection. Others
+        (uploads) are not: the server may already have processed them.
+        Connection failures are raised as HTTPError.
+        """
+        attempts = 2 if method in IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout
+                )
+            try:
+                return await asyncio.wait_for(self._exchange(method, path, headers or {}, body), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, HTTPError) as exc:
+                await self.close()
+                if attempt == attempts - 1:
+                    raise HTTPError(f'{method} {path}: {exc!r}') from exc
+        raise HTTPError('unreachable')
+
+    async def _exchange(self, method, path, headers, body):
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                 f'Content-Length: {len(body)}', 'Connection: keep-alive']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HTTPError('connection closed')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            content = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            content = await self.reader.readexactly(int(response_headers['content-length']))
+        else:
+            content = await self.reader.read()
+            await self.close()
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+
+class Stats:
+    """Latency samples and outcome counters per endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock_timeouts = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint, seconds, status, body=b''):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+        if status == 0 or status >= 400:
+            self.errors[endpoint] += 1
+        if any(marker in body for marker in LOCK_MARKERS):
+            self.lock_timeouts[endpoint] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            endpoints[endpoint] = {
+                'requests': len(ordered),
+                'throughput_rps': len(ordered) / elapsed,
+                'p50_ms': percentile(ordered, 50) * 1000,
+                'p95_ms': percentile(ordered, 95) * 1000,
+                'p99_ms': percentile(ordered, 99) * 1000,
+                'max_ms': ordered[-1] * 1000,
+                'error_rate': self.errors[endpoint] / len(ordered),
+                'lock_timeout_rate': self.lock_timeouts[endpoint] / len(ordered),
+                'statuses': {str(code): count for code, count in sorted(self.statuses[endpoint].items())},
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            'elapsed_seconds': elapsed,
+            'total_requests': total,
+            'throughput_rps': total / elapsed if elapsed else 0,
+            'error_rate': sum(self.errors.values()) / total if total else 0,
+            'lock_timeout_rate': sum(self.lock_timeouts.values()) / total if total else 0,
+            'endpoints': endpoints,
+        }
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in filter(None, text.split(',')):
+        name, _, weight = part.partition('=')
+        if name not in ('history', 'select', 'upload'):
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError('The mix needs at least one scenario with a positive weight')
+    return mix
+
+
+def multipart_body(filename, payload):
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        'Content-Type: text/csv\r\n\r\n'
+    ).encode() + payload + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+class VirtualUser:
+    def __init__(self, number, options, stats, upload_payload):
+        url = urlsplit(options.base_url)
+        self.prefix = url.path.rstrip('/')
+        self.connection = Connection(url.hostname, url.port or 80, options.timeout)
+        self.number = number
+        self.options = options
+        self.stats = stats
+        self.upload_payload = upload_payload
+        self.token = None
+        self.dataset_ids = []
+        self.rng = random.Random(options.seed + number)
+
+    async def call(self, endpoint, method, path, body=b'', content_type='application/json'):
+        headers = {'Accept': 'application/json', 'Content-Type': content_type}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        started = time.perf_counter()
+        try:
+            status, content = await self.connection.request(method, self.prefix + path, headers, body)
+        except (OSError, EOFError, asyncio.TimeoutError, HTTPError, ValueError):
+            self.stats.record(endpoint, time.perf_counter() - started, 0)
+            await self.connection.close()
+            return 0, b''
+        self.stats.record(endpoint, time.perf_counter() - started, status, content)
+        return status, content
+
+    async def login(self):
+        body = json.dumps({'username': self.options.username, 'password': self.options.password}).encode()
+        status, content = await self.call('login', 'POST', '/auth/login/', body)
+        if status != 200:
+            raise SystemExit(f'Login failed for virtual user {self.number} (HTTP {status}): {content[:200]!r}')
+        self.token = json.loads(content)['token']
+
+    async def history(self):
+        status, content = await self.call('datasets', 'GET', '/datasets/')
+        if status == 200:
+            self.dataset_ids = [dataset['id'] for dataset in json.loads(content)]
+
+    async def select(self):
+        if not self.dataset_ids:
+            await self.history()
+        if self.dataset_ids:
+            dataset_id = self.rng.choice(self.dataset_ids)
+            await self.call('items', 'GET', f'/datasets/{dataset_id}/items/')
+            await self.call('chart_data', 'GET', f'/datasets/{dataset_id}/chart_data/')
+
+    async def upload(self):
+        body, content_type = multipart_body(f'loadtest_{self.number}.csv', self.upload_payload)
+        await self.call('upload', 'POST', '/upload/', body, content_type)
+
+    async def run(self, deadline, mix):
+        scenarios = list(mix)
+        weights = [mix[name] for name in scenarios]
+        await self.login()
+        try:
+            while time.monotonic() < deadline:
+                await getattr(self, self.rng.choices(scenarios, weights)[0])()
+                if self.options.think_time:
+                    await asyncio.sleep(self.rng.uniform(0, 2 * self.options.think_time))
+        finally:
+            await self.connection.close()
+
+
+async def run_load(options):
+    stats = Stats()
+    payload = generate_csv_bytes(options.upload_rows, seed=options.seed)
+    users = [VirtualUser(number, options, stats, payload) for number in range(options.users)]
+    started = time.monotonic()
+    deadline = started + options.duration
+
+    async def start(user):
+        # Ramp users up evenly instead of logging everyone in at once
+        await asyncio.sleep(options.ramp_up * user.number / max(1, options.users))
+        await user.run(deadline, options.mix)
+
+    await asyncio.gather(*(start(user) for user in users))
+    return stats.report(time.monotonic() - started)
+
+
+def print_report(report):
+    print(f"\n{report['total_requests']} requests in {report['elapsed_seconds']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s), "
+          f"errors {report['error_rate']:.2%}, lock timeouts {report['lock_timeout_rate']:.2%}\n")
+    print(f"{'endpoint':<12}{'reqs':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'errors':>9}{'locks':>8}")
+    for endpoint, stats in report['endpoints'].items():
+        print(f"{endpoint:<12}{stats['requests']:>7}{stats['throughput_rps']:>9.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+              f"{stats['error_rate']:>9.1%}{stats['lock_timeout_rate']:>8.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000/api')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users (default: 10)')
+    parser.add_argument('--duration', type=float, default=30, help='Test length in seconds (default: 30)')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds to start all users (default: 5)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Weighted scenarios (default: {DEFAULT_MIX})')
+    parser.add_argument('--think-time', type=float, default=0.5,
+                        help='Mean pause between user actions in seconds (default: 0.5)')
+    parser.add_argument('--upload-rows', type=int, default=1000, help='Rows per uploaded CSV (default: 1000)')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='Also write the report to this JSON file')
+    options = parser.parse_args(argv)
+
+    if urlsplit(options.base_url).scheme != 'http':
+        parser.error('Only plain http:// base URLs are supported')
+
+    report = asyncio.run(run_load(options))
+    print_report(report)
+    if options.json_path:
+        with open(options.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['total_requests'] == 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def staff_user(db):
+    return User.objects.create_user('tester', password='test-password', is_staff=True)
+
+
+@pytest.fixture
+def api_client(staff_user):
+    client = APIClient()
+    client.force_authenticate(user=staff_user)
+    return client
+
+
+@pytest.fixture
+def upload_frame(api_client):
+    """
+    POST a DataFrame as a CSV file to /api/upload/, or to `url` (e.g. an
+    append endpoint), with any extra form fields; returns the response.
+    """
+    def upload(frame, url='/api/upload/', name='equipment.csv', **data):
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False)
+        upload = SimpleUploadedFile(name, buffer.getvalue().encode('utf-8'), content_type='text/csv')
+        return api_client.post(url, {'file': upload, **data}, format='multipart')
+    return upload
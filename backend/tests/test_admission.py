@@ -0,0 +1,74 @@
+"""
+Upload admission control: concurrency and in-flight byte limits, 429 responses.
+"""
+import threading
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from equipment_api.admission import AdmissionRejected, UploadAdmission, reset_upload_admission, upload_admission
+from equipment_api.synthetic import generate_csv_bytes
+
+
+@pytest.fixture(autouse=True)
+def fresh_admission():
+    reset_upload_admission()
+    yield
+    reset_upload_admission()
+
+
+def test_concurrency_limit():
+    admission = UploadAdmission(max_concurrent=1, max_bytes=1000, queue_timeout=0, retry_after=3)
+    with admission.admit(10):
+        with pytest.raises(AdmissionRejected) as rejected:
+            admission.acquire(10)
+        assert rejected.value.retry_after == 3
+    with admission.admit(10):
+        assert admission.active == 1
+    assert admission.active == 0 and admission.active_bytes == 0
+
+
+def test_byte_limit_admits_oversized_request_alone():
+    admission = UploadAdmission(max_concurrent=4, max_bytes=100, queue_timeout=0, retry_after=1)
+    with admission.admit(500):
+        with pytest.raises(AdmissionRejected):
+            admission.acquire(1)
+    with admission.admit(60):
+        with pytest.raises(AdmissionRejected):
+            admission.acquire(60)
+        with admission.admit(40):
+            assert admission.active_bytes == 100
+
+
+def test_queued_request_admitted_on_release():
+    admission = UploadAdmission(max_concurrent=1, max_bytes=100, queue_timeout=5, retry_after=1)
+    admission.acquire(10)
+    admitted = threading.Event()
+
+    def waiter():
+        with admission.admit(10):
+            admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not admitted.wait(0.1)
+    admission.release(10)
+    thread.join(5)
+    assert admitted.is_set()
+
+
+def test_upload_rejected_with_retry_after(api_client, settings):
+    settings.UPLOAD_MAX_CONCURRENT_INGESTS = 1
+    settings.UPLOAD_QUEUE_TIMEOUT = 0
+    settings.UPLOAD_RETRY_AFTER = 7
+    upload = SimpleUploadedFile('busy.csv', generate_csv_bytes(20, seed=1), content_type='text/csv')
+    with upload_admission().admit(0):
+        response = api_client.post('/api/upload/', {'file': upload}, format='multipart')
+    assert response.status_code == 429
+    assert response['Retry-After'] == '7'
+    assert response.json()['retry_after'] == 7
+
+    upload.seek(0)
+    response = api_client.post('/api/upload/', {'file': upload}, format='multipart')
+    assert response.status_code == 201
+    assert upload_admission().active == 0
@@ -0,0 +1,95 @@
+"""
+Appending rows merges the stored summary state instead of rescanning items;
+the result must match a dataset uploaded in one go.
+"""
+import pytest
+
+from equipment_api import views
+from equipment_api.models import DatasetEvent, EquipmentDataset
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture
+def frames():
+    frame = generate_frame(3_000, seed=5, type_count=12)
+    return frame, frame.iloc[:2_000], frame.iloc[2_000:]
+
+
+def upload(upload_frame, frame):
+    response = upload_frame(frame)
+    assert response.status_code == 201, response.content
+    return response.json()['dataset_id']
+
+
+def test_append_matches_single_upload(api_client, upload_frame, frames):
+    whole, head, tail = frames
+    dataset_id = upload(upload_frame, head)
+
+    response = upload_frame(tail, url=f'/api/datasets/{dataset_id}/append/')
+    assert response.status_code == 200, response.content
+    assert response.json()['appended_count'] == 1_000
+
+    reference_id = upload(upload_frame, whole)
+    appended = EquipmentDataset.objects.get(pk=dataset_id)
+    reference = EquipmentDataset.objects.get(pk=reference_id)
+    assert appended.summary_json == reference.summary_json
+    assert appended.equipment_items.count() == 3_000
+    assert (api_client.get(f'/api/datasets/{dataset_id}/chart_data/').json()
+            == api_client.get(f'/api/datasets/{reference_id}/chart_data/').json())
+    assert DatasetEvent.objects.filter(kind=DatasetEvent.UPDATED, dataset_id=dataset_id).exists()
+
+
+def test_append_rebuilds_missing_state(api_client, upload_frame, frames):
+    whole, head, tail = frames
+    dataset_id = upload(upload_frame, head)
+    EquipmentDataset.objects.filter(pk=dataset_id).update(summary_state={})
+    sql_chart = api_client.get(f'/api/datasets/{dataset_id}/chart_data/').json()
+
+    upload_frame(tail, url=f'/api/datasets/{dataset_id}/append/')
+    reference_id = upload(upload_frame, whole)
+    assert (EquipmentDataset.objects.get(pk=dataset_id).summary_json
+            == EquipmentDataset.objects.get(pk=reference_id).summary_json)
+
+    # The SQL fallback and the stored per-type averages agree
+    EquipmentDataset.objects.filter(pk=reference_id).update(summary_state={})
+    assert sql_chart['labels'] == sorted(head['Type'].unique().tolist())
+    state_chart = api_client.get(f'/api/datasets/{dataset_id}/chart_data/').json()
+    assert state_chart == api_client.get(f'/api/datasets/{reference_id}/chart_data/').json()
+
+
+def test_editing_items_invalidates_state(api_client, upload_frame, frames):
+    _, head, _ = frames
+    dataset_id = upload(upload_frame, head)
+    item = EquipmentDataset.objects.get(pk=dataset_id).equipment_items.first()
+
+    response = api_client.delete(f'/api/equipment/{item.id}/')
+    assert response.status_code == 204
+    assert EquipmentDataset.objects.get(pk=dataset_id).summary_state == {}
+
+
+def test_failed_item_create_rolls_back(api_client, upload_frame, frames, monkeypatch):
+    _, head, _ = frames
+    dataset_id = upload(upload_frame, head)
+    dataset = EquipmentDataset.objects.get(pk=dataset_id)
+
+    def fail(queryset):
+        raise RuntimeError('limits unavailable')
+    monkeypatch.setattr(views, 'recheck_violations', fail)
+    with pytest.raises(RuntimeError):
+        api_client.post('/api/equipment/', {
+            'dataset': dataset_id, 'equipment_name': 'Extra', 'type': head['Type'].iloc[0],
+            'flowrate': 1.0, 'pressure': 2.0, 'temperature': 3.0,
+        }, format='json')
+    dataset.refresh_from_db()
+    assert dataset.equipment_items.count() == len(head)
+    assert dataset.summary_state != {} and dataset.columns_version == 0
+
+
+def test_append_rejects_invalid_rows(api_client, upload_frame, frames):
+    _, head, tail = frames
+    dataset_id = upload(upload_frame, head)
+    dirty = generate_frame(100, seed=1, dirty_fraction=0.5)
+
+    response = upload_frame(dirty, url=f'/api/datasets/{dataset_id}/append/')
+    assert response.status_code == 400
+    assert EquipmentDataset.objects.get(pk=dataset_id).equipment_items.count() == 2_000
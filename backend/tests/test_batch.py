@@ -0,0 +1,99 @@
+"""
+/api/datasets/batch/ returns several datasets' summary, chart data and first
+item page with a query count that does not grow with the number of datasets.
+"""
+import numpy as np
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from equipment_api.models import EquipmentDataset
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture
+def dataset_ids(upload_frame):
+    ids = [
+        upload_frame(generate_frame(rows, seed=seed), name=f'batch-{seed}.csv').json()['dataset_id']
+        for seed, rows in enumerate([150, 40, 120, 10])
+    ]
+    # Datasets without stored per-type totals take the GROUP BY path
+    EquipmentDataset.objects.filter(pk__in=ids[2:]).update(summary_state={})
+    return ids
+
+
+def batch(api_client, ids, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get('/api/datasets/batch/', {'ids': ','.join(map(str, ids)), **params})
+    assert response.status_code == 200
+    return response.json(), len(queries)
+
+
+def test_batch_matches_individual_endpoints(api_client, dataset_ids):
+    data, _ = batch(api_client, dataset_ids + [999999])
+    assert [entry['id'] for entry in data['datasets']] == dataset_ids
+    assert data['missing'] == [999999]
+    for entry in data['datasets']:
+        dataset_id = entry['id']
+        assert entry['summary'] == api_client.get(f'/api/datasets/{dataset_id}/summary/').json()
+        assert entry['chart_data'] == api_client.get(f'/api/datasets/{dataset_id}/chart_data/').json()
+        page = api_client.get('/api/equipment/', {'dataset': dataset_id}).json()
+        assert entry['items_page']['results'] == page['results']
+        assert entry['items_page']['count'] == page['count']
+        assert (entry['items_page']['next'] is None) == (page['next'] is None)
+        if page['next']:
+            second = api_client.get(entry['items_page']['next']).json()
+            assert second['results'] == api_client.get(page['next']).json()['results']
+
+
+def test_batch_sparse_items_page(api_client, dataset_ids):
+    data, _ = batch(api_client, dataset_ids, include='items_page', fields='type,flowrate')
+    for entry in data['datasets']:
+        assert set(entry) == {'id', 'filename', 'uploaded_at', 'items_page'}
+        page = api_client.get('/api/equipment/', {'dataset': entry['id'], 'fields': 'type,flowrate'}).json()
+        assert entry['items_page']['results'] == page['results']
+        if entry['items_page']['next']:
+            assert 'fields=type%2Cflowrate' in entry['items_page']['next']
+
+
+def test_batch_query_count_is_fixed(api_client, dataset_ids):
+    _, one = batch(api_client, dataset_ids[2:3])
+    _, many = batch(api_client, dataset_ids)
+    assert one == many
+
+
+@pytest.fixture
+def extra_field_ids(upload_frame, settings, tmp_path, django_capture_on_commit_callbacks):
+    """Datasets with an extra field and no stored totals, in both storages"""
+    settings.MEDIA_ROOT = tmp_path
+    ids = []
+    for seed, storage in enumerate([EquipmentDataset.ROWS, EquipmentDataset.COLUMN_CACHE] * 2):
+        frame = generate_frame(60 + 20 * seed, seed=seed, type_count=4)
+        frame['Power kW'] = np.random.default_rng(seed).integers(5, 500, len(frame))
+        with django_capture_on_commit_callbacks(execute=True):
+            response = upload_frame(frame, name=f'extra-{seed}.csv', storage=storage)
+        ids.append(response.json()['dataset_id'])
+    EquipmentDataset.objects.filter(pk__in=ids).update(summary_state={})
+    return ids
+
+
+def test_batch_stale_extra_fields_in_fixed_queries(api_client, extra_field_ids):
+    _, one = batch(api_client, extra_field_ids[:1], include='summary,chart_data')
+    data, many = batch(api_client, extra_field_ids, include='summary,chart_data')
+    assert one == many
+    for entry in data['datasets']:
+        summary = entry['summary']
+        assert summary['extra_fields']['power_kw']['count'] == summary['total_count']
+        assert summary == api_client.get(f'/api/datasets/{entry["id"]}/summary/').json()
+        assert entry['chart_data'] == api_client.get(f'/api/datasets/{entry["id"]}/chart_data/').json()
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'ids': 'a,b'},
+    {'ids': ','.join(str(i) for i in range(1, 30))},
+    {'ids': '1', 'include': 'summary,secrets'},
+    {'ids': '1', 'fields': 'secret'},
+])
+def test_batch_rejects_bad_parameters(api_client, params):
+    assert api_client.get('/api/datasets/batch/', params).status_code == 400
@@ -0,0 +1,48 @@
+"""
+Endpoint benchmarks at synthetic dataset scales.
+
+    BENCHMARK_SCALES=1k,100k,1m BENCHMARK_OUTPUT=results.json pytest -m benchmark
+
+Defaults to the 1k scale so the suite stays quick; results are written as JSON
+in the same format as `manage.py benchmark`.
+"""
+import os
+
+import pytest
+
+from equipment_api.benchmarks import BenchmarkRunner, benchmark_parsers, parse_scales, write_results
+from equipment_api.parsers import available_engines
+
+
+SCALES = parse_scales(os.environ.get('BENCHMARK_SCALES', '1k'))
+ENDPOINTS = ['upload', 'chart_data', 'summary', 'items', 'stats', 'delete']
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('label,rows', SCALES, ids=[label for label, _ in SCALES])
+def test_benchmark_scale(api_client, tmp_path, label, rows):
+    runner = BenchmarkRunner(api_client, repeat=int(os.environ.get('BENCHMARK_REPEAT', 1)))
+    results = runner.run([(label, rows)])
+
+    output = os.environ.get('BENCHMARK_OUTPUT')
+    path = write_results(results, output.replace('.json', f'-{label}.json') if output else tmp_path / 'benchmark.json')
+    assert path.exists()
+
+    endpoints = results['results'][0]['endpoints']
+    assert list(endpoints) == ENDPOINTS
+    assert endpoints['upload']['statuses'] == [201]
+    assert endpoints['delete']['statuses'] == [204]
+    for name in ('chart_data', 'summary', 'items', 'stats'):
+        assert endpoints[name]['statuses'] == [200], name
+
+
+@pytest.mark.benchmark
+def test_benchmark_parsers(tmp_path):
+    results = benchmark_parsers(SCALES, repeat=int(os.environ.get('BENCHMARK_REPEAT', 1)))
+    write_results(results, tmp_path / 'parsers.json')
+
+    for result in results['results']:
+        assert set(result['engines']) == set(available_engines())
+        for engine, stats in result['engines'].items():
+            assert stats['rows_per_second'] > 0, engine
+            assert stats['peak_memory_bytes'] > 0, engine
@@ -0,0 +1,141 @@
+"""
+Column cache storage mode: column files, and the histogram and export endpoints
+that read them (checked against the same endpoints on row storage).
+"""
+import csv
+import io
+
+import numpy as np
+import pytest
+
+from equipment_api.columnar import ColumnStore
+from equipment_api.models import EquipmentDataset, EquipmentItem
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def frame():
+    return generate_frame(500, seed=8)
+
+
+def upload(upload_frame, frame, storage, capture):
+    with capture(execute=True):
+        response = upload_frame(frame, name=f'{storage}.csv', storage=storage)
+    assert response.status_code == 201
+    return EquipmentDataset.objects.get(pk=response.json()['dataset_id'])
+
+
+def test_store_round_trip(tmp_path, frame):
+    store = ColumnStore.from_columns(
+        frame['Equipment Name'], np.arange(len(frame)) % 3,
+        frame['Flowrate'], frame['Pressure'], frame['Temperature']
+    )
+    for compress in (False, True):
+        store.save(tmp_path / 'store', compress=compress)
+        loaded = ColumnStore.load(tmp_path / 'store')
+        assert len(loaded) == len(frame)
+        assert loaded.names() == frame['Equipment Name'].tolist()
+        assert loaded.names(10, 12) == frame['Equipment Name'][10:12].tolist()
+        np.testing.assert_array_equal(loaded.pressure, frame['Pressure'])
+    assert isinstance(ColumnStore.load(tmp_path / 'store').flowrate, np.ndarray)
+
+    doubled = store.concat(store)
+    assert doubled.names(len(frame) - 1, len(frame) + 1) == frame['Equipment Name'].iloc[[-1, 0]].tolist()
+
+
+def test_column_cache_upload_writes_store(api_client, upload_frame, frame, django_capture_on_commit_callbacks):
+    dataset = upload(upload_frame, frame, 'column_cache', django_capture_on_commit_callbacks)
+    assert dataset.storage == EquipmentDataset.COLUMN_CACHE
+    store = ColumnStore.load(dataset.columns_path)
+    assert isinstance(store.flowrate, np.memmap)
+    assert store.names() == frame['Equipment Name'].tolist()
+    # The row table is still there for name-level queries
+    assert EquipmentItem.objects.filter(dataset=dataset).count() == len(frame)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.delete(f'/api/datasets/{dataset.id}/')
+    assert not dataset.columns_path.exists()
+
+
+def test_endpoints_match_row_storage(api_client, upload_frame, frame, django_capture_on_commit_callbacks):
+    rows = upload(upload_frame, frame, 'rows', django_capture_on_commit_callbacks)
+    cached = upload(upload_frame, frame, 'column_cache', django_capture_on_commit_callbacks)
+    assert not rows.columns_path.exists()
+    EquipmentDataset.objects.filter(pk__in=[rows.pk, cached.pk]).update(summary_state={})
+
+    chart = [api_client.get(f'/api/datasets/{d.id}/chart_data/').json() for d in (rows, cached)]
+    assert chart[0]['labels'] == chart[1]['labels']
+    for field in ('flowrate', 'pressure', 'temperature'):
+        # SQL AVG and NumPy sums may round the last digit differently
+        assert chart[0][field] == pytest.approx(chart[1][field], abs=0.011)
+
+    eq_type = frame.loc[0, 'Type']
+    for params in ({'field': 'pressure', 'bins': 15}, {'field': 'temperature', 'type': eq_type}):
+        histograms = [api_client.get(f'/api/datasets/{d.id}/histogram/', params).json() for d in (rows, cached)]
+        assert histograms[0]['counts'] == histograms[1]['counts']
+        assert histograms[0]['edges'] == pytest.approx(histograms[1]['edges'])
+    assert sum(histograms[1]['counts']) == (frame['Type'] == eq_type).sum()
+
+    exports = []
+    for dataset in (rows, cached):
+        response = api_client.get(f'/api/datasets/{dataset.id}/export/')
+        assert response['Content-Type'] == 'text/csv'
+        exports.append(list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode()))))
+    assert exports[0] == exports[1]
+    assert exports[0][0] == list(frame.columns) and len(exports[0]) == len(frame) + 1
+
+
+def test_item_edit_rebuilds_store(api_client, upload_frame, frame, django_capture_on_commit_callbacks):
+    dataset = upload(upload_frame, frame, 'column_cache', django_capture_on_commit_callbacks)
+    item = EquipmentItem.objects.filter(dataset=dataset).order_by('id').first()
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.patch(f'/api/equipment/{item.id}/', {'flowrate': 12345.0}, format='json')
+    assert not dataset.columns_path.exists()
+
+    histogram = api_client.get(f'/api/datasets/{dataset.id}/histogram/', {'field': 'flowrate'}).json()
+    assert histogram['edges'][-1] == 12345.0
+    dataset.refresh_from_db()
+    assert ColumnStore.load(dataset.columns_path).flowrate[0] == 12345.0
+
+
+def test_append_extends_store(api_client, upload_frame, frame, django_capture_on_commit_callbacks):
+    dataset = upload(upload_frame, frame, 'column_cache', django_capture_on_commit_callbacks)
+    extra = generate_frame(40, seed=9, start=len(frame))
+    with django_capture_on_commit_callbacks(execute=True):
+        response = upload_frame(extra, url=f'/api/datasets/{dataset.id}/append/')
+    assert response.status_code == 200
+    dataset.refresh_from_db()
+    store = ColumnStore.load(dataset.columns_path)
+    assert store.names() == frame['Equipment Name'].tolist() + extra['Equipment Name'].tolist()
+    assert [path.name for path in dataset.columns_path.parent.iterdir()] == ['1']
+
+
+def test_store_saved_after_item_edit_is_not_read(
+    api_client, upload_frame, frame, django_capture_on_commit_callbacks
+):
+    dataset = upload(upload_frame, frame, 'column_cache', django_capture_on_commit_callbacks)
+    # An append's store is written after its commit; an item edit commits in between
+    with django_capture_on_commit_callbacks() as append_callbacks:
+        upload_frame(generate_frame(40, seed=9, start=len(frame)), url=f'/api/datasets/{dataset.id}/append/')
+    item = EquipmentItem.objects.filter(dataset=dataset).order_by('id').first()
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.patch(f'/api/equipment/{item.id}/', {'flowrate': 12345.0}, format='json')
+    for callback in append_callbacks:
+        callback()
+
+    histogram = api_client.get(f'/api/datasets/{dataset.id}/histogram/', {'field': 'flowrate'}).json()
+    assert histogram['edges'][-1] == 12345.0 and sum(histogram['counts']) == len(frame) + 40
+
+
+def test_histogram_validation(api_client, upload_frame, frame, django_capture_on_commit_callbacks):
+    dataset = upload(upload_frame, frame, 'rows', django_capture_on_commit_callbacks)
+    url = f'/api/datasets/{dataset.id}/histogram/'
+    assert api_client.get(url, {'field': 'id'}).status_code == 400
+    assert api_client.get(url, {'bins': 0}).status_code == 400
+    assert api_client.get(url, {'type': 'Nope'}).json()['counts'] == []
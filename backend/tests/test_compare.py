@@ -0,0 +1,56 @@
+"""
+/api/datasets/compare/ lines up per-type aggregates of several datasets in
+one dense matrix, from stored totals or a single GROUP BY.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from equipment_api.models import EquipmentDataset, EquipmentItem
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture
+def dataset_ids(upload_frame):
+    ids = [
+        upload_frame(generate_frame(rows, seed=seed), name=f'compare-{seed}.csv').json()['dataset_id']
+        for seed, rows in enumerate([200, 60, 5])
+    ]
+    # One dataset without stored totals, aggregated from its items
+    EquipmentDataset.objects.filter(pk=ids[1]).update(summary_state={})
+    return ids
+
+
+def test_compare_matrix_matches_items(api_client, dataset_ids):
+    data = api_client.get('/api/datasets/compare/').json()
+    assert [dataset['id'] for dataset in data['datasets']] == dataset_ids
+    assert data['types'] == sorted(data['types'])
+    assert data['metrics'][:4] == ['count', 'flowrate_mean', 'flowrate_min', 'flowrate_max']
+    assert len(data['values']) == len(dataset_ids)
+    assert all(len(rows) == len(data['types']) for rows in data['values'])
+
+    for dataset_id, rows in zip(dataset_ids, data['values']):
+        chart = api_client.get(f'/api/datasets/{dataset_id}/chart_data/').json()
+        for label, row in zip(data['types'], rows):
+            metrics = dict(zip(data['metrics'], row))
+            items = EquipmentItem.objects.filter(dataset_id=dataset_id, type__name=label)
+            assert metrics['count'] == items.count()
+            if not metrics['count']:
+                assert metrics['pressure_mean'] is None and label not in chart['labels']
+                continue
+            pressures = list(items.values_list('pressure', flat=True))
+            assert metrics['pressure_min'] == round(min(pressures), 2)
+            assert metrics['pressure_max'] == round(max(pressures), 2)
+            assert metrics['flowrate_mean'] == chart['flowrate'][chart['labels'].index(label)]
+
+
+def test_compare_selected_ids_in_fixed_queries(api_client, dataset_ids):
+    EquipmentDataset.objects.filter(pk__in=dataset_ids).update(summary_state={})
+    with CaptureQueriesContext(connection) as one:
+        api_client.get('/api/datasets/compare/', {'ids': dataset_ids[0]})
+    with CaptureQueriesContext(connection) as queries:
+        data = api_client.get('/api/datasets/compare/', {'ids': f'{dataset_ids[2]},{dataset_ids[0]},999999'}).json()
+    assert len(queries) == len(one)
+    assert [dataset['id'] for dataset in data['datasets']] == [dataset_ids[2], dataset_ids[0]]
+    assert data['missing'] == [999999]
+    assert api_client.get('/api/datasets/compare/', {'ids': 'x'}).status_code == 400
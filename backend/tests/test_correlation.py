@@ -0,0 +1,74 @@
+"""
+Per-type covariance, Pearson and Spearman matrices, cached per dataset.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from equipment_api.correlation import correlation_matrices
+from equipment_api.models import EquipmentDataset, EquipmentItem
+from equipment_api.summary import NUMERIC_FIELDS
+from equipment_api.synthetic import generate_frame
+
+
+FIELDS = list(NUMERIC_FIELDS)
+
+
+def test_matrices_match_pandas():
+    rng = np.random.default_rng(4)
+    frame = pd.DataFrame({
+        'type': rng.choice(['Pump', 'Valve', 'Reactor'], 600),
+        'flowrate': rng.normal(size=600).round(1),
+        'pressure': rng.normal(size=600),
+        'temperature': rng.integers(0, 6, 600).astype(float),
+    })
+    frame['pressure'] += frame['flowrate']
+    result = correlation_matrices(frame['type'], *(frame[field] for field in FIELDS))
+
+    for label, group in frame.groupby('type'):
+        stats = result['types'][label]
+        assert stats['count'] == len(group)
+        assert np.allclose(stats['pearson'], group[FIELDS].corr(), atol=1e-6)
+        assert np.allclose(stats['spearman'], group[FIELDS].corr('spearman'), atol=1e-6)
+        assert np.allclose(stats['covariance'], group[FIELDS].cov(), atol=1e-5)
+    assert np.allclose(result['dataset']['spearman'], frame[FIELDS].corr('spearman'), atol=1e-6)
+
+    single = correlation_matrices(['Pump', 'Valve', 'Valve'], [1, 2, 3], [1, 2, 2], [5, 5, 5])['types']
+    assert single['Pump']['pearson'][0][0] is None
+    assert single['Valve']['pearson'][0][0] == 1.0 and single['Valve']['pearson'][0][1] is None
+
+
+@pytest.mark.parametrize('storage', ['rows', 'column_cache'])
+def test_correlation_endpoint_cached(api_client, upload_frame, settings, tmp_path, storage):
+    settings.MEDIA_ROOT = tmp_path
+    frame = generate_frame(300, seed=8)
+    dataset_id = upload_frame(frame, storage=storage).json()['dataset_id']
+    url = f'/api/datasets/{dataset_id}/correlation/'
+
+    data = api_client.get(url, {'by': 'type'}).json()
+    assert data['fields'] == FIELDS
+    for label, group in frame.groupby('Type'):
+        columns = group[['Flowrate', 'Pressure', 'Temperature']]
+        assert np.allclose(data['types'][label]['pearson'], columns.corr(), atol=1e-5)
+    overall = api_client.get(url, {'by': 'dataset'}).json()['dataset']
+    assert overall['count'] == 300
+
+    with CaptureQueriesContext(connection) as queries:
+        assert api_client.get(url).json() == data
+    assert not any('equipment_api_equipmentitem' in query['sql'] for query in queries.captured_queries)
+    assert api_client.get(url, {'by': 'name'}).status_code == 400
+
+
+def test_correlation_precomputed_at_ingest_and_invalidated(api_client, upload_frame, settings):
+    settings.DATASET_PRECOMPUTE_CORRELATION = True
+    dataset_id = upload_frame(generate_frame(100, seed=9)).json()['dataset_id']
+    dataset = EquipmentDataset.objects.get(pk=dataset_id)
+    assert dataset.correlation_json['dataset']['count'] == 100
+
+    item = EquipmentItem.objects.filter(dataset_id=dataset_id).first()
+    assert api_client.delete(f'/api/equipment/{item.id}/').status_code == 204
+    assert EquipmentDataset.objects.get(pk=dataset_id).correlation_json == {}
+    data = api_client.get(f'/api/datasets/{dataset_id}/correlation/', {'by': 'dataset'}).json()
+    assert data['dataset']['count'] == 99
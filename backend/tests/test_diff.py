@@ -0,0 +1,72 @@
+"""
+Dataset diff: added, removed and changed equipment with thresholds and paging.
+"""
+import pandas as pd
+import pytest
+
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture
+def datasets(upload_frame):
+    before = generate_frame(1_000, seed=7)
+    after = before.copy()
+    after.loc[:9, 'Flowrate'] += 10          # 10 large flowrate changes
+    after.loc[10:14, 'Pressure'] += 0.05     # 5 small pressure changes
+    after.loc[15:16, 'Type'] = 'Retired'     # 2 type changes
+    after = after.drop(index=range(100, 120))  # 20 removed
+    after = pd.concat([after, generate_frame(8, seed=8, start=10_000)])  # 8 added
+    ids = []
+    for frame in (before, after):
+        response = upload_frame(frame)
+        assert response.status_code == 201, response.content
+        ids.append(response.json()['dataset_id'])
+    return *ids, before
+
+
+def test_diff_sections(api_client, datasets):
+    base, other, before = datasets
+    data = api_client.get(f'/api/datasets/{base}/diff/{other}/').json()
+
+    assert data['counts'] == {'changed': 17, 'unchanged': 963, 'added': 8, 'removed': 20}
+    assert len(data['changed']) == 17 and len(data['added']) == 8 and len(data['removed']) == 20
+    removed = {item['equipment_name'] for item in data['removed']}
+    assert removed == set(before.loc[100:119, 'Equipment Name'])
+
+    changes = {item['equipment_name']: item['changes'] for item in data['changed']}
+    flowrate_change = changes[before.loc[0, 'Equipment Name']]['flowrate']
+    assert flowrate_change['delta'] == pytest.approx(10)
+    assert changes[before.loc[15, 'Equipment Name']]['type'] == {'from': before.loc[15, 'Type'], 'to': 'Retired'}
+
+
+def test_diff_thresholds(api_client, datasets):
+    base, other, _ = datasets
+    data = api_client.get(f'/api/datasets/{base}/diff/{other}/?threshold=1&section=changed').json()
+    # Small pressure moves fall under the threshold; type changes always count
+    assert data['counts']['changed'] == 12
+    assert 'added' not in data
+
+    data = api_client.get(f'/api/datasets/{base}/diff/{other}/?threshold=1&pressure_threshold=0').json()
+    assert data['counts']['changed'] == 17
+
+
+def test_diff_pagination(api_client, datasets):
+    base, other, _ = datasets
+    first = api_client.get(f'/api/datasets/{base}/diff/{other}/?page_size=6').json()
+    second = api_client.get(first['next']).json()
+    assert len(first['removed']) == 6 and len(second['removed']) == 6
+    assert not {item['equipment_name'] for item in first['removed']} & {
+        item['equipment_name'] for item in second['removed']}
+    assert second['previous'] is not None
+
+    last = api_client.get(f'/api/datasets/{base}/diff/{other}/?page_size=6&page=4').json()
+    assert last['next'] is None and len(last['removed']) == 2 and last['added'] == []
+
+
+def test_diff_errors(api_client, datasets):
+    base, other, _ = datasets
+    assert api_client.get(f'/api/datasets/{base}/diff/99999/').status_code == 404
+    assert api_client.get(f'/api/datasets/{base}/diff/{other}/?threshold=-1').status_code == 400
+    for query in ('threshold=nan', 'flowrate_threshold=NaN', 'pressure_threshold=inf'):
+        assert api_client.get(f'/api/datasets/{base}/diff/{other}/?{query}').status_code == 400
+    assert api_client.get(f'/api/datasets/{base}/diff/{other}/?section=moved').status_code == 400
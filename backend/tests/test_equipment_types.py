@@ -0,0 +1,65 @@
+"""
+Equipment types are interned into EquipmentType; the API keeps exposing names.
+"""
+import pytest
+
+from equipment_api.models import EquipmentItem, EquipmentType
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture
+def dataset_id(upload_frame):
+    return upload_frame(generate_frame(300, seed=6, type_count=4), name='types.csv').json()['dataset_id']
+
+
+def test_upload_interns_each_type_once(upload_frame, dataset_id):
+    types = set(EquipmentItem.objects.filter(dataset_id=dataset_id).values_list('type__name', flat=True))
+    assert EquipmentType.objects.count() == len(types)
+
+    # A second upload with the same types reuses the existing rows
+    upload_frame(generate_frame(50, seed=7, type_count=4), name='again.csv')
+    assert EquipmentType.objects.count() == len(types)
+
+
+def test_api_exposes_type_names(api_client, dataset_id):
+    items = api_client.get('/api/equipment/', {'dataset': dataset_id}).json()['results']
+    names = set(EquipmentType.objects.values_list('name', flat=True))
+    assert {item['type'] for item in items} <= names
+
+    chart = api_client.get(f'/api/datasets/{dataset_id}/chart_data/').json()
+    assert chart['labels'] == sorted(names)
+
+    eq_type = items[0]['type']
+    filtered = api_client.get('/api/equipment/', {'dataset': dataset_id, 'type': eq_type}).json()['results']
+    assert filtered and all(item['type'] == eq_type for item in filtered)
+
+
+def test_create_item_with_new_type_name(api_client, dataset_id):
+    response = api_client.post('/api/equipment/', {
+        'dataset': dataset_id, 'equipment_name': 'Extra', 'type': 'Scrubber',
+        'flowrate': 1.0, 'pressure': 2.0, 'temperature': 3.0,
+    }, format='json')
+    assert response.status_code == 201
+    assert response.json()['type'] == 'Scrubber'
+    assert EquipmentType.objects.filter(name='Scrubber').exists()
+
+    response = api_client.post('/api/equipment/', {
+        'dataset': dataset_id, 'equipment_name': 'Blank', 'type': ' ',
+        'flowrate': 1.0, 'pressure': 2.0, 'temperature': 3.0,
+    }, format='json')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('changes', [
+    {'type': 'X' * 101},
+    {'type': 'Scrubber', 'flowrate': 'bad'},
+    {'type': 'Scrubber', 'dataset': 99999},
+])
+def test_invalid_item_creates_no_type(api_client, dataset_id, changes):
+    types = EquipmentType.objects.count()
+    response = api_client.post('/api/equipment/', {
+        'dataset': dataset_id, 'equipment_name': 'Extra',
+        'flowrate': 1.0, 'pressure': 2.0, 'temperature': 3.0, **changes,
+    }, format='json')
+    assert response.status_code == 400
+    assert EquipmentType.objects.count() == types
@@ -0,0 +1,104 @@
+"""
+Dataset events: the long-poll and SSE forms of /api/datasets/events/,
+cursor expiry and the events recorded by uploads, deletes and pruning.
+"""
+import pytest
+
+from equipment_api.models import DatasetEvent, EquipmentDataset
+from equipment_api.synthetic import generate_frame
+from equipment_api.views import EquipmentDatasetViewSet
+
+
+URL = '/api/datasets/events/'
+
+
+@pytest.fixture
+def dataset(upload_frame):
+    response = upload_frame(generate_frame(20, seed=1))
+    return EquipmentDataset.objects.get(pk=response.json()['dataset_id'])
+
+
+def poll(api_client, **params):
+    response = api_client.get(URL, params)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def test_long_poll_returns_new_events(api_client, upload_frame):
+    cursor = poll(api_client)['cursor']
+    dataset_id = upload_frame(generate_frame(20, seed=2)).json()['dataset_id']
+    api_client.delete(f'/api/datasets/{dataset_id}/')
+
+    data = poll(api_client, since=cursor, timeout=0)
+    assert not data['reset']
+    assert [(event['kind'], event['dataset_id']) for event in data['events']] == [
+        (DatasetEvent.CREATED, dataset_id), (DatasetEvent.DELETED, dataset_id)
+    ]
+    assert data['events'][0]['dataset']['summary']['total_equipment_count'] == 20
+    assert data['cursor'] == data['events'][-1]['id']
+
+    # Nothing newer: the cursor comes back unchanged once the timeout passes
+    idle = poll(api_client, since=data['cursor'], timeout=0)
+    assert idle == {'cursor': data['cursor'], 'reset': False, 'events': []}
+    assert api_client.get(URL, {'since': 'latest'}).status_code == 400
+
+
+def test_long_poll_waits_for_events(api_client, dataset, monkeypatch):
+    cursor = DatasetEvent.latest_cursor()
+    sleeps = []
+
+    def sleep(seconds):
+        # Another request deletes the dataset while this one waits
+        sleeps.append(seconds)
+        DatasetEvent.record(DatasetEvent.DELETED, dataset)
+
+    monkeypatch.setattr('equipment_api.views.time.sleep', sleep)
+    data = poll(api_client, since=cursor, timeout=10)
+    assert sleeps == [EquipmentDatasetViewSet.EVENTS_POLL_INTERVAL]
+    assert [event['kind'] for event in data['events']] == [DatasetEvent.DELETED]
+
+
+def test_expired_cursor_requests_reset(api_client, dataset, monkeypatch):
+    monkeypatch.setattr(DatasetEvent, 'RETENTION', 3)
+    cursor = DatasetEvent.latest_cursor()
+    for _ in range(4):
+        DatasetEvent.record(DatasetEvent.UPDATED, dataset)
+    assert DatasetEvent.objects.count() == 3
+
+    data = poll(api_client, since=cursor, timeout=0)
+    assert data == {'cursor': DatasetEvent.latest_cursor(), 'reset': True, 'events': []}
+    # The last retained cursor is still valid
+    assert len(poll(api_client, since=DatasetEvent.latest_cursor() - 3, timeout=0)['events']) == 3
+
+
+def test_pruned_datasets_are_announced(api_client, upload_frame):
+    cursor = poll(api_client)['cursor']
+    ids = [upload_frame(generate_frame(10, seed=seed)).json()['dataset_id'] for seed in range(6)]
+    events = poll(api_client, since=cursor, timeout=0)['events']
+    assert [event['dataset_id'] for event in events if event['kind'] == DatasetEvent.CREATED] == ids
+    pruned = [event for event in events if event['kind'] == DatasetEvent.PRUNED]
+    assert [event['dataset_id'] for event in pruned] == [ids[0]]
+    assert pruned[0]['dataset']['filename'] == 'equipment.csv'
+    assert not EquipmentDataset.objects.filter(pk=ids[0]).exists()
+
+
+def test_event_stream(api_client, dataset, monkeypatch):
+    monkeypatch.setattr(EquipmentDatasetViewSet, 'EVENTS_STREAM_DURATION', 0.2)
+    monkeypatch.setattr(EquipmentDatasetViewSet, 'EVENTS_POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(DatasetEvent, 'RETENTION', 2)
+    created = DatasetEvent.objects.get(kind=DatasetEvent.CREATED)
+
+    response = api_client.get(URL, HTTP_ACCEPT='text/event-stream', HTTP_LAST_EVENT_ID=str(created.id - 1))
+    assert response['Content-Type'] == 'text/event-stream'
+    frames = b''.join(response.streaming_content).decode().split('\n\n')
+    assert frames[0] == f'retry: 3000\nid: {created.id - 1}\nevent: ready\ndata: {{}}'
+    assert frames[1].startswith(f'id: {created.id}\nevent: created\ndata: {{"id": {created.id}')
+
+    # Resuming from a trimmed cursor sends a reset and continues from the newest event
+    for _ in range(3):
+        DatasetEvent.record(DatasetEvent.UPDATED, dataset)
+    response = api_client.get(URL, HTTP_ACCEPT='text/event-stream', HTTP_LAST_EVENT_ID=str(created.id))
+    frames = b''.join(response.streaming_content).decode().split('\n\n')
+    latest = DatasetEvent.latest_cursor()
+    assert frames[1] == f'id: {latest}\nevent: reset\ndata: {{}}'
+    assert all('event: updated' not in frame for frame in frames[2:])
@@ -0,0 +1,207 @@
+"""
+Numeric columns beyond the required five are kept as extra fields, stored
+once per dataset in columnar form and aggregated like the built-in readings.
+"""
+import io
+
+import numpy as np
+import pytest
+
+from equipment_api.columnar import ExtraColumns
+from equipment_api import views
+from equipment_api.models import EquipmentDataset, EquipmentType
+from equipment_api.parsers import available_engines, parse_equipment_csv
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def frame():
+    frame = generate_frame(400, seed=21, type_count=5)
+    rng = np.random.default_rng(21)
+    vibration = rng.normal(2.0, 0.5, len(frame)).round(3)
+    vibration[rng.random(len(frame)) < 0.2] = np.nan
+    frame['Vibration (mm/s)'] = vibration
+    frame['Power kW'] = rng.integers(5, 500, len(frame))
+    frame['Notes'] = 'ok'
+    return frame
+
+
+def upload(upload_frame, frame, capture, storage=EquipmentDataset.ROWS):
+    with capture(execute=True):
+        response = upload_frame(frame, name='extra.csv', storage=storage)
+    assert response.status_code == 201, response.content
+    return EquipmentDataset.objects.get(pk=response.json()['dataset_id'])
+
+
+@pytest.mark.parametrize('engine', available_engines())
+def test_parsers_keep_numeric_extra_columns(frame, engine):
+    frame = frame.assign(Level='')
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False)
+    result = parse_equipment_csv(io.BytesIO(buffer.getvalue().encode('utf-8')), engine)
+
+    # Text and all-blank columns are left out
+    assert result.extra_labels == {'vibration_mm_s': 'Vibration (mm/s)', 'power_kw': 'Power kW'}
+    np.testing.assert_array_equal(result.extra['vibration_mm_s'], frame['Vibration (mm/s)'])
+    np.testing.assert_array_equal(result.extra['power_kw'], frame['Power kW'].astype(float))
+    summary = result.summary.to_summary()['extra_fields']['vibration_mm_s']
+    assert summary['count'] == frame['Vibration (mm/s)'].notna().sum()
+    assert summary['average'] == round(frame['Vibration (mm/s)'].mean(), 2)
+
+
+@pytest.mark.parametrize('storage', [EquipmentDataset.ROWS, EquipmentDataset.COLUMN_CACHE])
+def test_extra_fields_in_summary_chart_and_histogram(
+    api_client, upload_frame, frame, storage, django_capture_on_commit_callbacks
+):
+    dataset = upload(upload_frame, frame, django_capture_on_commit_callbacks, storage)
+    assert dataset.extra_fields == {'vibration_mm_s': 'Vibration (mm/s)', 'power_kw': 'Power kW'}
+    assert dataset.equipment_items.count() == len(frame)
+
+    summary = api_client.get(f'/api/datasets/{dataset.id}/summary/').json()
+    assert summary['extra_fields']['power_kw'] == {
+        'label': 'Power kW', 'count': len(frame), 'average': round(frame['Power kW'].mean(), 2),
+        'min': float(frame['Power kW'].min()), 'max': float(frame['Power kW'].max()),
+    }
+
+    means = frame.groupby('Type')['Vibration (mm/s)'].mean().sort_index().round(2)
+    chart = api_client.get(f'/api/datasets/{dataset.id}/chart_data/').json()
+    assert chart['labels'] == means.index.tolist()
+    assert chart['extra']['vibration_mm_s'] == {'label': 'Vibration (mm/s)', 'values': means.tolist()}
+
+    # Rebuilt from the rows and the column files, the chart is the same
+    EquipmentDataset.objects.filter(pk=dataset.id).update(summary_state={})
+    assert api_client.get(f'/api/datasets/{dataset.id}/chart_data/').json() == chart
+
+    label = means.index[0]
+    response = api_client.get(
+        f'/api/datasets/{dataset.id}/histogram/', {'field': 'vibration_mm_s', 'bins': 8, 'type': label}
+    ).json()
+    values = frame.loc[frame['Type'] == label, 'Vibration (mm/s)'].dropna()
+    counts, edges = np.histogram(values, bins=8)
+    assert response['counts'] == counts.tolist()
+    assert response['edges'] == pytest.approx(edges.tolist())
+
+    response = api_client.get(f'/api/datasets/{dataset.id}/histogram/', {'field': 'notes'})
+    assert response.status_code == 400
+    assert 'vibration_mm_s' in response.json()['error']
+
+
+def test_append_and_compare_pad_missing_fields(api_client, upload_frame, frame, django_capture_on_commit_callbacks):
+    head, tail = frame.iloc[:250].drop(columns='Power kW'), frame.iloc[250:]
+    dataset = upload(upload_frame, head, django_capture_on_commit_callbacks)
+    assert list(dataset.extra_fields) == ['vibration_mm_s']
+    with django_capture_on_commit_callbacks(execute=True):
+        response = upload_frame(tail, url=f'/api/datasets/{dataset.id}/append/')
+    assert response.status_code == 200, response.content
+    dataset.refresh_from_db()
+    assert list(dataset.extra_fields) == ['vibration_mm_s', 'power_kw']
+
+    extra = dataset.extra_columns()
+    np.testing.assert_array_equal(extra.columns['vibration_mm_s'], frame['Vibration (mm/s)'])
+    assert np.isnan(extra.columns['power_kw'][:250]).all()
+    power = dataset.summary_json['extra_fields']['power_kw']
+    assert power['count'] == len(tail)
+    assert power['average'] == round(tail['Power kW'].mean(), 2)
+
+    plain = upload(upload_frame, generate_frame(50, seed=3, type_count=5), django_capture_on_commit_callbacks)
+    data = api_client.get('/api/datasets/compare/', {'ids': f'{dataset.id},{plain.id}'}).json()
+    assert data['extra_fields'] == {'vibration_mm_s': 'Vibration (mm/s)', 'power_kw': 'Power kW'}
+    column = data['metrics'].index('power_kw_max')
+    label = data['types'][0]
+    assert data['values'][0][0][column] == float(tail.loc[tail['Type'] == label, 'Power kW'].max())
+    assert all(row[column] is None for row in data['values'][1])
+
+
+def test_item_edits_update_extra_columns(api_client, upload_frame, frame, django_capture_on_commit_callbacks):
+    dataset = upload(upload_frame, frame, django_capture_on_commit_callbacks)
+    first, second = dataset.equipment_items.order_by('id')[:2]
+    other_type = EquipmentType.objects.exclude(pk=second.type_id).first()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert api_client.delete(f'/api/equipment/{first.pk}/').status_code == 204
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.patch(f'/api/equipment/{second.pk}/', {'type': other_type.name}, format='json')
+    assert response.status_code == 200, response.content
+
+    extra = dataset.extra_columns()
+    assert len(extra) == len(frame) - 1 and first.pk not in extra.item_ids
+    assert extra.type_ids[0] == other_type.pk
+
+    remaining = frame.iloc[1:].copy()
+    remaining.iloc[0, remaining.columns.get_loc('Type')] = other_type.name
+    means = remaining.groupby('Type')['Power kW'].mean().sort_index().round(2)
+    chart = api_client.get(f'/api/datasets/{dataset.id}/chart_data/').json()
+    assert chart['extra']['power_kw']['values'] == means.tolist()
+
+
+def test_moved_item_keeps_extra_values(api_client, upload_frame, frame, django_capture_on_commit_callbacks):
+    dataset = upload(upload_frame, frame, django_capture_on_commit_callbacks)
+    plain = upload(upload_frame, generate_frame(50, seed=3, type_count=5), django_capture_on_commit_callbacks)
+    item = dataset.equipment_items.order_by('id')[1]
+    response = api_client.patch(f'/api/equipment/{item.pk}/', {'dataset': plain.pk}, format='json')
+    assert response.status_code == 200, response.content
+
+    dataset.refresh_from_db()
+    plain.refresh_from_db()
+    assert item.pk not in dataset.extra_columns().item_ids
+    values = plain.extra_columns()
+    assert values.item_ids.tolist() == [item.pk]
+    fields = {key: label for key, label in dataset.extra_fields.items() if not np.isnan(frame.loc[1, label])}
+    assert plain.extra_fields == fields
+    assert {key: column[0] for key, column in values.columns.items()} == {
+        key: frame.loc[1, label] for key, label in fields.items()
+    }
+    chart = api_client.get(f'/api/datasets/{plain.id}/chart_data/').json()
+    position = chart['labels'].index(item.type.name)
+    assert chart['extra']['power_kw']['values'][position] == frame.loc[1, 'Power kW']
+
+
+def test_append_alongside_delete(api_client, upload_frame, frame, django_capture_on_commit_callbacks, monkeypatch):
+    dataset = upload(upload_frame, frame, django_capture_on_commit_callbacks)
+    first = dataset.equipment_items.order_by('id').first()
+    tail = generate_frame(30, seed=4, start=len(frame), type_count=5).assign(**{'Power kW': 7})
+    # The delete commits while the append's commit hooks are still pending; the
+    # extra values are written in each transaction, not by those hooks
+    with django_capture_on_commit_callbacks() as append_callbacks:
+        assert upload_frame(tail, url=f'/api/datasets/{dataset.id}/append/').status_code == 200
+    with django_capture_on_commit_callbacks(execute=True):
+        assert api_client.delete(f'/api/equipment/{first.pk}/').status_code == 204
+    for callback in append_callbacks:
+        callback()
+
+    dataset.refresh_from_db()
+    extra = dataset.extra_columns()
+    assert extra.item_ids.tolist() == list(dataset.equipment_items.order_by('id').values_list('id', flat=True))
+    assert (extra.columns['power_kw'][-len(tail):] == 7).all()
+
+    # An append that fails rolls its extra values back with its rows
+    def fail(*args, **kwargs):
+        raise RuntimeError('limits unavailable')
+    monkeypatch.setattr(views, 'record_violations', fail)
+    assert upload_frame(tail, url=f'/api/datasets/{dataset.id}/append/').status_code == 500
+    assert len(dataset.extra_columns()) == len(extra)
+
+
+def test_extra_columns_round_trip():
+    extra = ExtraColumns.from_columns([3, 5, 9], [1, 2, 1], {'level': [0.5, np.nan, 2.0]})
+    loaded = ExtraColumns.from_bytes(extra.to_bytes(), ['level', 'power'])
+    assert np.isnan(loaded.columns['power']).all()
+    edited = loaded.edited(removed=[5], retyped={9: 4})
+    assert edited.item_ids.tolist() == [3, 9] and edited.type_ids.tolist() == [1, 4]
+    assert edited.histogram('level', 2) == ([1, 1], [0.5, 1.25, 2.0])
+    assert edited.histogram('level', 2, type_id=2) == ([], [])
+
+    # Only the fields an item has values for move with it
+    assert loaded.select([5]).columns == {}
+    moved = loaded.select([9])
+    assert moved.item_ids.tolist() == [9] and list(moved.columns) == ['level']
+    merged = ExtraColumns.from_columns([4], [7], {'power': [10.0]}).merged(edited)
+    assert merged.item_ids.tolist() == [3, 4, 9] and merged.type_ids.tolist() == [1, 7, 4]
+    np.testing.assert_array_equal(merged.columns['power'], [np.nan, 10.0, np.nan])
+    np.testing.assert_array_equal(merged.columns['level'], [0.5, np.nan, 2.0])
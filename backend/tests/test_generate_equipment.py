@@ -0,0 +1,75 @@
+"""
+generate_equipment: synthetic CSV output and direct loading, generated in
+bounded, ordered chunks.
+"""
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from django.core.management import CommandError, call_command
+
+from equipment_api.models import DatasetEvent, EquipmentDataset
+from equipment_api.synthetic import CSV_COLUMNS, generate_chunks, ordered_results
+
+
+def generate(*args):
+    call_command('generate_equipment', *args, stdout=io.StringIO())
+
+
+def test_csv_output_independent_of_workers(tmp_path):
+    generate('2500', '--output', str(tmp_path / 'serial.csv'), '--workers', '1', '--chunk-size', '1000')
+    generate('2500', '--output', str(tmp_path / 'parallel.csv'), '--workers', '2', '--chunk-size', '1000')
+    assert (tmp_path / 'serial.csv').read_bytes() == (tmp_path / 'parallel.csv').read_bytes()
+
+    frame = pd.read_csv(tmp_path / 'parallel.csv')
+    assert list(frame.columns) == CSV_COLUMNS and len(frame) == 2500
+    assert frame['Equipment Name'].is_unique
+
+
+def test_load_creates_dataset(db):
+    generate('1200', '--load', '--filename', 'plant.csv', '--types', '4', '--workers', '2', '--chunk-size', '500')
+    dataset = EquipmentDataset.objects.get(filename='plant.csv')
+    assert dataset.equipment_items.count() == 1200
+    assert dataset.summary_json['total_equipment_count'] == 1200
+    assert len(dataset.summary_json['equipment_type_distribution']) <= 4
+    assert DatasetEvent.objects.filter(kind=DatasetEvent.CREATED, dataset_id=dataset.id).exists()
+
+    chunks = list(generate_chunks(1200, workers=2, chunk_size=500, type_count=4))
+    assert [len(chunk) for chunk in chunks] == [500, 500, 200]
+    names = pd.concat(chunks)['Equipment Name'].tolist()
+    assert names == list(dataset.equipment_items.order_by('id').values_list('equipment_name', flat=True))
+
+
+def test_ordered_results_bounds_submitted_tasks():
+    submitted = []
+    lock = threading.Lock()
+
+    def square(value):
+        return value * value
+
+    class CountingPool(ThreadPoolExecutor):
+        def submit(self, function, task):
+            with lock:
+                submitted.append(task)
+            return super().submit(function, task)
+
+    with CountingPool(max_workers=2) as pool:
+        results = ordered_results(pool, square, range(20), ahead=4)
+        assert next(results) == 0 and len(submitted) == 4
+        assert next(results) == 1 and len(submitted) == 5
+        assert list(results) == [value * value for value in range(2, 20)]
+
+
+@pytest.mark.parametrize('args,message', [
+    (['abc', '--load'], "Invalid row count 'abc'"),
+    (['100', '--load', '--spread', '-0.5'], '--spread must be a non-negative number'),
+    (['100', '--load', '--spread', 'nan'], '--spread must be a non-negative number'),
+    (['100', '--load', '--dirty', '0.1'], '--dirty only applies to CSV output'),
+    (['100', '--load', '--workers', '0'], '--workers and --chunk-size must be at least 1'),
+])
+def test_invalid_options(db, args, message):
+    with pytest.raises(CommandError, match=message):
+        generate(*args)
+    assert not EquipmentDataset.objects.exists()
@@ -0,0 +1,119 @@
+"""
+Operating limits are evaluated column-wise at ingest; violations are stored
+and served from their own table.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from equipment_api.limits import find_violations
+from equipment_api.models import EquipmentItem, LimitViolation
+from equipment_api.synthetic import generate_frame
+
+
+PUMP = 'Centrifugal Pump'
+
+
+def expected_violations(frame):
+    """(equipment name, field, bound) of readings outside the limits set in `limits`"""
+    found = set()
+    for row in frame.itertuples(index=False):
+        if row.Type == PUMP and row.Pressure > 11:
+            found.add((row._0, 'pressure', 'max'))
+        if row.Type == PUMP and row.Temperature < 40:
+            found.add((row._0, 'temperature', 'min'))
+        if row.Type == PUMP and row.Temperature > 50:
+            found.add((row._0, 'temperature', 'max'))
+    return found
+
+
+@pytest.fixture
+def limits(api_client):
+    for limit in [
+        {'type': PUMP, 'field': 'pressure', 'maximum': 11},
+        {'type': PUMP, 'field': 'temperature', 'minimum': 40, 'maximum': 50},
+    ]:
+        assert api_client.post('/api/limits/', limit, format='json').status_code == 201
+
+
+def violation_keys(api_client, dataset_id, **params):
+    data = api_client.get(f'/api/datasets/{dataset_id}/violations/', params).json()
+    results = data['results']
+    while data['next']:
+        data = api_client.get(data['next']).json()
+        results += data['results']
+    return {(row['equipment_name'], row['field'], row['bound']) for row in results}
+
+
+def test_find_violations():
+    found = find_violations(
+        ['Pump', 'Valve', 'Pump'],
+        {'flowrate': [1, 2, 3], 'pressure': [7, 9, 5], 'temperature': [90, 50, 130]},
+        {'Pump': {'pressure': (None, 6), 'temperature': (100, 120)}},
+    )
+    assert found['positions'].tolist() == [0, 0, 2]
+    assert found['fields'].tolist() == ['pressure', 'temperature', 'temperature']
+    assert found['bounds'].tolist() == ['max', 'min', 'max']
+    assert found['limits'].tolist() == [6, 100, 120]
+    assert len(find_violations(['Pump'], {'pressure': [1]}, {})['positions']) == 0
+
+
+def test_violations_recorded_at_upload_and_append(api_client, upload_frame, limits):
+    frame = generate_frame(400, seed=11)
+    dataset_id = upload_frame(frame).json()['dataset_id']
+    expected = expected_violations(frame)
+    assert expected and violation_keys(api_client, dataset_id) == expected
+
+    extra = generate_frame(100, seed=12)
+    extra['Equipment Name'] = extra['Equipment Name'] + '-B'
+    upload_frame(extra, url=f'/api/datasets/{dataset_id}/append/')
+    expected |= expected_violations(extra)
+    assert violation_keys(api_client, dataset_id) == expected
+    assert violation_keys(api_client, dataset_id, field='pressure') == {key for key in expected if key[1] == 'pressure'}
+
+    # Each violation points at the item holding the reading
+    for violation in LimitViolation.objects.filter(dataset_id=dataset_id).select_related('item')[:20]:
+        assert getattr(violation.item, violation.field) == violation.value
+
+
+def test_violations_read_without_scanning_items(api_client, upload_frame, limits):
+    dataset_id = upload_frame(generate_frame(300, seed=13)).json()['dataset_id']
+    with CaptureQueriesContext(connection) as queries:
+        api_client.get(f'/api/datasets/{dataset_id}/violations/')
+    assert not any(
+        query['sql'].split(' FROM ')[1].startswith('"equipment_api_equipmentitem"')
+        for query in queries.captured_queries if ' FROM ' in query['sql']
+    )
+
+
+def test_limit_and_item_changes_recheck(api_client, upload_frame):
+    frame = generate_frame(200, seed=14)
+    dataset_id = upload_frame(frame).json()['dataset_id']
+    assert not LimitViolation.objects.exists()
+
+    response = api_client.post('/api/limits/', {'type': PUMP, 'field': 'pressure', 'maximum': 11}, format='json')
+    expected = {key for key in expected_violations(frame) if key[1] == 'pressure'}
+    assert violation_keys(api_client, dataset_id) == expected
+
+    item = EquipmentItem.objects.filter(dataset_id=dataset_id, type__name=PUMP, pressure__lte=11).first()
+    api_client.patch(f'/api/equipment/{item.id}/', {'pressure': 15}, format='json')
+    assert LimitViolation.objects.filter(item_id=item.id, bound='max').count() == 1
+    api_client.delete(f'/api/equipment/{item.id}/')
+    assert not LimitViolation.objects.filter(item_id=item.id).exists()
+
+    api_client.delete(f"/api/limits/{response.json()['id']}/")
+    assert not LimitViolation.objects.exists()
+
+
+def test_invalid_limits_rejected(api_client):
+    assert api_client.post('/api/limits/', {'type': 'Pump', 'field': 'pressure'}, format='json').status_code == 400
+    assert api_client.post(
+        '/api/limits/', {'type': 'Pump', 'field': 'pressure', 'minimum': 5, 'maximum': 1}, format='json'
+    ).status_code == 400
+    assert api_client.post('/api/limits/', {'type': 'Pump', 'field': 'speed', 'maximum': 1}, format='json').status_code == 400
+
+    # One limit per type and field, whether the type is new or already stored
+    limit = {'type': 'Pump', 'field': 'pressure', 'maximum': 1}
+    assert api_client.post('/api/limits/', limit, format='json').status_code == 201
+    response = api_client.post('/api/limits/', limit, format='json')
+    assert response.status_code == 400 and 'unique set' in str(response.json())
@@ -0,0 +1,98 @@
+"""
+load_equipment: file, directory and glob sources, resuming from IngestedFile
+records, and files that fail without stopping the run.
+"""
+import io
+import os
+
+import pytest
+from django.core.management import call_command
+
+from equipment_api.management.commands import load_equipment
+from equipment_api.management.commands.load_equipment import Command, parse_file
+from equipment_api.models import EquipmentDataset, IngestedFile
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    generate_frame(30, seed=1).to_csv(tmp_path / 'a.csv', index=False)
+    generate_frame(20, seed=2).to_csv(tmp_path / 'b.csv.gz', index=False)
+    (tmp_path / 'notes.txt').write_text('not equipment data')
+    (tmp_path / 'nested').mkdir()
+    generate_frame(10, seed=3).to_csv(tmp_path / 'nested' / 'c.csv', index=False)
+    return tmp_path
+
+
+def load(*args):
+    out = io.StringIO()
+    call_command('load_equipment', *map(str, args), stdout=out)
+    return out.getvalue()
+
+
+def crash_on_crash_csv(path, engine):
+    """parse_file, except that the worker process dies on crash.csv"""
+    if path.name == 'crash.csv':
+        os._exit(1)
+    return parse_file(path, engine)
+
+
+def test_expand_sources(source_dir):
+    command = Command(stdout=io.StringIO())
+    # A directory contributes its supported files, not subdirectories or other files
+    assert command.expand_sources([str(source_dir)]) == [source_dir / 'a.csv', source_dir / 'b.csv.gz']
+    assert command.expand_sources([str(source_dir / '**' / '*.csv'), str(source_dir / 'a.csv')]) == [
+        source_dir / 'a.csv', source_dir / 'nested' / 'c.csv'
+    ]
+    assert command.expand_sources([str(source_dir / 'missing.csv')]) == []
+    assert 'CSV file not found' in command.stdout.getvalue()
+
+
+def test_resume_skips_loaded_files(db, source_dir):
+    output = load(source_dir, '--workers', 1)
+    assert 'from 2 file(s)' in output
+    assert sorted(EquipmentDataset.objects.values_list('filename', flat=True)) == ['a.csv', 'b.csv']
+    record = IngestedFile.objects.get(path=str(source_dir / 'b.csv.gz'))
+    assert record.row_count == 20 and record.dataset.equipment_items.count() == 20
+
+    output = load(source_dir, '--workers', 1)
+    assert 'Skipping 2 file(s) already loaded' in output and 'Nothing to load.' in output
+
+    # A changed file is loaded again; its record points at the new dataset
+    generate_frame(40, seed=4).to_csv(source_dir / 'a.csv', index=False)
+    output = load(source_dir, '--workers', 1)
+    assert 'Skipping 1 file(s)' in output and 'from 1 file(s)' in output
+    assert IngestedFile.objects.get(path=str(source_dir / 'a.csv')).row_count == 40
+
+    output = load(source_dir, '--workers', 1, '--force')
+    assert 'Skipping' not in output and 'from 2 file(s)' in output
+    assert IngestedFile.objects.count() == 2
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_bad_files_fail_alone(db, tmp_path, workers):
+    generate_frame(30, seed=1).to_csv(tmp_path / 'good.csv', index=False)
+    header = b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+    # A field over the csv module's size limit raises csv.Error, not a format error
+    (tmp_path / 'huge_field.csv').write_bytes(header + b'P-1,"' + b'x' * 200_000 + b'",1,2,3\n')
+    (tmp_path / 'invalid.csv').write_bytes(header + b'P-1,,1,2,3\n')
+
+    output = load(tmp_path, '--workers', workers, '--engine', 'python')
+    assert 'field larger than field limit' in output and 'Type is required' in output
+    assert 'from 1 file(s)' in output and '2 failed' in output
+    assert list(EquipmentDataset.objects.values_list('filename', flat=True)) == ['good.csv']
+    assert list(IngestedFile.objects.values_list('path', flat=True)) == [str(tmp_path / 'good.csv')]
+
+
+def test_worker_crash_fails_its_files_only(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(load_equipment, 'parse_file', crash_on_crash_csv)
+    for index in range(4):
+        generate_frame(10, seed=index).to_csv(tmp_path / f'part{index}.csv', index=False)
+    (tmp_path / 'crash.csv').write_text('Equipment Name,Type,Flowrate,Pressure,Temperature\n')
+
+    output = load(tmp_path, '--workers', 2)
+    # Files in flight alongside the crash may fail with it; the rest load in a new pool
+    assert 'crash.csv' in output and 'terminated abruptly' in output
+    loaded = set(EquipmentDataset.objects.values_list('filename', flat=True))
+    assert loaded and 'crash.csv' not in loaded
+    assert f'from {len(loaded)} file(s)' in output and f'{5 - len(loaded)} failed' in output
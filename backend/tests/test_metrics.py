@@ -0,0 +1,88 @@
+"""
+Request metrics: per-view counters from MetricsMiddleware, the Server-Timing
+header and the Prometheus export at /api/metrics.
+"""
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from equipment_api.metrics import QueryTimer, _labels, registry
+from equipment_api.models import EquipmentDataset
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def server_timing(response):
+    """Server-Timing entries as {name: (milliseconds, description)}"""
+    entries = {}
+    for entry in response['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        entries[name] = (float(params['dur']), params.get('desc', '').strip('"'))
+    return entries
+
+
+def test_query_timer_counts_queries(db):
+    timer = QueryTimer()
+    with connection.execute_wrapper(timer):
+        EquipmentDataset.objects.count()
+        list(EquipmentDataset.objects.all())
+    assert timer.count == 2 and timer.duration > 0
+
+
+def test_request_metrics_and_server_timing(api_client):
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get('/api/datasets/')
+    assert response.status_code == 200
+
+    timing = server_timing(response)
+    assert timing['db'][1] == f'{len(queries)} queries'
+    assert timing['app'][0] >= timing['db'][0]
+
+    stats = registry.endpoints[('EquipmentDatasetViewSet', 'list')]
+    assert stats['count'] == 1 and stats['queries'] == len(queries)
+    assert stats['response_bytes'] == len(response.content)
+    assert registry.requests[('EquipmentDatasetViewSet', 'list', 'GET', '200')] == 1
+
+    api_client.get('/api/datasets/999999/')
+    assert registry.requests[('EquipmentDatasetViewSet', 'retrieve', 'GET', '404')] == 1
+
+
+def test_phases_reported(upload_frame):
+    response = upload_frame(generate_frame(50, seed=1))
+    assert response.status_code == 201
+    assert {'insert', 'summarize', 'prune'} <= set(server_timing(response))
+    assert registry.phases[('UploadCSVView', 'summarize')]['count'] == 1
+
+
+def test_prometheus_export(api_client):
+    api_client.get('/api/datasets/')
+    api_client.get('/api/datasets/')
+    response = api_client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.content.decode()
+
+    labels = 'view="EquipmentDatasetViewSet",action="list"'
+    assert f'equipment_api_requests_total{{{labels},method="GET",status="200"}} 2' in text
+    assert f'equipment_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f'equipment_api_request_duration_seconds_count{{{labels}}} 2' in text
+    buckets = re.findall(rf'equipment_api_request_duration_seconds_bucket{{{labels},le="[\d.]+"}} (\d+)', text)
+    assert [int(count) for count in buckets] == sorted(int(count) for count in buckets)
+    assert re.search(rf'equipment_api_db_queries_total{{{labels}}} \d+', text)
+    assert '# TYPE equipment_api_phase_duration_seconds summary' in text
+
+    assert APIClient().get('/api/metrics').status_code == 401
+
+
+def test_labels_escaped():
+    assert _labels(view='a"b', action='c\\d\ne') == 'view="a\\"b",action="c\\\\d\\ne"'
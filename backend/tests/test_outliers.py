@@ -0,0 +1,101 @@
+"""
+Per-type outlier detection (z-score, MAD, IQR) with cached results and an
+optional ingest stage.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from equipment_api.models import DatasetEvent, EquipmentDataset, EquipmentItem
+from equipment_api.outliers import detect_outliers
+from equipment_api.summary import NUMERIC_FIELDS
+from equipment_api.synthetic import generate_frame
+
+
+def pandas_scores(frame, field, method):
+    """Reference scores computed with pandas groupby"""
+    group = frame.groupby('type')[field]
+    if method == 'zscore':
+        scores = (frame[field] - group.transform('mean')) / group.transform('std')
+    elif method == 'mad':
+        median = group.transform('median')
+        mad = (frame[field] - median).abs().groupby(frame['type']).transform('median')
+        scores = 0.6745 * (frame[field] - median) / mad
+    else:
+        first, third = group.transform(lambda x: x.quantile(0.25)), group.transform(lambda x: x.quantile(0.75))
+        spread = third - first
+        scores = np.where(frame[field] > third, (frame[field] - third) / spread,
+                          np.where(frame[field] < first, (frame[field] - first) / spread, 0))
+    return pd.Series(scores).replace([np.inf, -np.inf], np.nan).fillna(0).to_numpy()
+
+
+@pytest.mark.parametrize('method,threshold', [('zscore', 3), ('mad', 3.5), ('iqr', 1.5)])
+def test_detect_outliers_matches_pandas(method, threshold):
+    rng = np.random.default_rng(5)
+    frame = pd.DataFrame({
+        'type': rng.choice(['Pump', 'Valve', 'Reactor', 'Dryer'], 2000),
+        'flowrate': rng.normal(size=2000),
+        'pressure': rng.standard_t(2, size=2000),
+        'temperature': rng.integers(0, 3, 2000).astype(float),
+    })
+    frame.loc[frame['type'] == 'Dryer', 'temperature'] = 1.0
+    found = detect_outliers(frame['type'], {field: frame[field] for field in NUMERIC_FIELDS}, method)
+
+    expected = set()
+    for field in NUMERIC_FIELDS:
+        scores = pandas_scores(frame, field, method)
+        expected |= {(position, field) for position in np.flatnonzero(np.abs(scores) > threshold).tolist()}
+        mask = found['fields'] == field
+        assert np.allclose(found['scores'][mask], scores[found['positions'][mask]])
+    assert expected and set(zip(found['positions'].tolist(), found['fields'].tolist())) == expected
+
+
+@pytest.mark.parametrize('storage', ['rows', 'column_cache'])
+def test_outliers_endpoint(api_client, upload_frame, settings, tmp_path, storage):
+    settings.MEDIA_ROOT = tmp_path
+    frame = generate_frame(500, seed=21)
+    frame.loc[3, 'Pressure'] = 10_000
+    dataset_id = upload_frame(frame, storage=storage).json()['dataset_id']
+    # Uploads without the ingest stage still announce the new dataset
+    assert DatasetEvent.objects.filter(kind=DatasetEvent.CREATED, dataset_id=dataset_id).exists()
+    url = f'/api/datasets/{dataset_id}/outliers/'
+
+    data = api_client.get(url, {'method': 'mad'}).json()
+    assert data['method'] == 'mad' and data['threshold'] == 3.5 and data['count'] == len(data['items'])
+    flagged = next(item for item in data['items'] if item['value'] == 10_000)
+    item = EquipmentItem.objects.select_related('type').get(pk=flagged['item_id'])
+    assert item.pressure == 10_000 and item.type.name == flagged['type'] and flagged['score'] > 3.5
+
+    # The default threshold is cached; stricter thresholds flag a subset
+    with CaptureQueriesContext(connection) as queries:
+        assert api_client.get(url, {'method': 'mad'}).json() == data
+    assert not any('equipment_api_equipmentitem' in query['sql'] for query in queries.captured_queries)
+    strict = api_client.get(url, {'method': 'mad', 'threshold': 20}).json()
+    assert strict['count'] < data['count']
+    pressure = api_client.get(url, {'method': 'mad', 'field': 'pressure'}).json()
+    assert pressure['items'] and all(item['field'] == 'pressure' for item in pressure['items'])
+
+    for params in [{'method': 'grubbs'}, {'threshold': '-1'}, {'threshold': 'x'}, {'field': 'speed'}]:
+        assert api_client.get(url, params).status_code == 400
+
+
+def test_outliers_detected_at_ingest(api_client, upload_frame, settings):
+    settings.DATASET_OUTLIER_METHODS = ('zscore', 'iqr')
+    frame = generate_frame(300, seed=22)
+    frame.loc[7, 'Temperature'] = -500
+    response = upload_frame(frame).json()
+    assert set(response['outliers']) == {'zscore', 'iqr'}
+    dataset = EquipmentDataset.objects.get(pk=response['dataset_id'])
+    assert response['outliers']['iqr'] == dataset.outliers_json['iqr']['count'] > 0
+
+    item_id = next(item['item_id'] for item in dataset.outliers_json['iqr']['items'] if item['value'] == -500)
+    assert EquipmentItem.objects.get(pk=item_id).temperature == -500
+    # Matches what the endpoint computes from the stored items
+    ingested = dataset.outliers_json['iqr']
+    dataset.outliers_json = {}
+    assert dataset.outliers('iqr') == ingested
+
+    api_client.patch(f'/api/equipment/{item_id}/', {'temperature': 40}, format='json')
+    assert EquipmentDataset.objects.get(pk=dataset.pk).outliers_json == {}
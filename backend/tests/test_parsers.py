@@ -0,0 +1,116 @@
+"""
+The CSV parsing engines must agree on rows, summaries and validation errors,
+so uploads behave the same whichever engine is selected.
+"""
+import gzip
+import io
+
+import numpy as np
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from equipment_api.parsers import (
+    LARGE_FILE_BYTES, SMALL_FILE_BYTES, CSVFormatError, EmptyCSVError, MissingColumnsError,
+    available_engines, parse_equipment_csv, parse_equipment_file, pyarrow, select_engine
+)
+from equipment_api.synthetic import generate_frame
+
+
+ENGINES = available_engines()
+
+
+def csv_bytes(frame):
+    return frame.to_csv(index=False).encode('utf-8')
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_match_reference(engine, tmp_path):
+    frame = generate_frame(2_000, seed=3)
+    path = tmp_path / 'equipment.csv'
+    path.write_bytes(csv_bytes(frame))
+
+    for source in (path, io.BytesIO(path.read_bytes())):
+        result = parse_equipment_csv(source, engine=engine)
+        assert result.engine == engine
+        assert result.errors == []
+        assert result.names.tolist() == frame['Equipment Name'].tolist()
+        assert result.types.tolist() == frame['Type'].tolist()
+        np.testing.assert_allclose(result.flowrate, frame['Flowrate'])
+        assert result.summary.count == 2_000
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_report_same_errors(engine):
+    data = csv_bytes(generate_frame(2_000, seed=3, dirty_fraction=0.02))
+    reference = parse_equipment_csv(io.BytesIO(data), engine='python')
+    result = parse_equipment_csv(io.BytesIO(data), engine=engine)
+
+    assert reference.error_count > 10
+    assert len(result.errors) == 10
+    assert (result.errors, result.error_count) == (reference.errors, reference.error_count)
+    assert result.summary is None
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_reject_bad_headers(engine):
+    with pytest.raises(EmptyCSVError):
+        parse_equipment_csv(io.BytesIO(b''), engine=engine)
+    with pytest.raises(MissingColumnsError) as excinfo:
+        parse_equipment_csv(io.BytesIO(b'Equipment Name,Type,Flowrate\nP-1,Pump,1\n'), engine=engine)
+    assert excinfo.value.missing == ['Pressure', 'Temperature']
+
+
+def test_select_engine_by_size():
+    assert select_engine(SMALL_FILE_BYTES - 1) == 'python'
+    assert select_engine(SMALL_FILE_BYTES) == 'pandas'
+    assert select_engine(None) == 'pandas'
+    assert select_engine(LARGE_FILE_BYTES) == ('pyarrow' if pyarrow is not None else 'pandas')
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_gzip_matches_plain_csv(engine, tmp_path):
+    data = csv_bytes(generate_frame(2_000, seed=3, dirty_fraction=0.01))
+    path = tmp_path / 'equipment.csv.gz'
+    path.write_bytes(gzip.compress(data))
+
+    reference = parse_equipment_csv(io.BytesIO(data), engine=engine)
+    result = parse_equipment_file(path, path.name, engine=engine)
+    assert result.names.tolist() == reference.names.tolist()
+    assert (result.errors, result.error_count) == (reference.errors, reference.error_count)
+
+
+def test_zstd_matches_plain_csv():
+    zstandard = pytest.importorskip('zstandard')
+    data = csv_bytes(generate_frame(2_000, seed=3))
+    result = parse_equipment_file(io.BytesIO(zstandard.ZstdCompressor().compress(data)), 'equipment.csv.zst')
+    assert result.names.tolist() == parse_equipment_csv(io.BytesIO(data)).names.tolist()
+
+
+def test_parquet_matches_plain_csv(tmp_path):
+    pytest.importorskip('pyarrow')
+    frame = generate_frame(2_000, seed=3)
+    path = tmp_path / 'equipment.parquet'
+    frame.to_parquet(path)
+    result = parse_equipment_file(path, path.name)
+    assert result.names.tolist() == frame['Equipment Name'].tolist()
+    np.testing.assert_allclose(result.temperature, frame['Temperature'])
+
+
+def test_corrupt_gzip_is_a_format_error():
+    data = gzip.compress(csv_bytes(generate_frame(2_000, seed=3)))
+    with pytest.raises(CSVFormatError):
+        parse_equipment_file(io.BytesIO(data[:len(data) // 2]), 'equipment.csv.gz')
+
+
+def test_upload_accepts_gzip(api_client):
+    data = gzip.compress(csv_bytes(generate_frame(500, seed=3)))
+    upload = SimpleUploadedFile('equipment.csv.gz', data, content_type='application/gzip')
+    response = api_client.post('/api/upload/', {'file': upload}, format='multipart')
+    assert response.status_code == 201, response.content
+    assert response.json()['summary']['total_equipment_count'] == 500
+    # The stored name does not depend on whether the client compressed the file
+    assert response.json()['filename'] == 'equipment.csv'
+
+    upload = SimpleUploadedFile('equipment.xlsx', b'not a csv')
+    response = api_client.post('/api/upload/', {'file': upload}, format='multipart')
+    assert response.status_code == 400
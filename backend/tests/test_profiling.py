@@ -0,0 +1,76 @@
+"""
+?_profile=cpu|memory profiles a request for staff users only, inline or
+saved to PROFILE_DIR.
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+
+URL = '/api/datasets/'
+
+
+@pytest.fixture
+def staff_client(staff_user):
+    client = Client()
+    client.force_login(staff_user)
+    return client
+
+
+def test_cpu_profile_inline(staff_client):
+    response = staff_client.get(URL, {'_profile': 'cpu', '_profile_sort': 'tottime', '_profile_limit': 5})
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    report = response.content.decode()
+    assert report.startswith(f"Profile {response['X-Profile-Id']}: GET {URL}?_profile=cpu")
+    assert '-> 200' in report and 'function calls' in report and 'Ordered by: internal time' in report
+    assert 'tracemalloc' not in report
+
+
+def test_memory_profile_via_header(staff_client):
+    response = staff_client.get(URL, HTTP_X_PROFILE='memory')
+    report = response.content.decode()
+    assert 'Memory (tracemalloc)' in report and 'peak:' in report
+
+
+def test_saved_profile_keeps_response(staff_client, settings, tmp_path):
+    settings.PROFILE_DIR = tmp_path
+    response = staff_client.get(
+        URL, {'_profile': 'cpu', '_profile_output': 'save'}, HTTP_X_REQUEST_ID='req-42'
+    )
+    assert response.status_code == 200 and response['X-Profile-Id'] == 'req-42'
+    assert response.json() == []
+    assert (tmp_path / 'req-42.prof').exists()
+    assert (tmp_path / 'req-42.txt').read_text().startswith('Profile req-42: GET')
+
+    # Request ids that are not safe file names are replaced
+    response = staff_client.get(
+        URL, {'_profile': 'cpu', '_profile_output': 'save'}, HTTP_X_REQUEST_ID='../escape'
+    )
+    assert response['X-Profile-Id'] != '../escape'
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        ['req-42.prof', 'req-42.txt', f"{response['X-Profile-Id']}.prof", f"{response['X-Profile-Id']}.txt"]
+    )
+
+
+def test_token_authenticated_staff(staff_user):
+    token = Token.objects.create(user=staff_user)
+    response = Client().get(URL, {'_profile': 'cpu'}, HTTP_AUTHORIZATION=f'Token {token.key}')
+    assert 'X-Profile-Id' in response and b'function calls' in response.content
+
+
+@pytest.mark.parametrize('mode', ['cpu', 'memory'])
+def test_non_staff_not_profiled(db, mode):
+    user = User.objects.create_user('viewer', password='test-password')
+    client = Client()
+    client.force_login(user)
+    response = client.get(URL, {'_profile': mode})
+    assert response.status_code == 200 and 'X-Profile-Id' not in response
+    assert response.json() == []
+
+    token = Token.objects.create(user=user)
+    response = Client().get(URL, HTTP_X_PROFILE=mode, HTTP_AUTHORIZATION=f'Token {token.key}')
+    assert 'X-Profile-Id' not in response
+    # Anonymous requests are not profiled either
+    assert 'X-Profile-Id' not in Client().get(URL, {'_profile': mode})
@@ -0,0 +1,207 @@
+"""
+SQL query and peak Python memory budgets per endpoint.
+
+Each endpoint declares how many queries and how much traced memory it may use
+as a function of dataset size. The read endpoints run against a 50k-row
+dataset (override with BUDGET_ROWS); the upload budget is checked with a
+synthetic CSV of the same size.
+
+Budgets are a fixed allowance plus a per-row slope. Endpoints that aggregate
+in the database must have a zero slope; only endpoints that return every row
+(retrieve, items, export) or ingest every row (upload) may grow with the dataset.
+Exports are streamed in chunks; their slope only covers the body the test
+collects. The column-cache variants read memory-mapped column files.
+"""
+import math
+import os
+import tracemalloc
+
+import pandas as pd
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+
+from equipment_api.metrics import QueryTimer
+from equipment_api.ingest import build_column_store, insert_items
+from equipment_api.models import EquipmentDataset
+from equipment_api.synthetic import generate_csv_bytes, generate_frame
+
+
+ROWS = int(os.environ.get('BUDGET_ROWS', 50_000))
+
+pytestmark = pytest.mark.budget
+
+
+class Budget:
+    def __init__(self, queries, memory_mb, queries_per_1k_rows=0, memory_kb_per_row=0):
+        self.queries = queries
+        self.memory_mb = memory_mb
+        self.queries_per_1k_rows = queries_per_1k_rows
+        self.memory_kb_per_row = memory_kb_per_row
+
+    def max_queries(self, rows):
+        return self.queries + math.ceil(rows / 1000 * self.queries_per_1k_rows)
+
+    def max_memory_bytes(self, rows):
+        return int(self.memory_mb * 2**20 + rows * self.memory_kb_per_row * 1024)
+
+
+BUDGETS = {
+    'upload': Budget(queries=25, queries_per_1k_rows=8, memory_mb=16, memory_kb_per_row=1.6),
+    'dataset-list': Budget(queries=3, memory_mb=2),
+    'dataset-retrieve': Budget(queries=4, memory_mb=8, memory_kb_per_row=2.8),
+    'dataset-summary': Budget(queries=3, memory_mb=2),
+    'dataset-chart-data': Budget(queries=3, memory_mb=2),
+    'dataset-items': Budget(queries=4, memory_mb=8, memory_kb_per_row=2.8),
+    'dataset-items-sparse': Budget(queries=4, memory_mb=4, memory_kb_per_row=0.6),
+    'dataset-stats': Budget(queries=3, memory_mb=2),
+    # Two dataset lookups, two counts, then a page query and a type-name lookup per section
+    'dataset-diff': Budget(queries=10, memory_mb=2),
+    'dataset-histogram': Budget(queries=5, memory_mb=2),
+    'dataset-export': Budget(queries=4, memory_mb=4, memory_kb_per_row=0.12),
+    'dataset-histogram-column-cache': Budget(queries=4, memory_mb=2, memory_kb_per_row=0.01),
+    'dataset-export-column-cache': Budget(queries=4, memory_mb=4, memory_kb_per_row=0.12),
+    'dataset-batch': Budget(queries=7, memory_mb=4),
+    # Without stored totals the cached dataset joins the GROUP BY over the items
+    'dataset-batch-column-cache': Budget(queries=7, memory_mb=4),
+    'dataset-compare': Budget(queries=5, memory_mb=2),
+    'dataset-correlation': Budget(queries=5, memory_mb=2, memory_kb_per_row=0.2),
+    'dataset-correlation-column-cache': Budget(queries=5, memory_mb=2, memory_kb_per_row=0.2),
+    'dataset-violations': Budget(queries=4, memory_mb=2),
+    'dataset-outliers': Budget(queries=5, memory_mb=2, memory_kb_per_row=0.2),
+    'dataset-timeseries': Budget(queries=3, memory_mb=2),
+    'equipment-list': Budget(queries=4, memory_mb=4),
+    'equipment-stats': Budget(queries=7, memory_mb=16),
+}
+
+
+def measure(client, method, url, **kwargs):
+    """Run one request, returning the response, query count and peak traced memory"""
+    queries = QueryTimer()
+    tracemalloc.start()
+    try:
+        with connection.execute_wrapper(queries):
+            response = getattr(client, method)(url, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return response, queries.count, peak
+
+
+def assert_within_budget(name, queries, peak, rows=ROWS):
+    budget = BUDGETS[name]
+    assert queries <= budget.max_queries(rows), (
+        f'{name} ran {queries} queries, budget is {budget.max_queries(rows)} at {rows} rows'
+    )
+    assert peak <= budget.max_memory_bytes(rows), (
+        f'{name} peaked at {peak / 2**20:.1f} MiB, '
+        f'budget is {budget.max_memory_bytes(rows) / 2**20:.1f} MiB at {rows} rows'
+    )
+
+
+@pytest.fixture(scope='module')
+def large_dataset(django_db_setup, django_db_blocker):
+    """A ROWS-item dataset inserted directly, shared by the read-endpoint tests"""
+    with django_db_blocker.unblock():
+        frame = generate_frame(ROWS, seed=1)
+        dataset = EquipmentDataset.objects.create(filename='budget.csv', summary_json={
+            'total_equipment_count': ROWS,
+        })
+        insert_items(dataset, *(frame[column].tolist() for column in frame.columns))
+        yield dataset
+        dataset.delete()
+
+
+@pytest.fixture(scope='module')
+def changed_dataset(django_db_setup, django_db_blocker):
+    """
+    large_dataset a week later, for the diff budget: every tenth reading
+    moved, 1% of the equipment (at least two pages) removed and as many new
+    pieces added
+    """
+    with django_db_blocker.unblock():
+        frame = generate_frame(ROWS, seed=1)
+        frame.loc[::10, 'Flowrate'] += 5
+        removed = max(ROWS // 100, 200)
+        frame = pd.concat([frame.iloc[removed:], generate_frame(removed, seed=4, start=ROWS)])
+        dataset = EquipmentDataset.objects.create(filename='budget-next.csv', summary_json={
+            'total_equipment_count': len(frame),
+        })
+        insert_items(dataset, *(frame[column].tolist() for column in frame.columns))
+        yield dataset
+        dataset.delete()
+
+
+@pytest.fixture(scope='module')
+def cached_dataset(django_db_setup, django_db_blocker, tmp_path_factory):
+    """A column-cache dataset, without stored totals, whose column files are memory-mapped"""
+    with django_db_blocker.unblock():
+        frame = generate_frame(ROWS, seed=3)
+        dataset = EquipmentDataset.objects.create(filename='budget.csv', storage=EquipmentDataset.COLUMN_CACHE)
+        insert_items(dataset, *(frame[column].tolist() for column in frame.columns))
+        with override_settings(MEDIA_ROOT=tmp_path_factory.mktemp('media')):
+            build_column_store(*(frame[column].tolist() for column in frame.columns)).save(dataset.columns_path)
+            yield dataset
+        dataset.delete()
+
+
+READ_ENDPOINTS = [
+    ('dataset-list', '/api/datasets/'),
+    ('dataset-retrieve', '/api/datasets/{id}/'),
+    ('dataset-summary', '/api/datasets/{id}/summary/'),
+    ('dataset-chart-data', '/api/datasets/{id}/chart_data/'),
+    ('dataset-items', '/api/datasets/{id}/items/'),
+    ('dataset-items-sparse', '/api/datasets/{id}/items/?fields=type,flowrate,pressure'),
+    ('dataset-stats', '/api/datasets/stats/'),
+    ('dataset-diff', '/api/datasets/{id}/diff/{changed_id}/?threshold=0.5&page=2'),
+    ('dataset-histogram', '/api/datasets/{id}/histogram/?field=pressure&bins=50'),
+    ('dataset-export', '/api/datasets/{id}/export/'),
+    ('dataset-histogram-column-cache', '/api/datasets/{cached_id}/histogram/?field=pressure&bins=50'),
+    ('dataset-export-column-cache', '/api/datasets/{cached_id}/export/'),
+    ('dataset-batch', '/api/datasets/batch/?ids={id}'),
+    ('dataset-batch-column-cache', '/api/datasets/batch/?ids={id},{cached_id}'),
+    ('dataset-compare', '/api/datasets/compare/?ids={id}'),
+    ('dataset-correlation', '/api/datasets/{id}/correlation/?by=type'),
+    ('dataset-correlation-column-cache', '/api/datasets/{cached_id}/correlation/?by=type'),
+    ('dataset-violations', '/api/datasets/{id}/violations/'),
+    ('dataset-outliers', '/api/datasets/{id}/outliers/?method=mad'),
+    ('dataset-timeseries', '/api/datasets/{id}/timeseries/?buckets=500'),
+    ('equipment-list', '/api/equipment/?dataset={id}'),
+    ('equipment-stats', '/api/equipment/stats/?dataset={id}'),
+]
+
+
+@pytest.fixture
+def warm_client(api_client):
+    """
+    api_client after one throwaway request: one-off costs of the first request
+    in the process (URL resolver, lazy imports) would otherwise be charged to
+    whichever endpoint happens to run first
+    """
+    api_client.get('/api/datasets/stats/')
+    return api_client
+
+
+@pytest.mark.parametrize('name,url', READ_ENDPOINTS, ids=[name for name, _ in READ_ENDPOINTS])
+def test_read_endpoint_budget(warm_client, large_dataset, cached_dataset, changed_dataset, name, url):
+    url = url.format(id=large_dataset.id, cached_id=cached_dataset.id, changed_id=changed_dataset.id)
+    response, queries, peak = measure(warm_client, 'get', url)
+    assert response.status_code == 200
+    if name == 'dataset-diff':
+        # Every section has rows on the measured page
+        assert all(response.json()[section] for section in ('changed', 'added', 'removed'))
+    assert_within_budget(name, queries, peak)
+
+
+def test_upload_budget(api_client):
+    upload = SimpleUploadedFile('budget.csv', generate_csv_bytes(ROWS, seed=2), content_type='text/csv')
+    response, queries, peak = measure(api_client, 'post', '/api/upload/', data={'file': upload}, format='multipart')
+    assert response.status_code == 201
+    assert_within_budget('upload', queries, peak)
+
+
+def test_budgets_cover_every_endpoint():
+    assert set(BUDGETS) == {'upload'} | {name for name, _ in READ_ENDPOINTS}
@@ -0,0 +1,64 @@
+"""
+`?fields=` limits the item fields returned and the columns selected.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture
+def dataset_id(upload_frame):
+    return upload_frame(generate_frame(150, seed=10), name='sparse.csv').json()['dataset_id']
+
+
+def item_columns(queries):
+    """SELECT list of the item query"""
+    sql = next(
+        query['sql'] for query in queries
+        if 'FROM "equipment_api_equipmentitem"' in query['sql'] and 'COUNT(' not in query['sql']
+    )
+    return sql.split(' FROM ')[0]
+
+
+def item_list(data):
+    if isinstance(data, list):
+        return data
+    return data['results'] if 'results' in data else data['equipment_items']
+
+
+@pytest.mark.parametrize('url', [
+    '/api/datasets/{id}/items/',
+    '/api/datasets/{id}/',
+    '/api/equipment/?dataset={id}',
+])
+def test_fields_project_items(api_client, dataset_id, url):
+    url = url.format(id=dataset_id)
+    with CaptureQueriesContext(connection) as queries:
+        data = api_client.get(url, {'fields': 'type,flowrate'}).json()
+    items = item_list(data)
+    assert items and all(set(item) == {'type', 'flowrate'} for item in items)
+    assert len(queries) <= 5
+    columns = item_columns(queries.captured_queries)
+    assert '"pressure"' not in columns and '"created_at"' not in columns and '"equipment_name"' not in columns
+
+    with CaptureQueriesContext(connection) as queries:
+        api_client.get(url, {'fields': 'pressure'})
+    assert '"equipment_api_equipmenttype"' not in item_columns(queries.captured_queries)
+
+    full_items = item_list(api_client.get(url).json())
+    assert set(full_items[0]) == {
+        'id', 'dataset', 'equipment_name', 'type', 'flowrate', 'pressure', 'temperature', 'ts', 'created_at'
+    }
+    # Sparse items are formatted exactly like the serializer's
+    fields = 'id,dataset,type,ts,created_at'
+    sparse_items = item_list(api_client.get(url, {'fields': fields}).json())
+    assert sparse_items == [{name: item[name] for name in fields.split(',')} for item in full_items]
+
+
+def test_unknown_fields_rejected(api_client, dataset_id):
+    response = api_client.get(f'/api/datasets/{dataset_id}/items/', {'fields': 'type,secret'})
+    assert response.status_code == 400
+    assert 'secret' in response.json()['error']
+    assert api_client.get('/api/equipment/', {'fields': ''}).status_code == 400
@@ -0,0 +1,137 @@
+"""
+Timestamped readings: the optional timestamp column at ingest and the
+downsampling /timeseries/ endpoint.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from equipment_api.models import EquipmentDataset
+from equipment_api.timeseries import lttb
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(50)
+    size = 3_000
+    start = pd.Timestamp('2024-03-01T00:00:00Z')
+    # Irregular historian timestamps (5-15 minutes apart), two pumps interleaved
+    times = start + pd.to_timedelta(np.cumsum(rng.integers(300, 900, size)), unit='s')
+    return pd.DataFrame({
+        'Timestamp': times.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'Equipment Name': np.where(np.arange(size) % 2, 'Pump P-2', 'Pump P-1'),
+        'Type': 'Centrifugal Pump',
+        'Flowrate': rng.normal(550, 20, size).round(2),
+        'Pressure': rng.normal(12.5, 1, size).round(2),
+        'Temperature': rng.normal(45, 3, size).round(2),
+    })
+
+
+def upload(upload_frame, frame):
+    response = upload_frame(frame, name='historian.csv')
+    assert response.status_code == 201, response.content
+    return EquipmentDataset.objects.get(pk=response.json()['dataset_id'])
+
+
+def epoch_seconds(frame):
+    # Timedelta arithmetic, whatever unit pandas picks for the parsed datetimes
+    times = pd.to_datetime(frame['Timestamp'], utc=True)
+    return (times - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy()
+
+
+def test_upload_stores_timestamps(api_client, upload_frame, frame):
+    dataset = upload(upload_frame, frame)
+    item = dataset.equipment_items.order_by('id').first()
+    assert item.ts == pd.Timestamp(frame['Timestamp'][0]).to_pydatetime()
+    assert api_client.get(f'/api/equipment/{item.pk}/').json()['ts'] == frame['Timestamp'][0]
+
+    items = dataset.equipment_items.filter(equipment_name='Pump P-1').order_by('ts')
+    assert 'equipment_a_dataset_972be0_idx' in items.explain()
+
+    bad = frame.head(5).copy()
+    bad.loc[3, 'Timestamp'] = 'yesterday'
+    # Day and month order would be a guess
+    bad.loc[1, 'Timestamp'] = '05/01/2024 10:00'
+    response = upload_frame(bad, name='bad.csv')
+    assert response.status_code == 400
+    errors = str(response.json())
+    assert 'Row 3: Timestamp must be an ISO 8601 date and time' in errors and 'Row 5:' in errors
+
+
+def test_generic_time_and_date_columns_are_not_timestamps(upload_frame, frame):
+    shifts = frame.head(5).drop(columns='Timestamp').assign(Date='05/01/2024', Time='night shift')
+    dataset = upload(upload_frame, shifts)
+    assert not dataset.equipment_items.filter(ts__isnull=False).exists()
+    assert dataset.extra_fields == {}
+
+
+def test_minmax_buckets_match_numpy(api_client, upload_frame, frame):
+    dataset = upload(upload_frame, frame)
+    response = api_client.get(
+        f'/api/datasets/{dataset.id}/timeseries/', {'name': 'Pump P-2', 'buckets': 40, 'fields': 'pressure'}
+    )
+    assert response.status_code == 200, response.content
+    data = response.json()
+
+    pump = frame[frame['Equipment Name'] == 'Pump P-2']
+    seconds = epoch_seconds(pump)
+    width = (seconds.max() - seconds.min()) / 40
+    buckets = np.minimum(((seconds - seconds.min()) // width).astype(int), 39)
+    grouped = pump.groupby(buckets)['Pressure']
+    assert data['count'] == len(pump)
+    assert data['series']['count'] == grouped.size().tolist()
+    assert data['series']['pressure']['max'] == grouped.max().tolist()
+    assert data['series']['pressure']['avg'] == pytest.approx(grouped.mean().tolist())
+    assert data['series']['ts'][0] == round(seconds.min() * 1000)
+    assert set(data['series']) == {'ts', 'count', 'pressure'}
+
+    # A time range limits the readings and fixes the bucket grid
+    start, end = '2024-03-05', '2024-03-06T00:00:00Z'
+    data = api_client.get(
+        f'/api/datasets/{dataset.id}/timeseries/', {'start': start, 'end': end, 'buckets': 24}
+    ).json()
+    times = pd.to_datetime(frame['Timestamp'], utc=True)
+    assert data['count'] == ((times >= pd.Timestamp(start, tz='UTC')) & (times < pd.Timestamp(end))).sum()
+    assert all(ts % 3_600_000 == 0 for ts in data['series']['ts'])
+    assert len(data['series']['ts']) == 24
+
+
+def test_lttb_series(api_client, upload_frame, frame):
+    dataset = upload(upload_frame, frame)
+    data = api_client.get(
+        f'/api/datasets/{dataset.id}/timeseries/', {'name': 'Pump P-1', 'method': 'lttb', 'buckets': 100}
+    ).json()
+    pump = frame[frame['Equipment Name'] == 'Pump P-1']
+    seconds = epoch_seconds(pump)
+    chosen = lttb(seconds, pump['Flowrate'], 100)
+    assert data['count'] == len(pump)
+    assert data['series']['flowrate']['values'] == pump['Flowrate'].to_numpy()[chosen].tolist()
+    assert data['series']['flowrate']['ts'] == np.round(seconds[chosen] * 1000).astype(int).tolist()
+
+
+@pytest.mark.parametrize('params', [
+    {'method': 'lttb'},
+    {'method': 'average'},
+    {'fields': 'pressure,level'},
+    {'buckets': 0},
+    {'start': 'last week'},
+])
+def test_invalid_timeseries_requests(api_client, upload_frame, frame, params):
+    dataset = upload(upload_frame, frame.head(10))
+    assert api_client.get(f'/api/datasets/{dataset.id}/timeseries/', params).status_code == 400
+
+
+def test_dataset_without_timestamps(api_client, upload_frame, frame):
+    dataset = upload(upload_frame, frame.drop(columns='Timestamp'))
+    data = api_client.get(f'/api/datasets/{dataset.id}/timeseries/').json()
+    assert data['count'] == 0 and data['series']['ts'] == []
+
+
+def test_lttb_keeps_extremes():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 300)
+    y[4_321] = 25.0
+    chosen = lttb(x, y, 200)
+    assert len(chosen) == 200 and chosen[0] == 0 and chosen[-1] == 9_999
+    assert 4_321 in chosen and np.all(np.diff(chosen) > 0)
+    assert lttb(x[:50], y[:50], 200).tolist() == list(range(50))
@@ -0,0 +1,54 @@
+"""
+Equipment trend series across datasets, ordered by upload time.
+"""
+import json
+
+import pytest
+from django.db import connection
+from rest_framework.utils.encoders import JSONEncoder
+
+from equipment_api.metrics import QueryTimer
+from equipment_api.models import EquipmentDataset
+from equipment_api.synthetic import generate_frame
+
+
+@pytest.fixture
+def uploads(upload_frame):
+    frame = generate_frame(200, seed=4)
+    ids = []
+    for step in range(3):
+        frame = frame.assign(Flowrate=frame['Flowrate'] + step)
+        ids.append(upload_frame(frame, name=f'week{step}.csv').json()['dataset_id'])
+    return frame, ids
+
+
+def test_trend_single(api_client, uploads):
+    frame, ids = uploads
+    name = frame.loc[0, 'Equipment Name']
+    data = api_client.get('/api/equipment/trend/', {'name': name}).json()
+
+    uploaded = EquipmentDataset.objects.filter(pk__in=ids).order_by('uploaded_at').values_list('uploaded_at', flat=True)
+    assert data['dataset_ids'] == ids
+    # Compared as rendered, since the JSON encoder keeps milliseconds only
+    assert data['uploaded_at'] == json.loads(json.dumps(list(uploaded), cls=JSONEncoder))
+    base = data['flowrate'][0]
+    assert data['flowrate'] == pytest.approx([base, base + 1, base + 3])
+
+    assert api_client.get('/api/equipment/trend/', {'name': 'Nope'}).status_code == 404
+    assert api_client.get('/api/equipment/trend/').status_code == 400
+
+
+def test_trend_batch_single_query(api_client, uploads):
+    frame, _ = uploads
+    names = frame['Equipment Name'][:50].tolist()
+    queries = QueryTimer()
+    with connection.execute_wrapper(queries):
+        response = api_client.post('/api/equipment/trend/batch/', {'names': names + ['Nope']}, format='json')
+    assert response.status_code == 200
+    assert queries.count == 1
+    series = response.json()['series']
+    assert set(series) == set(names)
+    assert all(len(entry['flowrate']) == 3 for entry in series.values())
+
+    response = api_client.get('/api/equipment/trend/batch/', {'names': ','.join(names[:2])})
+    assert set(response.json()['series']) == set(names[:2])
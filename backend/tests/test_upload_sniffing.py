@@ -0,0 +1,100 @@
+"""
+Uploads are checked for size and header while they stream in, before the
+body is stored or parsed.
+"""
+import gzip
+import io
+import tracemalloc
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import MemoryFileUploadHandler, StopUpload
+from django.http.multipartparser import MultiPartParser
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+from equipment_api import views
+from equipment_api.parsers import CSVFormatError, MissingColumnsError, sniff_header
+from equipment_api.synthetic import generate_csv_bytes
+from equipment_api.uploads import SNIFF_BYTES, SniffingUploadHandler
+
+
+HEADER = b'Equipment Name,Type,Flowrate,Pressure,Temperature'
+
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    """Fail the test if a rejected upload still reaches the parser"""
+    def parse(*args, **kwargs):
+        raise AssertionError('upload should have been rejected before parsing')
+    monkeypatch.setattr(views, 'parse_equipment_file', parse)
+
+
+def test_sniff_header():
+    assert sniff_header(HEADER[:20]) is None
+    assert sniff_header(b'\xef\xbb\xbf' + HEADER + b'\r\nPump,P,1,2,3') == HEADER.decode().split(',')
+    assert sniff_header(HEADER, final=True) is not None
+    with pytest.raises(CSVFormatError, match='semicolons'):
+        sniff_header(HEADER.replace(b',', b';') + b'\n')
+    with pytest.raises(CSVFormatError, match='UTF-8'):
+        sniff_header('Équipement,Type'.encode('latin-1') + b'\n')
+    with pytest.raises(MissingColumnsError) as missing:
+        sniff_header(b'Equipment Name,Type,Flow\n')
+    assert missing.value.missing == ['Flowrate', 'Pressure', 'Temperature']
+
+
+@pytest.mark.parametrize('content,compress,message', [
+    (HEADER.replace(b',', b'\t') + b'\nPump\tP\t1\t2\t3\n', False, 'separated by tabs'),
+    (b'Name,Kind,Flowrate\nPump,P,1\n', False, 'Missing required columns'),
+    (b'Name,Kind,Flowrate\nPump,P,1\n', True, 'Missing required columns'),
+    (b'', False, 'empty or invalid'),
+])
+def test_bad_upload_rejected_before_parsing(api_client, no_parsing, content, compress, message):
+    name = 'bad.csv'
+    if compress:
+        content, name = gzip.compress(content), 'bad.csv.gz'
+    response = api_client.post('/api/upload/', {'file': SimpleUploadedFile(name, content)}, format='multipart')
+    assert response.status_code == 400
+    assert message in response.json()['error']
+
+
+def test_oversized_upload_rejected(api_client, settings, no_parsing):
+    settings.UPLOAD_MAX_BYTES = 10_000
+    upload = SimpleUploadedFile('big.csv', generate_csv_bytes(1_000, seed=1))
+    response = api_client.post('/api/upload/', {'file': upload}, format='multipart')
+    assert response.status_code == 413
+    assert response.json()['max_bytes'] == 10_000
+
+
+def test_bad_header_stops_reading_body():
+    content = HEADER.replace(b',', b';') + b'\n' + b'x' * (4 * 1024 * 1024)
+    body = encode_multipart(BOUNDARY, {'file': SimpleUploadedFile('bad.csv', content)})
+    stream = io.BytesIO(body)
+    sniffer = SniffingUploadHandler(max_size=None)
+    meta = {'CONTENT_TYPE': MULTIPART_CONTENT, 'CONTENT_LENGTH': str(len(body))}
+    _, files = MultiPartParser(meta, stream, [sniffer, MemoryFileUploadHandler()]).parse()
+
+    assert 'file' not in files
+    assert sniffer.error_response().status_code == 400
+    assert stream.tell() < len(body) // 10
+
+
+def test_zstd_sniff_output_is_bounded():
+    zstandard = pytest.importorskip('zstandard')
+    # A few KB that expand to 64 MB must not be decompressed in full to find the header
+    bomb = zstandard.ZstdCompressor().compress(HEADER + b'\n' + b'x' * (64 * 1024 * 1024))
+    sniffer = SniffingUploadHandler(max_size=None)
+    sniffer.new_file('file', 'bomb.csv.zst', 'application/zstd', len(bomb))
+    tracemalloc.start()
+    try:
+        sniffer.receive_data_chunk(bomb, 0)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 4 * 1024 * 1024
+    assert not sniffer.sniffing and sniffer.error is None
+    assert len(sniffer.buffer) == SNIFF_BYTES
+
+    sniffer.new_file('file', 'bad.csv.zst', 'application/zstd', None)
+    with pytest.raises(StopUpload):
+        sniffer.receive_data_chunk(zstandard.ZstdCompressor().compress(b'Name,Kind\n' + b'x' * 100_000), 0)
+    assert 'Missing required columns' in sniffer.error_response().data['error']
@@ -37,6 +37,7 @@ class MainWindow(QMainWindow):
         else:
             self.init_ui()
             self.show()
+            self.history_widget.start_live_updates()
     
     def init_ui(self):
         self.setWindowTitle("Chemical Equipment Parameter Visualizer")
@@ -323,13 +324,14 @@ class MainWindow(QMainWindow):
     def load_dataset_data(self, dataset_id: int):
         """Load data for a specific dataset"""
         try:
-            # Load equipment items
-            equipment_items = self.api_client.get_equipment_items(dataset_id)
+            # Load the first page of equipment items and the chart data in one request
+            batch = self.api_client.get_datasets_batch([dataset_id], include=['chart_data', 'items_page'])
+            if not batch['datasets']:
+                raise ValueError(f"Dataset {dataset_id} no longer exists")
+            dataset = batch['datasets'][0]
+            equipment_items = dataset['items_page']['results']
             self.table_widget.load_data(equipment_items)
-            
-            # Load chart data
-            chart_data = self.api_client.get_chart_data(dataset_id)
-            self.chart_widget.load_data(chart_data, equipment_items)
+            self.chart_widget.load_data(dataset['chart_data'], equipment_items)
             
         except Exception as e:
             msg_box = QMessageBox(self)
@@ -367,6 +369,12 @@ class MainWindow(QMainWindow):
         self.history_widget.load_datasets()
         self.statusBar().showMessage("Data refreshed", 2000)
     
+    def closeEvent(self, event):
+        """Stop background threads before closing"""
+        if hasattr(self, 'history_widget'):
+            self.history_widget.stop_live_updates()
+        super().closeEvent(event)
+    
     def show_login(self):
         """Show login dialog"""
         login_dialog = LoginDialog(self)
@@ -382,6 +390,7 @@ class MainWindow(QMainWindow):
             if not hasattr(self, 'tabs') or self.tabs is None:
                 self.init_ui()
             self.show()
+            self.history_widget.start_live_updates()
         except Exception as e:
             msg_box = QMessageBox(self)
             msg_box.setIcon(QMessageBox.Critical)
@@ -429,6 +438,7 @@ class MainWindow(QMainWindow):
             if not hasattr(self, 'tabs') or self.tabs is None:
                 self.init_ui()
             self.show()
+            self.history_widget.start_live_updates()
             
             # Show success message
             msg_box = QMessageBox(self)
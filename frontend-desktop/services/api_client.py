@@ -5,8 +5,11 @@ Handles all communication with Django REST API backend
 
 import requests
 from typing import Optional, Dict, List, Any
+import gzip
 import os
 import json
+import shutil
+import tempfile
 
 
 class APIClient:
@@ -132,12 +135,17 @@ class APIClient:
         response.raise_for_status()
         return response.json()
     
-    def upload_csv(self, file_path: str) -> Dict[str, Any]:
+    # Files that are already compressed or columnar are sent as-is
+    PRECOMPRESSED_SUFFIXES = ('.gz', '.zst', '.parquet')
+
+    def upload_csv(self, file_path: str, compress: bool = False) -> Dict[str, Any]:
         """
         Upload a CSV file to the backend
         
         Args:
-            file_path: Path to the CSV file
+            file_path: Path to the CSV file (.csv, .csv.gz, .csv.zst or .parquet)
+            compress: Gzip a plain CSV before sending it (sent as <name>.gz; the
+                server stores the dataset under the original name)
             
         Returns:
             Response data from the API
@@ -148,19 +156,40 @@ class APIClient:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        with open(file_path, 'rb') as f:
-            files = {'file': (os.path.basename(file_path), f, 'text/csv')}
-            headers = {}
-            if self.token:
-                headers['Authorization'] = f'Token {self.token}'
-            response = requests.post(
-                f"{self.base_url}/upload/",
-                files=files,
-                headers=headers,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return response.json()
+        filename = os.path.basename(file_path)
+        content_type = 'text/csv'
+        if filename.lower().endswith(self.PRECOMPRESSED_SUFFIXES):
+            compress = False
+            content_type = 'application/octet-stream'
+        
+        with open(file_path, 'rb') as source:
+            if compress:
+                # Compress into a spooled file so large CSVs do not sit in memory
+                payload = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+                with gzip.GzipFile(filename=filename, mode='wb', fileobj=payload, compresslevel=6) as gz:
+                    shutil.copyfileobj(source, gz, length=1024 * 1024)
+                payload.seek(0)
+                filename += '.gz'
+                content_type = 'application/gzip'
+            else:
+                payload = source
+            
+            try:
+                files = {'file': (filename, payload, content_type)}
+                headers = {}
+                if self.token:
+                    headers['Authorization'] = f'Token {self.token}'
+                response = requests.post(
+                    f"{self.base_url}/upload/",
+                    files=files,
+                    headers=headers,
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+                return response.json()
+            finally:
+                if payload is not source:
+                    payload.close()
     
     def get_datasets(self) -> List[Dict[str, Any]]:
         """
@@ -177,6 +206,29 @@ class APIClient:
         response.raise_for_status()
         return response.json()
     
+    def get_dataset_events(self, since: Optional[int] = None, wait: int = 25) -> Dict[str, Any]:
+        """
+        Long-poll for dataset created/deleted/pruned events
+        
+        Args:
+            since: Cursor returned by the previous call; None fetches the current cursor
+            wait: Seconds the server may hold the request open waiting for events
+            
+        Returns:
+            Dictionary with 'cursor', 'reset' and 'events'
+        """
+        params = {'timeout': wait}
+        if since is not None:
+            params['since'] = since
+        response = requests.get(
+            f"{self.base_url}/datasets/events/",
+            params=params,
+            headers=self.get_headers(),
+            timeout=self.timeout + wait
+        )
+        response.raise_for_status()
+        return response.json()
+    
     def get_dataset(self, dataset_id: int) -> Dict[str, Any]:
         """
         Get specific dataset details
@@ -231,21 +283,215 @@ class APIClient:
         response.raise_for_status()
         return response.json()
     
-    def get_equipment_items(self, dataset_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    def get_datasets_batch(self, dataset_ids: List[int],
+                           include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get summary, chart data and the first page of items for several datasets in one request
+        
+        Args:
+            dataset_ids: IDs of the datasets
+            include: Parts to return (summary, chart_data, items_page); all when omitted
+            
+        Returns:
+            Dictionary with 'datasets' (in the requested order) and 'missing' ids
+        """
+        params = {'ids': ','.join(str(dataset_id) for dataset_id in dataset_ids)}
+        if include:
+            params['include'] = ','.join(include)
+        response = requests.get(
+            f"{self.base_url}/datasets/batch/",
+            params=params,
+            headers=self.get_headers(),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def compare_datasets(self, dataset_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Compare per-type aggregates across datasets
+        
+        Args:
+            dataset_ids: IDs of the datasets; all retained datasets when omitted
+            
+        Returns:
+            Dictionary with 'datasets', 'types', 'metrics' and a dense
+            datasets x types x metrics 'values' matrix
+        """
+        params = {}
+        if dataset_ids:
+            params['ids'] = ','.join(str(dataset_id) for dataset_id in dataset_ids)
+        response = requests.get(
+            f"{self.base_url}/datasets/compare/",
+            params=params,
+            headers=self.get_headers(),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_correlation(self, dataset_id: int, by: str = 'type') -> Dict[str, Any]:
+        """
+        Get covariance, Pearson and Spearman matrices of the numeric fields
+        
+        Args:
+            dataset_id: ID of the dataset
+            by: 'type' for one set of matrices per equipment type, 'dataset' for all rows
+            
+        Returns:
+            Dictionary with 'fields' and the matrices under 'types' or 'dataset'
+        """
+        response = requests.get(
+            f"{self.base_url}/datasets/{dataset_id}/correlation/",
+            params={'by': by},
+            headers=self.get_headers(),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_violations(self, dataset_id: int, field: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get readings outside the operating limits of their equipment type
+        
+        Args:
+            dataset_id: ID of the dataset
+            field: Optional numeric field to filter by
+            
+        Returns:
+            List of violation dictionaries (item_id, equipment_name, type,
+            field, bound, value, limit), following every page
+        """
+        url = f"{self.base_url}/datasets/{dataset_id}/violations/"
+        params = {'field': field} if field else {}
+        violations = []
+        while url:
+            response = requests.get(url, params=params, headers=self.get_headers(), timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            violations.extend(data['results'])
+            # `next` already carries the query parameters
+            url, params = data['next'], None
+        return violations
+    
+    def get_outliers(self, dataset_id: int, method: str = 'zscore',
+                     threshold: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get items whose readings are outliers within their equipment type
+        
+        Args:
+            dataset_id: ID of the dataset
+            method: 'zscore', 'mad' or 'iqr'
+            threshold: Optional cut-off (the method's default when omitted)
+            
+        Returns:
+            Dictionary with method, threshold, count and flagged 'items'
+            (item_id, type, field, value, score)
+        """
+        params = {'method': method}
+        if threshold is not None:
+            params['threshold'] = threshold
+        response = requests.get(
+            f"{self.base_url}/datasets/{dataset_id}/outliers/",
+            params=params,
+            headers=self.get_headers(),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_timeseries(self, dataset_id: int, name: Optional[str] = None, method: str = 'minmax',
+                       buckets: int = 500, fields: Optional[List[str]] = None,
+                       start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get timestamped readings downsampled on the server for plotting
+        
+        Args:
+            dataset_id: ID of the dataset
+            name: Optional equipment name (required for 'lttb')
+            method: 'minmax' (min/max/mean per time bucket) or 'lttb'
+            buckets: Number of buckets (points per field for 'lttb')
+            fields: Optional subset of flowrate, pressure, temperature
+            start: Optional ISO 8601 start time (inclusive)
+            end: Optional ISO 8601 end time (exclusive)
+            
+        Returns:
+            Dictionary with count and 'series' (times in epoch milliseconds)
+        """
+        params = {'method': method, 'buckets': buckets}
+        for key, value in (('name', name), ('start', start), ('end', end)):
+            if value is not None:
+                params[key] = value
+        if fields:
+            params['fields'] = ','.join(fields)
+        response = requests.get(
+            f"{self.base_url}/datasets/{dataset_id}/timeseries/",
+            params=params,
+            headers=self.get_headers(),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_equipment_trend(self, name: str) -> Dict[str, Any]:
+        """
+        Get the history of one piece of equipment across retained datasets
+        
+        Args:
+            name: Equipment name
+            
+        Returns:
+            Series dictionary with dataset_ids, uploaded_at, type, flowrate,
+            pressure and temperature lists ordered by upload time
+        """
+        response = requests.get(
+            f"{self.base_url}/equipment/trend/",
+            params={'name': name},
+            headers=self.get_headers(),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_equipment_trends(self, names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get trend series for many pieces of equipment in one request
+        
+        Args:
+            names: Equipment names
+            
+        Returns:
+            Series dictionaries keyed by equipment name (names without readings are omitted)
+        """
+        response = requests.post(
+            f"{self.base_url}/equipment/trend/batch/",
+            json={'names': names},
+            headers=self.get_headers(),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()['series']
+    
+    def get_equipment_items(self, dataset_id: Optional[int] = None,
+                            fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Get equipment items, optionally filtered by dataset
         
         Args:
             dataset_id: Optional dataset ID to filter by
+            fields: Optional item fields to return (e.g. ['type', 'flowrate']); all when omitted
             
         Returns:
             List of equipment item dictionaries
         """
         url = f"{self.base_url}/equipment/"
+        params = {}
         if dataset_id:
-            url += f"?dataset={dataset_id}"
+            params['dataset'] = dataset_id
+        if fields:
+            params['fields'] = ','.join(fields)
         
-        response = requests.get(url, headers=self.get_headers(), timeout=self.timeout)
+        response = requests.get(url, params=params, headers=self.get_headers(), timeout=self.timeout)
         response.raise_for_status()
         data = response.json()
         
@@ -6,9 +6,70 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem,
     QPushButton, QLabel, QMessageBox
 )
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 from datetime import datetime
+import queue
+import threading
+
+
+class DatasetEventThread(QThread):
+    """Thread that long-polls the backend for dataset events"""
+    events_received = pyqtSignal(list)
+    reset_required = pyqtSignal()
+    
+    RETRY_DELAY_MS = 5000
+    CHECK_INTERVAL = 0.2
+    
+    def __init__(self, api_client):
+        super().__init__()
+        self.api_client = api_client
+        self.cursor = None
+    
+    def run(self):
+        while not self.isInterruptionRequested():
+            data, error = self.fetch_events()
+            if self.isInterruptionRequested():
+                break
+            if error is not None:
+                self.sleep_interruptibly(self.RETRY_DELAY_MS)
+                continue
+            if self.cursor is not None and data.get('reset'):
+                self.reset_required.emit()
+            elif data.get('events'):
+                self.events_received.emit(data['events'])
+            self.cursor = data.get('cursor', self.cursor)
+    
+    def fetch_events(self):
+        """
+        Run one long-poll in a daemon thread and wait for it while checking
+        for interruption, so stopping never waits for the server to answer.
+        An abandoned poll finishes (or dies with the process) on its own.
+        """
+        results = queue.Queue(maxsize=1)
+        cursor = self.cursor
+        
+        def poll():
+            try:
+                results.put((self.api_client.get_dataset_events(cursor), None))
+            except Exception as e:
+                results.put((None, e))
+        
+        threading.Thread(target=poll, daemon=True).start()
+        while not self.isInterruptionRequested():
+            try:
+                return results.get(timeout=self.CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+        return None, None
+    
+    def sleep_interruptibly(self, msecs: int):
+        """Sleep for up to msecs, returning early when interruption is requested"""
+        step = int(self.CHECK_INTERVAL * 1000)
+        for _ in range(0, msecs, step):
+            if self.isInterruptionRequested():
+                return
+            self.msleep(step)
 
 
 class HistoryWidget(QWidget):
@@ -21,6 +82,8 @@ class HistoryWidget(QWidget):
         super().__init__(parent)
         self.api_client = api_client
         self.datasets = []
+        self.event_thread = None
+        self.stopping_threads = []  # Stopped listeners kept alive until they exit
         self.init_ui()
     
     def init_ui(self):
@@ -158,6 +221,48 @@ class HistoryWidget(QWidget):
             """)
             msg_box.exec_()
     
+    def start_live_updates(self):
+        """Start listening for dataset events so the list updates without refreshing"""
+        if self.event_thread and self.event_thread.isRunning():
+            return
+        self.event_thread = DatasetEventThread(self.api_client)
+        self.event_thread.events_received.connect(self.apply_events)
+        self.event_thread.reset_required.connect(self.load_datasets)
+        self.event_thread.start()
+    
+    def stop_live_updates(self):
+        """Stop the event listener thread"""
+        thread, self.event_thread = self.event_thread, None
+        if not thread:
+            return
+        thread.events_received.disconnect(self.apply_events)
+        thread.reset_required.disconnect(self.load_datasets)
+        thread.requestInterruption()
+        if not thread.wait(1000):
+            # Destroying a running QThread aborts the process: keep it until it exits
+            self.stopping_threads.append(thread)
+            thread.finished.connect(lambda: self.stopping_threads.remove(thread))
+    
+    def apply_events(self, events: list):
+        """Apply dataset events to the current list incrementally"""
+        for event in events:
+            dataset_id = event.get('dataset_id')
+            known = any(d.get('id') == dataset_id for d in self.datasets)
+            if event.get('kind') == 'created':
+                if not known:
+                    self.datasets.insert(0, event.get('dataset', {}))
+                    self.datasets = self.datasets[:5]
+            elif event.get('kind') == 'updated':
+                # Rows were appended: refresh the summary shown for the dataset
+                self.datasets = [
+                    event.get('dataset', d) if d.get('id') == dataset_id else d
+                    for d in self.datasets
+                ]
+            elif known:
+                self.datasets = [d for d in self.datasets if d.get('id') != dataset_id]
+                self.dataset_deleted.emit(dataset_id)
+        self.update_list()
+    
     def update_list(self):
         """Update the list widget with current datasets"""
         self.list_widget.clear()
@@ -7,6 +7,8 @@ from PyQt5.QtWidgets import (
     QLabel, QLineEdit, QProgressBar, QMessageBox, QFileDialog
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
+import os
+import requests
 from pathlib import Path
 from services.api_client import APIClient
 
@@ -16,6 +18,15 @@ class UploadThread(QThread):
     upload_progress = pyqtSignal(int)
     upload_complete = pyqtSignal(dict)
     upload_error = pyqtSignal(str)
+    upload_retrying = pyqtSignal(int, int)  # seconds until the next attempt, attempt number
+    
+    # Plain CSVs larger than this are gzipped before sending
+    COMPRESS_ABOVE_BYTES = 1024 * 1024
+    
+    # Retries when the server is busy (429), waiting as long as its Retry-After asks
+    MAX_RETRIES = 5
+    DEFAULT_RETRY_AFTER = 5
+    MAX_RETRY_AFTER = 60
     
     def __init__(self, api_client, file_path):
         super().__init__()
@@ -25,11 +36,31 @@ class UploadThread(QThread):
     def run(self):
         try:
             self.upload_progress.emit(50)
-            result = self.api_client.upload_csv(self.file_path)
+            compress = os.path.getsize(self.file_path) > self.COMPRESS_ABOVE_BYTES
+            attempt = 0
+            while True:
+                try:
+                    result = self.api_client.upload_csv(self.file_path, compress=compress)
+                    break
+                except requests.HTTPError as e:
+                    if e.response is None or e.response.status_code != 429 or attempt >= self.MAX_RETRIES:
+                        raise
+                    attempt += 1
+                    delay = self.retry_after(e.response)
+                    self.upload_retrying.emit(delay, attempt)
+                    self.sleep(delay)
             self.upload_progress.emit(100)
             self.upload_complete.emit(result)
         except Exception as e:
             self.upload_error.emit(str(e))
+    
+    def retry_after(self, response) -> int:
+        """Seconds to wait before retrying, from the Retry-After header"""
+        try:
+            delay = int(response.headers.get('Retry-After', self.DEFAULT_RETRY_AFTER))
+        except ValueError:
+            delay = self.DEFAULT_RETRY_AFTER
+        return max(1, min(delay, self.MAX_RETRY_AFTER))
 
 
 class UploadWidget(QWidget):
@@ -195,7 +226,7 @@ class UploadWidget(QWidget):
             self,
             "Select CSV File",
             str(Path.home()),
-            "CSV Files (*.csv);;All Files (*)"
+            "Equipment Data (*.csv *.csv.gz *.csv.zst *.parquet);;CSV Files (*.csv);;All Files (*)"
         )
         
         if file_path:
@@ -288,12 +319,20 @@ class UploadWidget(QWidget):
         self.upload_thread.upload_progress.connect(self.update_progress)
         self.upload_thread.upload_complete.connect(self.on_upload_success)
         self.upload_thread.upload_error.connect(self.on_upload_error)
+        self.upload_thread.upload_retrying.connect(self.on_upload_retrying)
         self.upload_thread.start()
     
     def update_progress(self, value: int):
         """Update progress bar"""
         self.progress_bar.setValue(value)
     
+    def on_upload_retrying(self, seconds: int, attempt: int):
+        """Show that the server is busy and the upload will be retried"""
+        self.status_label.setText(
+            f"⏳ Server busy, retrying in {seconds}s "
+            f"(attempt {attempt} of {UploadThread.MAX_RETRIES})..."
+        )
+    
     def on_upload_success(self, result: dict):
         """Handle successful upload"""
         self.progress_bar.setValue(100)
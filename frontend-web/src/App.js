@@ -10,9 +10,8 @@ import DataTable from './components/DataTable';
 import { logout } from './services/api';
 import {
   getDatasets,
-  getDatasetSummary,
-  getChartData,
-  getEquipmentItems,
+  getDatasetEvents,
+  getDatasetsBatch,
   deleteDataset,
 } from './services/api';
 import './App.css';
@@ -67,6 +66,49 @@ function App() {
     }
   }, [loadDatasets, isAuthenticated]);
 
+  // Keep the history list in sync with server events instead of polling
+  useEffect(() => {
+    if (!isAuthenticated) {
+      return undefined;
+    }
+    let cancelled = false;
+    const listen = async () => {
+      let cursor = null;
+      while (!cancelled) {
+        try {
+          const data = await getDatasetEvents(cursor);
+          if (cancelled) break;
+          if (cursor !== null && data.reset) {
+            setDatasets(await getDatasets());
+          } else if (data.events.length > 0) {
+            setDatasets((current) => {
+              let next = current;
+              data.events.forEach((event) => {
+                const known = next.some((d) => d.id === event.dataset_id);
+                if (event.kind === 'created') {
+                  if (!known) next = [event.dataset, ...next].slice(0, 5);
+                } else if (event.kind === 'updated') {
+                  next = next.map((d) => (d.id === event.dataset_id ? event.dataset : d));
+                } else if (known) {
+                  next = next.filter((d) => d.id !== event.dataset_id);
+                }
+              });
+              return next;
+            });
+          }
+          cursor = data.cursor;
+        } catch (err) {
+          console.error(err);
+          await new Promise((resolve) => setTimeout(resolve, 5000));
+        }
+      }
+    };
+    listen();
+    return () => {
+      cancelled = true;
+    };
+  }, [isAuthenticated]);
+
   // Load selected dataset details (only if authenticated)
   useEffect(() => {
     if (isAuthenticated && selectedDataset) {
@@ -81,24 +123,15 @@ function App() {
     try {
       setLoading(true);
       
-      // Load all data in parallel
-      const [summaryData, chart, items] = await Promise.all([
-        getDatasetSummary(datasetId),
-        getChartData(datasetId),
-        getEquipmentItems(datasetId),
-      ]);
-
-      setSummary(summaryData);
-      setChartData(chart);
-      
-      // Handle paginated response
-      if (Array.isArray(items)) {
-        setEquipmentItems(items);
-      } else if (items.results) {
-        setEquipmentItems(items.results);
-      } else {
-        setEquipmentItems([]);
+      // Load summary, chart data and the first page of items in one request
+      const { datasets: [dataset] } = await getDatasetsBatch([datasetId]);
+      if (!dataset) {
+        throw new Error(`Dataset ${datasetId} no longer exists`);
       }
+
+      setSummary(dataset.summary);
+      setChartData(dataset.chart_data);
+      setEquipmentItems(dataset.items_page.results);
       
       setError(null);
     } catch (err) {
@@ -2,6 +2,9 @@ import React, { useState, useRef } from 'react';
 import { uploadCSV } from '../services/api';
 import './UploadForm.css';
 
+// Plain, gzip/zstd compressed CSV or Parquet (checked by the backend as well)
+const ACCEPTED_EXTENSIONS = ['.csv', '.csv.gz', '.csv.zst', '.parquet'];
+
 function UploadForm({ onUploadSuccess }) {
   const [file, setFile] = useState(null);
   const [uploading, setUploading] = useState(false);
@@ -13,8 +16,9 @@ function UploadForm({ onUploadSuccess }) {
   const validateFile = (selectedFile) => {
     if (!selectedFile) return false;
     
-    if (!selectedFile.name.endsWith('.csv')) {
-      setError('Please select a CSV file');
+    const name = selectedFile.name.toLowerCase();
+    if (!ACCEPTED_EXTENSIONS.some((extension) => name.endsWith(extension))) {
+      setError('Please select a CSV file (.csv, .csv.gz, .csv.zst) or a Parquet file');
       setFile(null);
       return false;
     }
@@ -104,7 +108,7 @@ function UploadForm({ onUploadSuccess }) {
             ref={fileInputRef}
             type="file"
             id="csv-file"
-            accept=".csv"
+            accept=".csv,.gz,.zst,.parquet"
             onChange={handleFileChange}
             disabled={uploading || success}
             className="file-input"
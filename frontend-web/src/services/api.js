@@ -92,6 +92,16 @@ export const getDatasets = async () => {
   return response.data;
 };
 
+// Long-poll for dataset created/deleted/pruned events after a cursor
+export const getDatasetEvents = async (since = null, timeout = 25) => {
+  const params = { timeout };
+  if (since !== null) {
+    params.since = since;
+  }
+  const response = await api.get('/datasets/events/', { params });
+  return response.data;
+};
+
 // Get specific dataset details
 export const getDataset = async (datasetId) => {
   const response = await api.get(`/datasets/${datasetId}/`);
@@ -110,12 +120,72 @@ export const getChartData = async (datasetId) => {
   return response.data;
 };
 
-// Get equipment items (optionally filtered by dataset)
-export const getEquipmentItems = async (datasetId = null) => {
-  const url = datasetId 
-    ? `/equipment/?dataset=${datasetId}`
-    : '/equipment/';
-  const response = await api.get(url);
+// Get summary, chart data and the first page of items for several datasets in one request
+export const getDatasetsBatch = async (datasetIds, include = null) => {
+  const params = { ids: datasetIds.join(',') };
+  if (include) params.include = include.join(',');
+  const response = await api.get('/datasets/batch/', { params });
+  return response.data;
+};
+
+// Compare per-type aggregates across datasets (all retained datasets when no ids are given)
+export const compareDatasets = async (datasetIds = null) => {
+  const params = datasetIds ? { ids: datasetIds.join(',') } : {};
+  const response = await api.get('/datasets/compare/', { params });
+  return response.data;
+};
+
+// Get covariance, Pearson and Spearman matrices per equipment type ('type') or over all rows ('dataset')
+export const getCorrelation = async (datasetId, by = 'type') => {
+  const response = await api.get(`/datasets/${datasetId}/correlation/`, { params: { by } });
+  return response.data;
+};
+
+// Get one page of readings outside the operating limits of their type (optionally for one field)
+export const getViolations = async (datasetId, field = null, page = 1) => {
+  const params = { page };
+  if (field) params.field = field;
+  const response = await api.get(`/datasets/${datasetId}/violations/`, { params });
+  return response.data;
+};
+
+// Get items whose readings are outliers within their type ('zscore', 'mad' or 'iqr')
+export const getOutliers = async (datasetId, method = 'zscore', threshold = null) => {
+  const params = { method };
+  if (threshold !== null) params.threshold = threshold;
+  const response = await api.get(`/datasets/${datasetId}/outliers/`, { params });
+  return response.data;
+};
+
+// Get timestamped readings downsampled on the server ('minmax' buckets, or 'lttb' for one name)
+export const getTimeseries = async (datasetId, { name = null, method = 'minmax', buckets = 500, fields = null, start = null, end = null } = {}) => {
+  const params = { method, buckets };
+  if (name) params.name = name;
+  if (fields) params.fields = fields.join(',');
+  if (start) params.start = start;
+  if (end) params.end = end;
+  const response = await api.get(`/datasets/${datasetId}/timeseries/`, { params });
+  return response.data;
+};
+
+// Get the history of one piece of equipment across retained datasets
+export const getEquipmentTrend = async (name) => {
+  const response = await api.get('/equipment/trend/', { params: { name } });
+  return response.data;
+};
+
+// Get trend series for many pieces of equipment, keyed by name
+export const getEquipmentTrends = async (names) => {
+  const response = await api.post('/equipment/trend/batch/', { names });
+  return response.data.series;
+};
+
+// Get equipment items (optionally filtered by dataset, and limited to some fields, e.g. ['type', 'flowrate'])
+export const getEquipmentItems = async (datasetId = null, fields = null) => {
+  const params = {};
+  if (datasetId) params.dataset = datasetId;
+  if (fields) params.fields = fields.join(',');
+  const response = await api.get('/equipment/', { params });
   return response.data;
 };
 